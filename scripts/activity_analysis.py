@@ -1,45 +1,15 @@
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# 🔹 Set the correct path to the cleaned data folder
-DATA_FOLDER = "/Users/Elissa/Documents/garmin_data_analysis/cleaned_data"
-
-# 🔹 Define dataset filenames
-files = {
-    "activities": "Activities.csv",
-    "heart_rate": "Average Heart Rate.csv",
-    "calories": "Calories.csv",
-    "floors": "Floors Climbed.csv",
-    "intensity": "Intensity Minutes.csv",
-    "max_hr": "Max Heart Rate.csv",
-    "sleep": "Sleep.csv",
-    "stress": "Stress.csv",
-    "steps": "Steps.csv"
-}
-
-# 🔹 Load all datasets
-data = {name: pd.read_csv(os.path.join(DATA_FOLDER, filename)) for name, filename in files.items()}
-
-# 🔹 Standardize column names
-def clean_column_names(df):
-    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
-    return df
-
-data = {name: clean_column_names(df) for name, df in data.items()}
-
-# 🔹 Ensure the date column is formatted correctly
-def convert_date_column(df, column="date"):
-    if column in df.columns:
-        df[column] = pd.to_datetime(df[column], format="%B %Y", errors="coerce")
-    return df
-
-data = {name: convert_date_column(df) for name, df in data.items()}
+from anomalies import detect
+from datastore import default_store
+from monthly import add_derived_metrics
+from plotting import pyplot, rolling_plot
+
+# 🔹 Cleaned datasets, loaded on first use
+data = default_store()
 
 # --- 📊 Visualize Activity Trends ---
 def plot_activity_trends():
-    df = data["floors"].merge(data["intensity"], on="date", how="inner").sort_values("date")
+    plt, sns = pyplot()
+    df = data.monthly("climbed_floors", "actual")
 
     plt.figure(figsize=(10, 5))
     sns.lineplot(x=df["date"], y=df["climbed_floors"], label="Floors Climbed")
@@ -51,12 +21,10 @@ def plot_activity_trends():
     plt.legend()
     plt.show()
 
-plot_activity_trends()
-
 # --- 📊 Bar Chart of Activity Levels by Month ---
 def plot_activity_bar_chart():
-    df = data["floors"].merge(data["intensity"], on="date", how="inner").sort_values("date")
-    df["total_activity"] = df["climbed_floors"] + df["actual"]
+    plt, sns = pyplot()
+    df = data.monthly("total_activity")
 
     plt.figure(figsize=(10, 5))
     sns.barplot(x=df["date"].dt.strftime('%B %Y'), y=df["total_activity"], palette="coolwarm")
@@ -66,55 +34,62 @@ def plot_activity_bar_chart():
     plt.title("Monthly Activity Levels")
     plt.show()
 
-plot_activity_bar_chart()
-
 # --- 🏆 Most & Least Active Month (Excluding Steps) ---
+def most_and_least_active_month(df, step_df):
+    """Scores each month on floors climbed, intensity, and calories (excluding steps) and picks the extremes."""
+    # Total Activity Score (Excluding Steps), unless the monthly table already carries it
+    df = add_derived_metrics(df, ["total_activity_score"])
+
+    return {
+        "scores": df[["date", "climbed_floors", "actual", "total_calories", "total_activity_score"]],
+        "most_active": df.loc[df["total_activity_score"].idxmax(), "date"],
+        "least_active": df.loc[df["total_activity_score"].idxmin(), "date"],
+        # ✅ Step count trends are reported separately
+        "highest_steps": step_df.loc[step_df["steps"].idxmax(), "date"],
+    }
+
+def step_alerts(step_df):
+    """Months whose step count is anomalous against the whole history (flags with robust z-scores)."""
+    return detect(step_df, ["steps"], window=None)
+
 def calculate_most_and_least_active_month():
     """Calculates the most and least active months using floors climbed, intensity, and calories (excluding steps)."""
-    df = data["floors"].merge(data["intensity"], on="date", how="inner")
-    df = df.merge(data["calories"], on="date", how="inner")
-
-    # Create a Total Activity Score (Excluding Steps)
-    df["total_activity_score"] = (
-        (df["climbed_floors"] * 10) +  # Floors climbed (scaled for impact)
-        df["actual"] +  # Intensity minutes
-        df["total_calories"]  # Total calories burned
-    )
+    result = most_and_least_active_month(
+        data.monthly("climbed_floors", "actual", "total_calories", "total_activity_score"), data.monthly("steps"))
 
     print("\n📊 Activity Metrics Per Month (Excluding Steps):")
-    print(df[["date", "climbed_floors", "actual", "total_calories", "total_activity_score"]].sort_values("date"))
-
-    # Find the most & least active months
-    most_active_month = df.loc[df["total_activity_score"].idxmax(), "date"]
-    least_active_month = df.loc[df["total_activity_score"].idxmin(), "date"]
-
-    print("\n🏆 Most Active Month (Excluding Steps):", most_active_month.strftime('%B %Y'))
-    print("💤 Least Active Month (Excluding Steps):", least_active_month.strftime('%B %Y'))
-
-    # ✅ Mention step count trends separately
-    step_df = data["steps"].sort_values("date")
-    highest_steps_month = step_df.loc[step_df["steps"].idxmax(), "date"]
-    print(f"🚶 High Step Count Alert: {highest_steps_month.strftime('%B %Y')} had an unusually high number of steps.")
-
-calculate_most_and_least_active_month()
+    print(result["scores"])
+
+    print("\n🏆 Most Active Month (Excluding Steps):", result["most_active"].strftime('%B %Y'))
+    print("💤 Least Active Month (Excluding Steps):", result["least_active"].strftime('%B %Y'))
+    # ✅ Step count alerts come from the robust anomaly scores, not from whichever month is largest
+    flagged = step_alerts(data.monthly("steps"))
+    if flagged.empty:
+        print("🚶 No month had an unusual step count.")
+    for _, month in flagged.iterrows():
+        direction = "high" if month["score"] > 0 else "low"
+        print(f"🚶 Step Count Alert: {month['date'].strftime('%B %Y')} had an unusually {direction} number of steps "
+              f"({month['value']:,.0f}, robust z {month['score']:+.1f}).")
+
+# --- 🗓️ Most Active Weeks ---
+def most_active_weeks(df, n=3):
+    """Returns the n weeks with the most intensity minutes."""
+    return df.nlargest(n, "actual")
+
+def analyze_most_active_weeks():
+    """Prints the most active weeks with their steps and resting heart rate (from the weekly rollup)."""
+    top = most_active_weeks(data.rollup("week", "actual", "steps", "heart_rate"))
+    print("\n🗓️ Most Active Weeks (Intensity Minutes):")
+    for _, week in top.iterrows():
+        print(f"   🔹 {week['week']} (from {week['date']:%d %B %Y}): {week['actual']:.0f} min, "
+              f"{week['steps']:,.0f} steps, resting HR {week['heart_rate']:.1f} bpm")
 
 # --- 📊 How Consistent Have I Been With My Workout Frequency? (Fixed Coloring) ---
 def plot_workout_frequency():
     """Analyzes how many days per month have logged activity correctly with fixed color scaling."""
-    df = data["intensity"].copy()
-    
-    # ✅ Convert date back to datetime for sorting
-    df["date"] = pd.to_datetime(df["date"], format="%B %Y", errors="coerce")
-
-    # ✅ Estimate active days per month
-    AVERAGE_MINUTES_PER_WORKOUT = 30  
-    df["estimated_active_days"] = df["actual"] / AVERAGE_MINUTES_PER_WORKOUT
-
-    # ✅ Cap active days at max days per month
-    df["estimated_active_days"] = df.apply(lambda row: min(row["estimated_active_days"], row["date"].days_in_month), axis=1)
-
-    # ✅ Sort the months correctly
-    df = df.sort_values("date")
+    plt, sns = pyplot()
+    # ✅ Estimated active days per month (capped at the days in the month), derived with the monthly table
+    df = data.monthly("estimated_active_days")
 
     # ✅ Normalize values for color scaling
     norm = (df["estimated_active_days"] - df["estimated_active_days"].min()) / (df["estimated_active_days"].max() - df["estimated_active_days"].min())
@@ -133,12 +108,11 @@ def plot_workout_frequency():
     avg_active_days = df["estimated_active_days"].mean()
     print(f"📊 Average Estimated Active Days Per Month: {avg_active_days:.1f}")
 
-plot_workout_frequency()
-
 # --- 📊 Resting Heart Rate vs. Training Intensity ---
 def plot_rhr_vs_intensity():
     """Compares Resting Heart Rate (RHR) with Training Intensity using dual y-axes."""
-    df = data["heart_rate"].merge(data["intensity"], on="date", how="inner").sort_values("date")
+    plt, sns = pyplot()
+    df = data.monthly("heart_rate", "actual")
 
     fig, ax1 = plt.subplots(figsize=(12, 6))
 
@@ -163,7 +137,30 @@ def plot_rhr_vs_intensity():
     plt.xticks(rotation=45)
     plt.show()
 
-plot_rhr_vs_intensity()
+# --- 📊 Daily Resting Heart Rate with Rolling Windows ---
+def plot_rhr_rolling():
+    """Plots resting heart rate day by day, smoothed by rolling means and an EWM."""
+    plt, _ = pyplot()
+    plt.figure(figsize=(12, 5))
+    rolling_plot(data["rolling"], "heart_rate")
+    plt.xticks(rotation=45)
+    plt.ylabel("Resting Heart Rate (bpm)")
+    plt.xlabel("Day")
+    plt.title("Daily Resting Heart Rate with Rolling Averages")
+    plt.grid(True)
+    plt.show()
+
+def main():
+    plot_activity_trends()
+    plot_activity_bar_chart()
+    calculate_most_and_least_active_month()
+    analyze_most_active_weeks()
+    plot_workout_frequency()
+    plot_rhr_vs_intensity()
+    plot_rhr_rolling()
+
+    # ✅ Ensure Plots Do Not Block Terminal Execution
+    pyplot()[0].show(block=False)
 
-# ✅ Ensure Plots Do Not Block Terminal Execution
-plt.show(block=False)
+if __name__ == "__main__":
+    main()
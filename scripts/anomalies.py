@@ -0,0 +1,154 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 🔹 Anomaly flags for every metric at once, as robust z-scores.
+# A value's score is its distance from the median of a reference set of values, in units of the scaled median
+# absolute deviation (1.4826 * MAD estimates the standard deviation without being dragged by outliers;
+# 1.2533 * mean absolute deviation stands in when more than half the values are equal). |score| >= 3.5 is
+# flagged (Iglewicz & Hoaglin). The reference set is either
+#   - the trailing window of the previous `window` values of the same series (causal: a value is judged only
+#     against what came before it, exactly as the streaming detector sees it when the value is ingested), or
+#   - the whole series, optionally after removing a seasonal pattern (e.g. the median of each weekday).
+# Scores are computed on a (time x series) array in one pass, so a table of many metrics, or of many users'
+# metrics side by side, costs one vectorized computation.
+
+ANOMALIES_FILENAME = "Anomalies.csv"
+ANOMALIES_VERSION = 1
+THRESHOLD = 3.5
+WINDOW = 28       # values (days) in the trailing reference window
+MIN_HISTORY = 7   # fewer non-missing reference values than this: no score
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+BLOCK = 1 << 22   # window values held at once by trailing_scores (rows x series x window)
+# Clock times that wrap around midnight -> the minute before which a time belongs to the next day
+# (a 00:30 bedtime is 1470 minutes after the previous midnight, not 30)
+WRAPPING = {"avg_bedtime": 12 * 60}
+
+
+def _nanmedian(values, axis):
+    """Median ignoring NaN (NaN where all are missing); sorting puts NaN last, so no per-window fallback loop."""
+    ordered = np.sort(values, axis=axis)
+    count = (~np.isnan(ordered)).sum(axis=axis, keepdims=True)
+    low = np.take_along_axis(ordered, np.maximum(count - 1, 0) // 2, axis)
+    high = np.take_along_axis(ordered, count // 2, axis)
+    return ((low + high) / 2).squeeze(axis)
+
+
+def _scale(deviations, axis):
+    """Robust spread of absolute deviations along an axis (NaN where the values do not vary)."""
+    scale = MAD_SCALE * _nanmedian(deviations, axis)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        fallback = MEAN_AD_SCALE * np.nanmean(deviations, axis=axis)
+    scale = np.where(scale > 0, scale, fallback)
+    return np.where(scale > 0, scale, np.nan)
+
+
+def trailing_scores(values, window=WINDOW, min_history=MIN_HISTORY):
+    """Robust z-score of each row of a (time x series) array against the `window` rows before it."""
+    values = np.asarray(values, dtype="float64")
+    if values.ndim == 1:
+        return trailing_scores(values[:, None], window, min_history)[:, 0]
+    if len(values) == 0:
+        return np.empty_like(values)  # e.g. a Daily.csv without days, when every export is month-labelled
+    padded = np.vstack([np.full((window, values.shape[1]), np.nan), values])
+    windows = sliding_window_view(padded[:-1], window, axis=0)  # row t: the window rows before t (no copy)
+    scores = np.empty_like(values)
+    rows = max(1, BLOCK // (window * max(values.shape[1], 1)))
+    for start in range(0, len(values), rows):  # in blocks of rows, so the deviations stay small
+        history = windows[start: start + rows]
+        center = _nanmedian(history, 2)
+        scale = _scale(np.abs(history - center[..., None]), axis=2)
+        enough = (~np.isnan(history)).sum(axis=2) >= min_history
+        scores[start: start + rows] = np.where(enough, (values[start: start + rows] - center) / scale, np.nan)
+    return scores
+
+
+def overall_scores(values, seasons=None):
+    """Robust z-score of each row of a (time x series) array against the whole series.
+
+    `seasons` labels each row (e.g. its weekday); the median of each label is removed first, so only the
+    residual left after the seasonal pattern is scored.
+    """
+    values = np.asarray(values, dtype="float64")
+    if values.ndim == 1:
+        return overall_scores(values[:, None], seasons)[:, 0]
+    if len(values) == 0:
+        return np.empty_like(values)
+    if seasons is not None:
+        values = values - pd.DataFrame(values).groupby(np.asarray(seasons)).transform("median").to_numpy()
+    center = _nanmedian(values, 0)
+    return (values - center) / _scale(np.abs(values - center), axis=0)
+
+
+def unwrap(table):
+    """Shifts wrapping clock times (see WRAPPING) past midnight so late evenings and early mornings are close."""
+    shifts = {c: table[c].where(table[c] >= cutoff, table[c] + 24 * 60) for c, cutoff in WRAPPING.items() if c in table}
+    return table.assign(**shifts) if shifts else table
+
+
+def score_table(table, metrics=None, window=WINDOW, seasons=None):
+    """Scores every metric column of a wide table (date + metrics); window=None scores against the whole series."""
+    metrics = metrics or [c for c in table.columns if c != "date" and pd.api.types.is_numeric_dtype(table[c])]
+    values = unwrap(table[metrics]).to_numpy("float64")
+    scores = trailing_scores(values, window) if window else overall_scores(values, seasons)
+    return pd.concat([table[["date"]].reset_index(drop=True), pd.DataFrame(scores, columns=metrics)], axis=1)
+
+
+def flags(table, scores, threshold=THRESHOLD):
+    """Long table of the flagged values: date, metric, value and score, most extreme first."""
+    metrics = [c for c in scores.columns if c != "date"]
+    score = scores[metrics].to_numpy()
+    rows, columns = np.nonzero(np.abs(np.nan_to_num(score)) >= threshold)
+    found = pd.DataFrame({
+        "date": scores["date"].to_numpy()[rows],
+        "metric": np.asarray(metrics, dtype=object)[columns],
+        "value": table[metrics].to_numpy("float64")[rows, columns],
+        "score": score[rows, columns],
+    })
+    return found.iloc[np.argsort(-np.abs(found["score"].to_numpy()), kind="stable")].reset_index(drop=True)
+
+
+def detect(table, metrics=None, threshold=THRESHOLD, window=WINDOW, seasons=None):
+    """Flags the anomalous values of every metric column of a wide table (see score_table and flags)."""
+    return flags(table, score_table(table, metrics, window, seasons), threshold)
+
+
+class StreamingDetector:
+    """Flags each new row of many series as it arrives, against a ring buffer of their last `window` values.
+
+    Gives the same scores as trailing_scores over the same values; a push costs one vectorized median over
+    (series x window), whatever the length of the history.
+    """
+
+    def __init__(self, series, window=WINDOW, min_history=MIN_HISTORY, threshold=THRESHOLD):
+        self.series = list(series)
+        self.window, self.min_history, self.threshold = window, min_history, threshold
+        self.buffer = np.full((len(self.series), window), np.nan)
+        self.position = 0  # next slot of the ring buffer to overwrite
+
+    @classmethod
+    def from_table(cls, table, metrics=None, **options):
+        """A detector primed with the last rows of a wide table, ready for the rows that follow it."""
+        metrics = metrics or [c for c in table.columns if c != "date" and pd.api.types.is_numeric_dtype(table[c])]
+        detector = cls(metrics, **options)
+        for row in unwrap(table[metrics]).to_numpy("float64")[-detector.window:]:
+            detector.push(row)
+        return detector
+
+    def push(self, values):
+        """Scores one new value per series (NaN where missing), then adds them to the history.
+
+        Returns (scores, flagged): arrays aligned with `series`. Clock times are expected unwrapped (see unwrap).
+        """
+        values = np.asarray(values, dtype="float64")
+        center = _nanmedian(self.buffer, 1)
+        scale = _scale(np.abs(self.buffer - center[:, None]), axis=1)
+        enough = (~np.isnan(self.buffer)).sum(axis=1) >= self.min_history
+        scores = np.where(enough, (values - center) / scale, np.nan)
+        self.buffer[:, self.position] = values
+        self.position = (self.position + 1) % self.window
+        return scores, np.abs(np.nan_to_num(scores)) >= self.threshold
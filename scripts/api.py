@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import cache
+from datastore import DATA_ROOT, DATASETS, DataStore
+
+# 🔹 Local JSON API for dashboards: the numbers the analysis scripts print, served from the cleaned tables.
+#   GET /                  -> the endpoints and their parameters
+#   GET /active-months     GET /active-weeks?n=3     GET /sleep-extremes     GET /stress-extremes
+#   GET /correlations?method=pearson&lag=0           GET /anomalies?resolution=day&metric=steps&limit=20
+# Responses are kept, already encoded, in an in-memory LRU cache. Each entry records the version (size and
+# modification time) of the dataset files it was computed from; a request compares that with the files on disk
+# (a few os.stat calls), so a hit is answered in well under a millisecond and an entry is recomputed as soon as
+# cleaning rewrites one of its datasets. Every client is served by its own thread; concurrent misses for the
+# same response wait for a single computation instead of each running it.
+
+HOST = "127.0.0.1"
+PORT = 8765
+CACHE_SIZE = 256
+
+
+def _month(date):
+    return date.strftime("%Y-%m")
+
+
+def active_months(store):
+    from activity_analysis import most_and_least_active_month, step_alerts
+
+    result = most_and_least_active_month(
+        store.monthly("climbed_floors", "actual", "total_calories", "total_activity_score"), store.monthly("steps"))
+    alerts = step_alerts(store.monthly("steps"))
+    return {
+        "most_active": _month(result["most_active"]),
+        "least_active": _month(result["least_active"]),
+        "highest_steps": _month(result["highest_steps"]),
+        "scores": result["scores"].assign(date=result["scores"]["date"].map(_month)),
+        "step_alerts": [{"month": _month(row["date"]), "steps": row["value"], "score": row["score"]}
+                        for _, row in alerts.iterrows()],
+    }
+
+
+def active_weeks(store, n=3):
+    from activity_analysis import most_active_weeks
+
+    top = most_active_weeks(store.rollup("week", "actual", "steps", "heart_rate"), n)
+    return {"weeks": top.assign(week=top["week"].astype(str), date=top["date"].dt.strftime("%Y-%m-%d"))}
+
+
+def sleep_extremes(store):
+    from sleep_analysis import best_worst_sleep
+
+    result = best_worst_sleep(store["sleep"])
+    return {"average_minutes": result["average_minutes"],
+            "best_month": _month(result["best_month"]), "best_minutes": result["best_minutes"],
+            "worst_month": _month(result["worst_month"]), "worst_minutes": result["worst_minutes"]}
+
+
+def stress_extremes(store):
+    from stress_analysis import seasonal_stress, stress_extremes as extremes
+
+    result = extremes(store["stress"])
+    by_season = seasonal_stress(store.rollup("season", "stress")) if "seasonal" in store else {}
+    return {"most_stressful": _month(result["most_stressful"]), "least_stressful": _month(result["least_stressful"]),
+            "seasonal": by_season}
+
+
+def correlation_matrix(store, method="pearson", lag=0):
+    from correlations import correlations
+
+    corr = correlations(store)
+    if method not in corr.methods or lag not in corr.lags:
+        raise ValueError(f"method must be one of {corr.methods} and lag one of {corr.lags}")
+    return {"method": method, "lag": lag, "columns": corr.columns,
+            "r": corr.matrix(method, lag).to_numpy().tolist(), "n": corr.counts(lag).to_numpy().tolist()}
+
+
+def anomalies(store, resolution="", metric="", limit=50):
+    flagged = store["anomalies"]
+    if resolution:
+        flagged = flagged[flagged["resolution"] == resolution]
+    if metric:
+        flagged = flagged[flagged["metric"] == metric]
+    flagged = flagged.head(limit)
+    return {"anomalies": flagged.assign(date=flagged["date"].dt.strftime("%Y-%m-%d"),
+                                        resolution=flagged["resolution"].astype(str),
+                                        metric=flagged["metric"].astype(str))}
+
+
+# Path -> (function(store, **parameters), datasets it reads, {parameter: default}); a parameter's type is its default's
+ENDPOINTS = {
+    "/active-months": (active_months, ["monthly"], {}),
+    "/active-weeks": (active_weeks, ["weekly"], {"n": 3}),
+    "/sleep-extremes": (sleep_extremes, ["sleep"], {}),
+    "/stress-extremes": (stress_extremes, ["stress", "seasonal"], {}),
+    "/correlations": (correlation_matrix, ["monthly"], {"method": "pearson", "lag": 0}),
+    "/anomalies": (anomalies, ["anomalies"], {"resolution": "", "metric": "", "limit": 50}),
+}
+
+
+def _decimal(series):
+    return series.astype(str).astype("float64") if series.dtype == "float32" else series
+
+
+def jsonable(value):
+    """Converts NumPy / pandas scalars to plain Python, and NaN to None, so the result encodes as strict JSON.
+
+    float32 values (the averaged metrics of the wide tables) become the decimal they print as, so 62.285713
+    is not sent as 62.28571319580078.
+    """
+    if isinstance(value, pd.Series):
+        return jsonable(_decimal(value).to_dict())
+    if isinstance(value, pd.DataFrame):
+        return jsonable(value.apply(_decimal).to_dict("records"))
+    if isinstance(value, dict):
+        return {str(k): jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, np.float32):
+        value = float(str(value))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache of (version, value) entries."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """The value stored for `key` if it was stored for this version, else None (a stale entry is dropped)."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, value):
+        with self._lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class MetricsService:
+    """Computes endpoint responses from the cleaned datasets under `root`, caching them until their inputs change."""
+
+    def __init__(self, root=None, cache_size=CACHE_SIZE):
+        self.root = root or DATA_ROOT
+        self.cache = LRUCache(cache_size)
+        self._computing = {path: threading.Lock() for path in ENDPOINTS}  # held while one of its responses is computed
+
+    def version(self, datasets):
+        """Size and modification time of the files the datasets are read from (cleaned CSV and cache entry)."""
+        cache_folder = cache.cache_folder_for(self.root)
+        paths = []
+        for name in datasets:
+            paths += [os.path.join(self.root, DATASETS[name]), cache.table_path(DATASETS[name], cache_folder)]
+        return tuple((s.st_size, s.st_mtime_ns) if s else None for s in map(_stat, paths))
+
+    def parameters(self, path, query):
+        """The endpoint's parameters from a query string, cast to the type of their defaults."""
+        _, _, defaults = ENDPOINTS[path]
+        given = {name: values[-1] for name, values in parse_qs(query).items()}
+        unknown = set(given) - set(defaults)
+        if unknown:
+            raise ValueError(f"unknown parameter(s): {', '.join(sorted(unknown))}")
+        return {name: type(default)(given.get(name, default)) for name, default in defaults.items()}
+
+    def response(self, path, query=""):
+        """(JSON body, ETag) of an endpoint's response; raises ValueError for bad parameters."""
+        function, datasets, _ = ENDPOINTS[path]
+        parameters = self.parameters(path, query)
+        key = (path, tuple(sorted(parameters.items())))
+        version = self.version(datasets)
+        cached = self.cache.get(key, version)
+        if cached is not None:
+            return cached
+        # One computation per endpoint at a time (some write a shared cache entry, e.g. the correlations)
+        with self._computing[path]:
+            # Another thread may have computed it while this one waited
+            cached = self.cache.get(key, version)
+            if cached is not None:
+                return cached
+            body = json.dumps(jsonable(function(DataStore(self.root), **parameters)), allow_nan=False).encode()
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            self.cache.put(key, version, (body, etag))
+            return body, etag
+
+    def index(self):
+        return json.dumps({"endpoints": {path: defaults for path, (_, _, defaults) in ENDPOINTS.items()},
+                           "cache": self.cache.stats()}).encode()
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None  # set by serve()
+    protocol_version = "HTTP/1.1"  # keep-alive: a dashboard polling several endpoints reuses its connection
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            if url.path == "/":
+                body, etag = self.service.index(), None
+            elif url.path in ENDPOINTS:
+                body, etag = self.service.response(url.path, url.query)
+            else:
+                return self._send(404, json.dumps({"error": f"unknown endpoint {url.path}"}).encode())
+        except ValueError as e:
+            return self._send(400, json.dumps({"error": str(e)}).encode())
+        except Exception as e:
+            return self._send(500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode())
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", etag)
+        self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the console under dashboard polling
+
+
+def serve(host=HOST, port=PORT, root=None, cache_size=CACHE_SIZE):
+    """Runs the API until interrupted."""
+    Handler.service = MetricsService(root, cache_size)
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"✅ Serving metrics from {Handler.service.root} on http://{host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the analysis results as JSON for dashboards.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="responses kept in memory")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, cache_size=args.cache_size)
+
+
+if __name__ == "__main__":
+    main()
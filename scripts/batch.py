@@ -0,0 +1,139 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# 🔹 Cohort mode: clean and analyse one export folder per user in parallel.
+# Layout:  <cohort>/<user_id>/*.csv  ->  <output>/<user_id>/cleaned_data/, summary.json, clean.log
+#          plus <output>/cohort_summary.csv and <output>/cohort_failures.csv for the whole cohort.
+
+
+def summarize_user(store):
+    """Computes the activity and stress results for one user's cleaned data."""
+    from activity_analysis import most_and_least_active_month
+    from stress_analysis import stress_extremes
+
+    summary = {}
+    if all(name in store for name in ("floors", "intensity", "calories", "steps")):
+        active = most_and_least_active_month(store.monthly("climbed_floors", "actual", "total_calories", "total_activity_score"),
+                                             store.monthly("steps"))
+        summary["most_active_month"] = active["most_active"].strftime("%B %Y")
+        summary["least_active_month"] = active["least_active"].strftime("%B %Y")
+        summary["highest_steps_month"] = active["highest_steps"].strftime("%B %Y")
+    if "stress" in store:
+        extremes = stress_extremes(store["stress"])
+        summary["most_stressful_month"] = extremes["most_stressful"].strftime("%B %Y")
+        summary["least_stressful_month"] = extremes["least_stressful"].strftime("%B %Y")
+        summary["average_stress"] = float(store["stress"]["stress"].mean())
+    if "anomalies" in store:
+        flagged = store["anomalies"]
+        summary["anomalous_days"] = int((flagged["resolution"] == "day").sum())
+        summary["anomalous_months"] = int((flagged["resolution"] == "month").sum())
+    monthly = store["monthly"]
+    for column in ("steps", "actual", "total_calories"):
+        if column in monthly:
+            summary[f"monthly_{column}_mean"] = float(monthly[column].mean())
+    summary["months"] = int(len(monthly))
+    return summary
+
+
+def process_user(user_id, export_folder, output_folder):
+    """Worker: cleans one user's export and writes its results under output_folder/user_id."""
+    import process_and_clean
+    from datastore import DataStore
+
+    started = time.perf_counter()
+    user_folder = os.path.join(output_folder, user_id)
+    cleaned_folder = os.path.join(user_folder, "cleaned_data")
+    os.makedirs(user_folder, exist_ok=True)
+    try:
+        # Per-dataset progress lines go to the user's log instead of the shared terminal
+        with open(os.path.join(user_folder, "clean.log"), "w") as log, contextlib.redirect_stdout(log):
+            process_and_clean.set_folders(export_folder, cleaned_folder)
+            results = process_and_clean.process_all(process_and_clean.datasets)
+            process_and_clean.write_monthly_table()
+            process_and_clean.write_rollups()
+            process_and_clean.write_rolling()
+            process_and_clean.write_anomalies()
+        failed = {name: error for name, (status, error) in results.items() if status == "failed"}
+        if failed:
+            raise RuntimeError("; ".join(f"{name}: {error}" for name, error in failed.items()))
+
+        summary = {"user_id": user_id, **summarize_user(DataStore(cleaned_folder))}
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        with open(os.path.join(user_folder, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary, None
+    except Exception as e:
+        with open(os.path.join(user_folder, "error.log"), "w") as f:
+            f.write(traceback.format_exc())
+        return {"user_id": user_id}, f"{type(e).__name__}: {e}"
+
+
+def run_cohort(cohort_folder, output_folder, workers=None):
+    """Processes every user folder in the cohort; one user's failure never stops the rest."""
+    users = sorted(name for name in os.listdir(cohort_folder) if os.path.isdir(os.path.join(cohort_folder, name)))
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"👥 Processing {len(users)} users from {cohort_folder} with {workers or os.cpu_count()} workers...")
+
+    started = time.perf_counter()
+    summaries, failures = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_user, user, os.path.join(cohort_folder, user), output_folder) for user in users]
+        for done, future in enumerate(as_completed(futures), 1):
+            summary, error = future.result()
+            if error:
+                failures.append({"user_id": summary["user_id"], "error": error})
+                print(f"❌ {summary['user_id']}: {error}")
+            else:
+                summaries.append(summary)
+            if done % 100 == 0:
+                print(f"   🔹 {done}/{len(users)} users done")
+
+    cohort = pd.DataFrame(summaries).sort_values("user_id") if summaries else pd.DataFrame(columns=["user_id"])
+    cohort.to_csv(os.path.join(output_folder, "cohort_summary.csv"), index=False)
+    pd.DataFrame(failures, columns=["user_id", "error"]).to_csv(os.path.join(output_folder, "cohort_failures.csv"), index=False)
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ {len(summaries)} users processed, ❌ {len(failures)} failed in {elapsed:.1f}s "
+          f"({len(users) / elapsed * 3600 if elapsed else 0:,.0f} users/hour)")
+    print_cohort_overview(cohort)
+    return cohort, failures
+
+
+def print_cohort_overview(cohort):
+    """Prints the cohort-level view of the per-user results."""
+    if cohort.empty:
+        return
+    print("\n📊 Cohort Summary:")
+    for column, label in [("most_active_month", "Most common most-active month"),
+                          ("least_active_month", "Most common least-active month"),
+                          ("most_stressful_month", "Most common most-stressful month"),
+                          ("least_stressful_month", "Most common least-stressful month")]:
+        if column in cohort and cohort[column].notna().any():
+            counts = cohort[column].value_counts()
+            print(f"   🔹 {label}: {counts.index[0]} ({counts.iloc[0]} users)")
+    if "average_stress" in cohort:
+        print(f"   🔹 Average stress across users: {cohort['average_stress'].mean():.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean and analyse a cohort: one Garmin export folder per user.")
+    parser.add_argument("cohort_folder", help="folder containing one export folder per user")
+    parser.add_argument("output_folder", help="where per-user results and the cohort summary are written")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    _, failures = run_cohort(args.cohort_folder, args.output_folder, workers=args.workers)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from parsing import parse_clock_times, parse_durations
+
+# 🔹 Per-row converters as they were used in the cleaning and analysis scripts (kept here as the baseline)
+def legacy_convert_time_to_minutes(time_str):
+    """Converts time in 'HH:MM AM/PM' format to minutes since midnight."""
+    try:
+        time_obj = pd.to_datetime(time_str, format="%I:%M %p")
+        return time_obj.hour * 60 + time_obj.minute
+    except:
+        return None
+
+def legacy_convert_duration_to_minutes(duration_str):
+    """Converts sleep duration from 'Xh Ymin' format to total minutes."""
+    try:
+        hours, minutes = 0, 0
+        if "h" in duration_str:
+            hours = int(duration_str.split("h")[0].strip())
+        if "min" in duration_str:
+            minutes = int(duration_str.split("h")[-1].replace("min", "").strip())
+        return hours * 60 + minutes
+    except:
+        return None
+
+# 🔹 Build a sleep-like sample with a few malformed cells mixed in
+def make_sample(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    total = rng.integers(300, 600, rows)
+    durations = pd.Series([f"{m // 60}h {m % 60}min" for m in total])
+    hours = rng.integers(1, 13, rows)
+    mins = rng.integers(0, 60, rows)
+    meridiem = rng.choice(["AM", "PM"], rows)
+    times = pd.Series([f"{h}:{m:02d} {p}" for h, m, p in zip(hours, mins, meridiem)])
+    bad = rng.random(rows) < 0.01
+    durations[bad] = "--"
+    times[bad] = "--"
+    return durations, times
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run(rows):
+    durations, times = make_sample(rows)
+
+    legacy_durations, t_legacy_d = timed(lambda s: s.apply(legacy_convert_duration_to_minutes), durations)
+    (new_durations, rejected_d), t_new_d = timed(parse_durations, durations)
+    legacy_times, t_legacy_t = timed(lambda s: s.apply(legacy_convert_time_to_minutes), times)
+    (new_times, rejected_t), t_new_t = timed(parse_clock_times, times)
+
+    # ✅ The vectorized parsers must agree with the per-row ones on every accepted value
+    # (the per-row duration converter silently turns text without "h"/"min" into 0, which is now rejected)
+    assert np.allclose(pd.to_numeric(legacy_durations)[~rejected_d], new_durations[~rejected_d], equal_nan=True)
+    assert np.allclose(pd.to_numeric(legacy_times), new_times, equal_nan=True)
+
+    print(f"\n📊 {rows:,} rows")
+    print(f"   🔹 Durations:   per-row {t_legacy_d:8.3f}s | vectorized {t_new_d:8.3f}s | {t_legacy_d / t_new_d:6.1f}x")
+    print(f"   🔹 Clock times: per-row {t_legacy_t:8.3f}s | vectorized {t_new_t:8.3f}s | {t_legacy_t / t_new_t:6.1f}x")
+    print(f"   ⚠️ Rejected: {int(rejected_d.sum())} durations, {int(rejected_t.sum())} clock times")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized sleep parsers against the per-row converters.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+    for rows in args.rows:
+        run(rows)
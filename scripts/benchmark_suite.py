@@ -0,0 +1,198 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import process_and_clean
+from cache import cache_folder_for
+from datastore import DataStore
+from generate_garmin_data import generate_export
+
+# 🔹 Times and memory-profiles every cleaner and analysis on synthetic exports of several sizes.
+# Results are saved as JSON under benchmarks/ so two runs (e.g. before and after a change) can be compared.
+
+RESULTS_FOLDER = "benchmarks"
+
+# Changes smaller than this are timer / allocator noise and never count as a regression
+NOISE_FLOOR = {"seconds": 0.005, "peak_mb": 0.5}
+
+
+def measure(func, repeat=3):
+    """Best wall time of `repeat` runs, then one extra run under tracemalloc for the peak Python allocation."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_mb": round(peak / 2**20, 3)}
+
+
+def bench_cleaners(export_folder, repeat):
+    """One entry per clean_* function, timed on the raw frame as process_and_clean reads it."""
+    results = {}
+    for filename, cleaning_function in process_and_clean.datasets.items():
+        raw = pd.read_csv(os.path.join(export_folder, filename), dtype=str)
+        with contextlib.redirect_stdout(io.StringIO()):  # silence the rejected-value reports
+            result = measure(lambda: cleaning_function(raw.copy()), repeat)
+        results[cleaning_function.__name__] = {"rows": len(raw), **result}
+    return results
+
+
+def bench_pipeline(export_folder, cleaned_folder):
+    """Full cleaning run (read, clean, write) followed by the monthly table, measured once without the cache."""
+    def run():
+        process_and_clean.set_folders(export_folder, cleaned_folder)
+        with contextlib.redirect_stdout(io.StringIO()):
+            process_and_clean.process_all(process_and_clean.datasets)
+            process_and_clean.write_monthly_table()
+
+    def cold_run():
+        for folder in (cleaned_folder, cache_folder_for(cleaned_folder)):
+            if os.path.isdir(folder):
+                for name in os.listdir(folder):
+                    os.remove(os.path.join(folder, name))
+        run()
+
+    results = {"process_all": measure(cold_run, repeat=1)}
+    results["process_all_cached"] = measure(run, repeat=1)
+    return results
+
+
+def analyses(cleaned_folder):
+    """Compute-only analysis steps -> zero-argument callables on a fresh DataStore each time."""
+    from activity_analysis import most_and_least_active_month
+    from sleep_analysis import best_worst_sleep
+    from stress_analysis import stress_extremes
+    from correlations import compute_correlations
+
+    return {
+        "load_all": lambda: DataStore(cleaned_folder).load(*DataStore(cleaned_folder).available()),
+        "active_months": lambda: most_and_least_active_month(
+            DataStore(cleaned_folder).monthly("climbed_floors", "actual", "total_calories", "total_activity_score"),
+            DataStore(cleaned_folder).monthly("steps")),
+        "stress_extremes": lambda: stress_extremes(DataStore(cleaned_folder)["stress"]),
+        "sleep_extremes": lambda: best_worst_sleep(DataStore(cleaned_folder)["sleep"]),
+        "correlations": lambda: compute_correlations(DataStore(cleaned_folder)["monthly"]),
+    }
+
+
+def bench_analyses(cleaned_folder, repeat):
+    return {name: measure(func, repeat) for name, func in analyses(cleaned_folder).items()}
+
+
+def run_suite(sizes, samples_per_day=1, repeat=3, seed=0):
+    """Benchmarks every size (in days of data) and returns the nested results."""
+    results = {}
+    for days in sizes:
+        print(f"🔹 {days} days x {samples_per_day} samples/day...")
+        with tempfile.TemporaryDirectory() as tmp:
+            export_folder = os.path.join(tmp, "data")
+            cleaned_folder = os.path.join(tmp, "cleaned_data")
+            generate_export(export_folder, days=days, samples_per_day=samples_per_day, seed=seed)
+            results[str(days)] = {
+                "cleaners": bench_cleaners(export_folder, repeat),
+                "pipeline": bench_pipeline(export_folder, cleaned_folder),
+                "analyses": bench_analyses(cleaned_folder, repeat),
+            }
+        print_results({str(days): results[str(days)]})
+    return results
+
+
+def flatten(results):
+    """{size: {group: {name: metrics}}} -> {(size, group, name): metrics}"""
+    return {(size, group, name): metrics
+            for size, groups in results.items()
+            for group, entries in groups.items()
+            for name, metrics in entries.items()}
+
+
+def print_results(results):
+    for (size, group, name), metrics in flatten(results).items():
+        rows = f" {metrics['rows']:>9,} rows" if "rows" in metrics else " " * 15
+        print(f"   {size:>6}d {group:<9} {name:<28}{rows} {metrics['seconds'] * 1000:>10.1f} ms "
+              f"{metrics['peak_mb']:>9.1f} MB")
+
+
+def compare(old, new, threshold=1.25):
+    """Prints the time and memory ratio of every benchmark in both runs; returns the regressed ones."""
+    old_flat, new_flat = flatten(old["results"]), flatten(new["results"])
+    regressions = []
+    print(f"\n📊 Comparison with {old['created']} (ratios new/old, ⚠️ above {threshold:.2f}x):")
+    for key in new_flat:
+        if key not in old_flat:
+            continue
+        ratios, regressed = {}, False
+        for metric, floor in NOISE_FLOOR.items():
+            before, after = old_flat[key][metric], new_flat[key][metric]
+            ratios[metric] = after / before if before else 1.0
+            regressed |= ratios[metric] > threshold and after - before > floor
+        flag = "⚠️" if regressed else "  "
+        if regressed:
+            regressions.append(key)
+        size, group, name = key
+        print(f"{flag} {size:>6}d {group:<9} {name:<28} time {ratios['seconds']:>5.2f}x   memory {ratios['peak_mb']:>5.2f}x")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def save(results, args, folder=RESULTS_FOLDER):
+    os.makedirs(folder, exist_ok=True)
+    created = time.strftime("%Y-%m-%dT%H:%M:%S")
+    run = {
+        "created": created,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "samples_per_day": args.samples_per_day,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    path = os.path.join(folder, f"bench-{created.replace(':', '')}.json")
+    with open(path, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"✅ Saved benchmark results to {path}")
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cleaners and analyses on synthetic exports.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[365, 3650], help="export sizes in days")
+    parser.add_argument("--samples-per-day", type=int, default=1, help="stress / heart-rate rows per day")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--compare", metavar="RESULTS_JSON", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio reported as a regression")
+    parser.add_argument("--output-folder", default=RESULTS_FOLDER)
+    args = parser.parse_args(argv)
+
+    run = save(run_suite(args.sizes, args.samples_per_day, args.repeat), args, args.output_folder)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), run, args.threshold)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} benchmark(s) regressed beyond {args.threshold:.2f}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# 🔹 Incremental build of the whole pipeline as a dependency graph:
+#   raw exports -> cleaned tables -> monthly table, rollups, rolling statistics, anomalies
+#               -> analysis results (JSON) and figures -> report sections -> outputs/report.md
+# Every node is fingerprinted by its code (the modules it runs) and its inputs (the files, or only the
+# dataset columns, it reads). A run walks the graph in dependency order: a node whose fingerprint matches
+# its last successful run and whose outputs exist is skipped, the stale ones run in parallel worker
+# processes as soon as the nodes they wait for are done. Fingerprints hash content, so a rebuilt table that
+# comes out the same stops the rebuild there, and editing one raw CSV only re-renders the figures and
+# report sections that read the columns it feeds.
+
+MANIFEST_NAME = ".build_manifest.json"
+RESULTS_FOLDER = "results"
+SECTIONS_FOLDER = "report_sections"
+REPORT_FILENAME = "report.md"
+
+# Modules whose code each kind of node runs (a change to one of them makes the node stale)
+CLEAN_CODE = ["process_and_clean", "parsing", "partials", "schema", "cache"]
+TABLE_CODE = {
+    "monthly": ["process_and_clean", "monthly", "schema"],
+    "rollups": ["process_and_clean", "rollups", "partials", "monthly", "schema"],
+    "rolling": ["process_and_clean", "rolling", "schema"],
+    "anomalies": ["process_and_clean", "anomalies", "schema"],
+}
+
+
+class Node:
+    """One build step: the action it runs, the files it writes, the nodes it waits for and what it reads."""
+
+    def __init__(self, name, action, outputs, after=(), files=(), datasets=None, code=()):
+        self.name = name
+        self.action = action            # (module, function, args), run in a worker process
+        self.outputs = list(outputs)
+        self.after = list(after)
+        self.files = list(files)        # files read whole
+        self.datasets = datasets or {}  # {dataset name: columns read, or None for the whole file}
+        self.code = list(code)
+
+
+# --- 🔹 Analysis results: name -> (function below, module it uses, {dataset: columns}) ---
+
+def _month(date):
+    return date.strftime("%B %Y")
+
+
+def active_months_result(store):
+    from activity_analysis import most_and_least_active_month, step_alerts
+
+    result = most_and_least_active_month(
+        store.monthly("climbed_floors", "actual", "total_calories", "total_activity_score"), store.monthly("steps"))
+    alerts = step_alerts(store.monthly("steps"))
+    lines = [f"Most active month (excluding steps): {_month(result['most_active'])}",
+             f"Least active month (excluding steps): {_month(result['least_active'])}",
+             f"Highest step count: {_month(result['highest_steps'])}"]
+    lines += [f"Unusual step count in {_month(row['date'])}: {row['value']:,.0f} steps (robust z {row['score']:+.1f})"
+              for _, row in alerts.iterrows()]
+    return {"most_active": _month(result["most_active"]), "least_active": _month(result["least_active"]),
+            "highest_steps": _month(result["highest_steps"]), "lines": lines}
+
+
+def active_weeks_result(store):
+    from activity_analysis import most_active_weeks
+
+    top = most_active_weeks(store.rollup("week", "actual", "steps", "heart_rate"))
+    lines = [f"Active week {row['week']}: {row['actual']:.0f} intensity minutes, {row['steps']:,.0f} steps, "
+             f"resting HR {row['heart_rate']:.1f} bpm" for _, row in top.iterrows()]
+    return {"weeks": top["week"].astype(str).tolist(), "lines": lines}
+
+
+def sleep_result(store):
+    from sleep_analysis import best_worst_sleep
+
+    result = best_worst_sleep(store["sleep"])
+    average = result["average_minutes"]
+    return {"average_minutes": float(average), "best_month": _month(result["best_month"]),
+            "worst_month": _month(result["worst_month"]),
+            "lines": [f"Average sleep: {average // 60:.0f}h {average % 60:.0f}min",
+                      f"Best sleep month: {_month(result['best_month'])} ({result['best_minutes']:.0f} minutes)",
+                      f"Worst sleep month: {_month(result['worst_month'])} ({result['worst_minutes']:.0f} minutes)"]}
+
+
+def stress_result(store):
+    from stress_analysis import seasonal_stress, stress_extremes
+
+    extremes = stress_extremes(store["stress"])
+    lines = [f"Most stressful month: {_month(extremes['most_stressful'])}",
+             f"Least stressful month: {_month(extremes['least_stressful'])}"]
+    if "seasonal" in store:
+        lines += [f"{season}: average stress {stress:.1f}"
+                  for season, stress in seasonal_stress(store.rollup("season", "stress")).items()]
+    return {"most_stressful": _month(extremes["most_stressful"]),
+            "least_stressful": _month(extremes["least_stressful"]), "lines": lines}
+
+
+def correlations_result(store):
+    from correlations import correlations
+    from stress_correlation_analysis import ACTIVITY_COLUMNS, CORRELATION_COLUMNS
+
+    corr = correlations(store)
+    pairs = [(x, "stress", 0) for x in CORRELATION_COLUMNS[1:]] + [(x, "stress", 1) for x in ACTIVITY_COLUMNS]
+    values = {f"{x}~{y}@{lag}": corr.get(x, y, lag=lag) for x, y, lag in pairs if x in corr.columns and y in corr.columns}
+    lines = [f"{key.split('~')[0]} vs. {'next month' if key.endswith('@1') else 'same-month'} stress: r = {r:.2f}"
+             for key, r in values.items()]
+    return {"r": values, "lines": lines}
+
+
+def anomalies_result(store):
+    flagged = store["anomalies"]
+    lines = [f"{row['metric']} on {row['date']:%Y-%m-%d}: {row['value']:,.1f} (robust z {row['score']:+.1f})"
+             for _, row in flagged[flagged["resolution"] == "day"].head(5).iterrows()]
+    counts = flagged["resolution"].value_counts()
+    return {"days": int(counts.get("day", 0)), "months": int(counts.get("month", 0)),
+            "lines": [f"{counts.get('day', 0)} unusual daily values, {counts.get('month', 0)} unusual monthly values"] + lines}
+
+
+RESULTS = {
+    "active_months": (active_months_result, "activity_analysis",
+                      {"monthly": ["climbed_floors", "actual", "total_calories", "total_activity_score", "steps"]}),
+    "active_weeks": (active_weeks_result, "activity_analysis", {"weekly": ["week", "actual", "steps", "heart_rate"]}),
+    "sleep": (sleep_result, "sleep_analysis", {"sleep": None}),
+    "stress": (stress_result, "stress_analysis", {"stress": None, "seasonal": ["season", "stress"]}),
+    "correlations": (correlations_result, "stress_correlation_analysis",
+                     {"monthly": ["stress", "actual", "avg_duration", "heart_rate", "steps", "climbed_floors"]}),
+    "anomalies": (anomalies_result, "anomalies", {"anomalies": None}),
+}
+
+# Report section -> (title, results, figures), in report order
+SECTIONS = {
+    "activity": ("Activity", ["active_months", "active_weeks"],
+                 ["activity_levels_over_time.png", "activity_bar_chart.png", "workout_frequency.png", "resting_hr.png",
+                  "rolling_resting_hr.png", "monthly_step.png", "rolling_steps.png"]),
+    "calories": ("Calories", [], ["monthly.calorie_burn.png", "intensity_vs_cal.png", "impact_stairs.png",
+                                  "activity_on_sleep.png"]),
+    "sleep": ("Sleep", ["sleep"], ["sleep_duration.png", "rolling_sleep.png", "sleep_vs_activity.png", "stress_v_sleep.png"]),
+    "stress": ("Stress", ["stress", "correlations"],
+               ["monthly_stress.png", "rolling_stress.png", "stress_vs_activity.png", "intensity_stress.png", "hr_stress.png"]),
+    "alerts": ("Alerts", ["anomalies"], []),
+}
+
+
+# --- 🔹 Node actions (run in worker processes) ---
+
+def init_worker(data_folder, cleaned_folder):
+    import process_and_clean
+
+    process_and_clean.set_folders(data_folder, cleaned_folder)
+
+
+def clean(filename):
+    import process_and_clean
+
+    _, status, error = process_and_clean.run_job(filename, process_and_clean.datasets[filename])
+    if status == "failed":
+        raise RuntimeError(error)
+    return status
+
+
+def write_result(name, path):
+    from datastore import default_store
+
+    result = RESULTS[name][0](default_store())
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    return "built"
+
+
+def render(output, output_folder):
+    import render as renderer
+    from datastore import default_store
+
+    if not renderer.has_data(output, default_store()):
+        renderer.drop_figure(output, output_folder)
+        return "skipped"
+    renderer.render_figure(output, output_folder)
+    return "built"
+
+
+def write_section(section, output_folder):
+    title, results, figures = SECTIONS[section]
+    lines = [f"## {title}", ""]
+    for name in results:
+        path = os.path.join(output_folder, RESULTS_FOLDER, f"{name}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                lines += [f"- {line}" for line in json.load(f)["lines"]]
+    if results:
+        lines.append("")
+    lines += [f"![{figure}]({figure})" for figure in figures if os.path.exists(os.path.join(output_folder, figure))]
+    with open(os.path.join(output_folder, SECTIONS_FOLDER, f"{section}.md"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return "built"
+
+
+def write_report(output_folder):
+    parts = ["# Garmin Fitness Report", ""]
+    for section in SECTIONS:
+        with open(os.path.join(output_folder, SECTIONS_FOLDER, f"{section}.md")) as f:
+            parts.append(f.read())
+    with open(os.path.join(output_folder, REPORT_FILENAME), "w") as f:
+        f.write("\n".join(parts))
+    return "built"
+
+
+# --- 🔹 The graph ---
+
+def build_graph(data_folder, cleaned_folder, output_folder):
+    """Every node of the pipeline, keyed by name, for the raw files present in data_folder."""
+    import process_and_clean
+    from datastore import DATASETS
+    from monthly import MONTHLY_METRICS
+    from render import FIGURES, figure_code
+
+    nodes, producers = {}, {}
+
+    def add(node, datasets=()):
+        nodes[node.name] = node
+        for name in datasets:
+            producers[name] = node.name
+
+    by_filename = {filename: name for name, filename in DATASETS.items()}
+    for filename in process_and_clean.datasets:
+        raw = os.path.join(data_folder, filename)
+        if os.path.exists(raw):
+            add(Node(f"clean:{filename}", ("build", "clean", (filename,)), [os.path.join(cleaned_folder, filename)],
+                     files=[raw], code=CLEAN_CODE), [by_filename[filename]])
+
+    cleaned = [os.path.join(cleaned_folder, DATASETS[name]) for name in MONTHLY_METRICS]
+    cleaning = [producers[name] for name in MONTHLY_METRICS if name in producers]
+    tables = {
+        "monthly": (["monthly"], cleaning, cleaned),
+        "rollups": (["daily", "weekly", "seasonal"], cleaning, cleaned),
+        "rolling": (["rolling"], ["table:rollups"], [os.path.join(cleaned_folder, DATASETS["daily"])]),
+        "anomalies": (["anomalies"], ["table:rollups", "table:monthly"],
+                      [os.path.join(cleaned_folder, DATASETS[name]) for name in ("daily", "monthly")]),
+    }
+    for table, (datasets, after, files) in tables.items():
+        writer = "write_monthly_table" if table == "monthly" else f"write_{table}"
+        add(Node(f"table:{table}", ("process_and_clean", writer, ()),
+                 [os.path.join(cleaned_folder, DATASETS[name]) for name in datasets],
+                 after=after, files=files, code=TABLE_CODE[table]), datasets)
+
+    def waits_for(datasets):
+        return sorted({producers[name] for name in datasets if name in producers})
+
+    for name, (_, module, datasets) in RESULTS.items():
+        add(Node(f"result:{name}", ("build", "write_result", (name, os.path.join(output_folder, RESULTS_FOLDER, f"{name}.json"))),
+                 [os.path.join(output_folder, RESULTS_FOLDER, f"{name}.json")],
+                 after=waits_for(datasets), datasets=datasets, code=["build", module, "datastore"]))
+    for output, (_, _, datasets) in FIGURES.items():
+        add(Node(f"figure:{output}", ("build", "render", (output, output_folder)), [os.path.join(output_folder, output)],
+                 after=waits_for(datasets), datasets=datasets, code=figure_code(output)))
+
+    for section, (_, results, figures) in SECTIONS.items():
+        inputs = [os.path.join(output_folder, RESULTS_FOLDER, f"{name}.json") for name in results]
+        inputs += [os.path.join(output_folder, figure) for figure in figures]
+        add(Node(f"section:{section}", ("build", "write_section", (section, output_folder)),
+                 [os.path.join(output_folder, SECTIONS_FOLDER, f"{section}.md")],
+                 after=[f"result:{name}" for name in results] + [f"figure:{figure}" for figure in figures],
+                 files=inputs, code=["build"]))
+    add(Node("report", ("build", "write_report", (output_folder,)), [os.path.join(output_folder, REPORT_FILENAME)],
+             after=[f"section:{section}" for section in SECTIONS],
+             files=[os.path.join(output_folder, SECTIONS_FOLDER, f"{section}.md") for section in SECTIONS], code=["build"]))
+    return nodes
+
+
+def select(nodes, targets):
+    """The targets (node names or prefixes such as 'figure:') and every node they depend on."""
+    chosen, stack = set(), [name for name in nodes if any(name == t or name.startswith(t) for t in targets)]
+    while stack:
+        name = stack.pop()
+        if name not in chosen:
+            chosen.add(name)
+            stack += [dep for dep in nodes[name].after if dep in nodes]
+    return {name: node for name, node in nodes.items() if name in chosen}
+
+
+# --- 🔹 Fingerprints and the run ---
+
+_code_digests = {}
+
+
+def code_digest(module_name):
+    if module_name not in _code_digests:
+        from cache import file_digest
+
+        _code_digests[module_name] = file_digest(importlib.util.find_spec(module_name).origin)
+    return _code_digests[module_name]
+
+
+def fingerprint(node, store):
+    """Hash of what the node runs and everything it reads, as the inputs are now."""
+    from cache import file_digest
+
+    parts = [node.name, repr(node.action)]
+    parts += [f"code:{module}={code_digest(module)}" for module in node.code]
+    parts += [f"file:{path}={file_digest(path) if os.path.exists(path) else 'missing'}" for path in node.files]
+    parts += [f"data:{name}={store.fingerprint(name, columns)}" for name, columns in node.datasets.items()]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def run_action(module_name, function_name, args):
+    return getattr(importlib.import_module(module_name), function_name)(*args)
+
+
+def _load_manifest(output_folder):
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, output_folder):
+    with open(os.path.join(output_folder, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def run_build(nodes, data_folder, cleaned_folder, output_folder, workers=None, force=False):
+    """Runs the stale nodes, each once every node it waits for has finished; returns {node: status}."""
+    from datastore import DataStore
+
+    store = DataStore(cleaned_folder)
+    for folder in (output_folder, os.path.join(output_folder, RESULTS_FOLDER), os.path.join(output_folder, SECTIONS_FOLDER)):
+        os.makedirs(folder, exist_ok=True)
+    manifest = _load_manifest(output_folder)
+    status, pending, running = {}, dict(nodes), {}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(data_folder, cleaned_folder)) as pool:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, node in list(pending.items()):
+                    after = [dep for dep in node.after if dep in nodes]
+                    if any(dep not in status for dep in after):
+                        continue
+                    del pending[name]
+                    progressed = True
+                    if any(status[dep] in ("failed", "blocked") for dep in after):
+                        status[name] = "blocked"
+                        print(f"⚠️ {name} skipped: an input failed.")
+                        continue
+                    key = fingerprint(node, store)
+                    if not force and manifest.get(name) == key and all(os.path.exists(p) for p in node.outputs):
+                        status[name] = "unchanged"
+                        continue
+                    running[pool.submit(run_action, *node.action)] = (name, key)
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, key = running.pop(future)
+                try:
+                    if future.result() == "skipped":
+                        # Nothing was produced (no raw file, no data to plot): not recorded, so it is retried next run
+                        status[name] = "skipped"
+                        manifest.pop(name, None)
+                        print(f"⏩ {name}: nothing to build. Skipping.")
+                        continue
+                    status[name] = "built"
+                    manifest[name] = key
+                    print(f"✅ Built {name}")
+                except Exception as e:
+                    status[name] = "failed"
+                    manifest.pop(name, None)
+                    print(f"❌ {name} failed: {type(e).__name__}: {e}")
+            _save_manifest(manifest, output_folder)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the cleaned data, analyses, figures and report, only where stale.")
+    parser.add_argument("targets", nargs="*", metavar="TARGET",
+                        help="nodes (or prefixes, e.g. 'figure:' or 'section:stress') to build with their inputs (default: all)")
+    parser.add_argument("--data-folder", default="data")
+    parser.add_argument("--cleaned-folder", default=os.environ.get("GARMIN_DATA_ROOT", "cleaned_data"))
+    parser.add_argument("--output-folder", default=os.environ.get("GARMIN_OUTPUT_FOLDER", "outputs"))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="rebuild every selected node")
+    parser.add_argument("--list", action="store_true", help="print the graph (each node and what it waits for) and exit")
+    args = parser.parse_args(argv)
+
+    # Read by datastore at import time, in this process and in the workers
+    os.environ["GARMIN_DATA_ROOT"] = args.cleaned_folder
+    os.environ["MPLBACKEND"] = "Agg"
+    nodes = build_graph(args.data_folder, args.cleaned_folder, args.output_folder)
+    if args.targets:
+        nodes = select(nodes, args.targets)
+        if not nodes:
+            parser.error(f"no node matches: {', '.join(args.targets)}")
+    if args.list:
+        for name, node in nodes.items():
+            print(f"{name}  <-  {', '.join(node.after) or '(sources)'}")
+        return
+
+    status = run_build(nodes, args.data_folder, args.cleaned_folder, args.output_folder, args.workers, args.force)
+    counts = {state: sum(1 for s in status.values() if s == state)
+              for state in ("built", "unchanged", "skipped", "failed", "blocked")}
+    print(f"\n🔧 {counts['built']} built, {counts['unchanged']} unchanged, {counts['skipped']} skipped, "
+          f"{counts['failed']} failed, {counts['blocked']} blocked")
+    if counts["failed"] or counts["blocked"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import schema
+
+# 🔹 Typed columnar cache of the cleaned datasets.
+# Each cleaned table is stored next to cleaned_data/ cast to its schema (see schema.py), together with
+# a key made of the raw file's content hash and the cleaning function's version. An entry is rebuilt
+# only when that key changes. Entries also record the size and modification time of the cleaned CSV written
+# with them, and readers use the CSV instead when it no longer matches (edited or rewritten by hand).
+
+CACHE_FOLDER_NAME = "cleaned_cache"
+DATE_COLUMNS = ["date", "month"]
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = "parquet"
+except ImportError:
+    # Without pyarrow fall back to pickles, which also keep the column dtypes
+    CACHE_FORMAT = "pickle"
+
+
+def cache_folder_for(cleaned_folder):
+    """Returns the cache folder that sits next to a cleaned data folder."""
+    parent = os.path.dirname(os.path.abspath(cleaned_folder))
+    return os.path.join(parent, CACHE_FOLDER_NAME)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(raw_path, version):
+    """Builds the cache key for a raw file cleaned by a given cleaner version."""
+    return f"{file_digest(raw_path)}-v{version}"
+
+
+def _entry_paths(name, cache_folder, kind="", extension=None):
+    stem = os.path.splitext(name)[0] + (f".{kind}" if kind else "")
+    return (os.path.join(cache_folder, f"{stem}.{extension or CACHE_FORMAT}"),
+            os.path.join(cache_folder, f"{stem}.key"))
+
+
+def _source_path(name, cache_folder):
+    return os.path.join(cache_folder, os.path.splitext(name)[0] + ".source")
+
+
+def _stamp(path):
+    """Size and modification time of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _record_source(name, cache_folder, source):
+    path = _source_path(name, cache_folder)
+    if source is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "w") as f:
+        f.write(_stamp(source))
+
+
+def _write_frame(df, path):
+    if CACHE_FORMAT == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_pickle(path)
+
+
+def _read_frame(path):
+    if not os.path.exists(path):
+        return None
+    if CACHE_FORMAT == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def parse_date_columns(df):
+    """Parses 'Month YYYY' (or 'YYYY-MM-DD') date columns into datetimes (leaves already-typed columns alone)."""
+    for column in DATE_COLUMNS:
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = schema.to_dates(df[column])
+    return df
+
+
+def infer_numeric(df):
+    """Converts text columns that hold only numbers, as pd.read_csv would when reading the cleaned CSV."""
+    for column in df.columns:
+        if column not in DATE_COLUMNS and not pd.api.types.is_numeric_dtype(df[column]):
+            try:
+                df[column] = pd.to_numeric(df[column])
+            except (ValueError, TypeError):
+                pass
+    return df
+
+
+def typed(name, df):
+    """Casts a table to its schema before it is cached; tables without a schema get their types inferred."""
+    if schema.schema_for(name, df.columns) is not None:
+        return schema.enforce(name, df)
+    return infer_numeric(parse_date_columns(df.copy()))
+
+
+def stored_key(name, cache_folder):
+    """The key the cached entry for `name` was built with, or None if there is no complete entry."""
+    data_path, key_path = _entry_paths(name, cache_folder)
+    if not (os.path.exists(data_path) and os.path.exists(key_path)):
+        return None
+    with open(key_path) as f:
+        return f.read().strip()
+
+
+def is_fresh(name, key, cache_folder):
+    """True if the cached entry for `name` was built from the same raw content and cleaner version."""
+    return stored_key(name, cache_folder) == key
+
+
+def store(name, df, key, cache_folder, source=None):
+    """Writes a cleaned table to the cache with typed date columns, then records its key.
+
+    `source` is the cleaned CSV already written with the same rows; readers trust the entry while it is unchanged.
+    """
+    os.makedirs(cache_folder, exist_ok=True)
+    data_path, key_path = _entry_paths(name, cache_folder)
+    _write_frame(typed(name, df), data_path)
+    # The key is written last so an interrupted write never looks fresh
+    with open(key_path, "w") as f:
+        f.write(key)
+    _record_source(name, cache_folder, source)
+
+
+def store_chunks(name, chunks, key, cache_folder, source=None):
+    """Writes a cached table from an iterable of chunks without holding the whole table in memory."""
+    os.makedirs(cache_folder, exist_ok=True)
+    data_path, key_path = _entry_paths(name, cache_folder)
+    if CACHE_FORMAT == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        for chunk in chunks:
+            # Every chunk is cast to the dataset's schema, so a chunk of only missing values cannot change a column's type
+            table = pa.Table.from_pandas(typed(name, chunk), preserve_index=False,
+                                         schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(data_path, table.schema)
+            writer.write_table(table)
+        if writer is None:
+            return
+        writer.close()
+    else:
+        # Pickles cannot be appended to, so the chunks are combined first
+        frames = [typed(name, chunk) for chunk in chunks]
+        if not frames:
+            return
+        pd.concat(frames, ignore_index=True).to_pickle(data_path)
+    with open(key_path, "w") as f:
+        f.write(key)
+    _record_source(name, cache_folder, source)  # the chunks have all been appended to it by now
+
+
+def store_arrays(name, arrays, key, cache_folder):
+    """Writes named NumPy arrays (a computed result rather than a table) to the cache, then records its key."""
+    os.makedirs(cache_folder, exist_ok=True)
+    data_path, key_path = _entry_paths(name, cache_folder, extension="npz")
+    np.savez(data_path, **arrays)
+    with open(key_path, "w") as f:
+        f.write(key)
+
+
+def load_arrays(name, key, cache_folder):
+    """Reads cached arrays stored under `key`, or returns None if the entry is missing or stale."""
+    data_path, key_path = _entry_paths(name, cache_folder, extension="npz")
+    if not (os.path.exists(data_path) and os.path.exists(key_path)):
+        return None
+    with open(key_path) as f:
+        if f.read().strip() != key:
+            return None
+    with np.load(data_path) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+def table_path(name, cache_folder):
+    """Path of a cached table's data file (it may not exist yet)."""
+    return _entry_paths(name, cache_folder)[0]
+
+
+def trusted_path(name, cleaned_folder):
+    """Path of the cached table for a cleaned CSV, or None if there is none or the CSV changed since it was stored."""
+    cache_folder = cache_folder_for(cleaned_folder)
+    data_path, source_path = table_path(name, cache_folder), _source_path(name, cache_folder)
+    if not (os.path.exists(data_path) and os.path.exists(source_path)):
+        return None
+    with open(source_path) as f:
+        recorded = f.read().strip()
+    return data_path if recorded == _stamp(os.path.join(cleaned_folder, name)) else None
+
+
+def load(name, cache_folder):
+    """Reads a cached table, or returns None if there is no entry."""
+    return _read_frame(_entry_paths(name, cache_folder)[0])
+
+
+def drop(name, cache_folder):
+    """Removes a cached table so readers fall back to the cleaned CSV."""
+    for path in (*_entry_paths(name, cache_folder), _source_path(name, cache_folder)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def partials_path(name, cache_folder, kind="partials"):
+    """Path of a dataset's partials: 'partials' per month, 'daily' per day for datasets exported by day."""
+    return _entry_paths(name, cache_folder, kind)[0]
+
+
+def store_partials(name, partials, cache_folder, kind="partials"):
+    """Writes the partials (sum + count per month, or per day) of a dataset."""
+    os.makedirs(cache_folder, exist_ok=True)
+    _write_frame(partials, partials_path(name, cache_folder, kind))
+
+
+def load_partials(name, cache_folder, kind="partials"):
+    """Reads the partials of a dataset, or None if a full clean has not produced them yet."""
+    partials = _read_frame(partials_path(name, cache_folder, kind))
+    # Partials written before cleaned dates were typed hold "Month YYYY" strings
+    return None if partials is None else parse_date_columns(partials)
+
+
+def drop_partials(name, cache_folder, kind="partials"):
+    """Removes a dataset's partials, e.g. the per-day ones when its new source has no days."""
+    path = partials_path(name, cache_folder, kind)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _deltas_path(name, cache_folder):
+    return os.path.join(cache_folder, os.path.splitext(name)[0] + ".deltas")
+
+
+def applied_deltas(name, cache_folder):
+    """Returns the digests of the delta exports already folded into a dataset."""
+    path = _deltas_path(name, cache_folder)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def record_delta(name, digest, cache_folder):
+    """Remembers that a delta export was folded into a dataset."""
+    os.makedirs(cache_folder, exist_ok=True)
+    with open(_deltas_path(name, cache_folder), "a") as f:
+        f.write(digest + "\n")
+
+
+def clear_deltas(name, cache_folder):
+    """Forgets applied deltas after a dataset is rebuilt from its full raw export."""
+    path = _deltas_path(name, cache_folder)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def load_cleaned(filename, cleaned_folder):
+    """Loads a cleaned dataset with its schema, preferring the typed cache and falling back to the cleaned CSV."""
+    cached = trusted_path(filename, cleaned_folder)
+    df = _read_frame(cached) if cached else None
+    if df is None:
+        df = parse_date_columns(pd.read_csv(os.path.join(cleaned_folder, filename)))
+    return schema.enforce(filename, df)
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import cache
+
+# 🔹 Every metric-by-metric correlation of the monthly table, computed in one pass and cached.
+# r[method, lag, i, j] correlates metric i in a month with metric j `lag` months later (lag 0 is the
+# usual symmetric matrix); n[lag, i, j] is the number of month pairs where both values exist.
+# Each pair uses all months where both values exist (like DataFrame.corr), and Spearman ranks are taken
+# within that same set of months, so the results match pandas pair by pair.
+
+CORRELATIONS_NAME = "Correlations"
+CORRELATIONS_VERSION = 1
+METHODS = ("pearson", "spearman")
+DEFAULT_LAGS = (0, 1)
+
+
+class Correlations:
+    """Correlation cube of the monthly metrics: one (metrics x metrics) matrix per method and lag."""
+
+    def __init__(self, columns, lags, methods, r, n):
+        self.columns = list(columns)
+        self.lags = [int(lag) for lag in lags]
+        self.methods = list(methods)
+        self.r = r
+        self.n = n
+
+    def _index(self, columns):
+        return [self.columns.index(c) for c in columns] if columns else list(range(len(self.columns)))
+
+    def matrix(self, method="pearson", lag=0, columns=None):
+        """Correlation matrix as a DataFrame (rows: metric this month, columns: metric `lag` months later)."""
+        idx = self._index(columns)
+        r = self.r[self.methods.index(method), self.lags.index(lag)]
+        names = [self.columns[i] for i in idx]
+        return pd.DataFrame(r[np.ix_(idx, idx)], index=names, columns=names)
+
+    def counts(self, lag=0, columns=None):
+        """Number of month pairs behind each correlation."""
+        idx = self._index(columns)
+        names = [self.columns[i] for i in idx]
+        return pd.DataFrame(self.n[self.lags.index(lag)][np.ix_(idx, idx)], index=names, columns=names)
+
+    def get(self, x, y, lag=0, method="pearson"):
+        """Correlation of metric x with metric y `lag` months later."""
+        i, j = self.columns.index(x), self.columns.index(y)
+        return float(self.r[self.methods.index(method), self.lags.index(lag), i, j])
+
+    def pairs(self, method="pearson", lag=0, min_count=3):
+        """Long table of (x, y, r, n) sorted by |r|; at lag 0 each unordered pair appears once."""
+        m, l = self.methods.index(method), self.lags.index(lag)
+        i, j = np.triu_indices(len(self.columns), k=1) if lag == 0 else np.nonzero(~np.eye(len(self.columns), dtype=bool))
+        table = pd.DataFrame({
+            "x": np.asarray(self.columns)[i],
+            "y": np.asarray(self.columns)[j],
+            "r": self.r[m, l, i, j],
+            "n": self.n[l, i, j],
+        })
+        table = table[(table["n"] >= min_count) & table["r"].notna()]
+        return table.reindex(table["r"].abs().sort_values(ascending=False).index).reset_index(drop=True)
+
+    def to_arrays(self):
+        return {"columns": np.asarray(self.columns), "lags": np.asarray(self.lags),
+                "methods": np.asarray(self.methods), "r": self.r, "n": self.n}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["columns"].tolist(), arrays["lags"].tolist(), arrays["methods"].tolist(),
+                   arrays["r"], arrays["n"])
+
+
+def _monthly_values(table):
+    """Numeric metric columns on a gap-free monthly index, so shifting by one row is shifting by one month."""
+    values = table.set_index("date") if "date" in table else table
+    values = values.select_dtypes("number").astype("float64")
+    if isinstance(values.index, pd.DatetimeIndex) and len(values):
+        values = values[values.index.notna()].sort_index()
+        values = values.reindex(pd.date_range(values.index.min(), values.index.max(), freq="MS"))
+    return values
+
+
+def _row_ranks(values):
+    """Average ranks along the last axis, ignoring NaN (which stays NaN)."""
+    shape = values.shape
+    ranks = pd.DataFrame(values.reshape(-1, shape[-1])).rank(axis=1).to_numpy()
+    return ranks.reshape(shape)
+
+
+def _paired_pearson(x, y):
+    """Pearson r and count for every pair along the leading axes; x and y are NaN at the same positions."""
+    n = np.sum(~np.isnan(x), axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dx = x - np.nanmean(x, axis=-1, keepdims=True)
+        dy = y - np.nanmean(y, axis=-1, keepdims=True)
+        r = np.nansum(dx * dy, axis=-1) / np.sqrt(np.nansum(dx * dx, axis=-1) * np.nansum(dy * dy, axis=-1))
+    r[n < 2] = np.nan
+    return np.clip(r, -1, 1), n
+
+
+def compute_correlations(table, lags=DEFAULT_LAGS, methods=METHODS):
+    """Computes r for every metric pair, lag and method in one vectorized pass over the monthly table."""
+    values = _monthly_values(table)
+    columns, data = list(values.columns), values.to_numpy().T  # (metrics, months)
+    k, months = data.shape
+    r = np.full((len(methods), len(lags), k, k), np.nan)
+    n = np.zeros((len(lags), k, k), dtype=np.int64)
+    for l, lag in enumerate(lags):
+        if lag >= months:
+            continue
+        # x[i, j, t] = metric i in month t, y[i, j, t] = metric j in month t + lag, kept where both exist
+        x = np.broadcast_to(data[:, None, : months - lag], (k, k, months - lag))
+        y = np.broadcast_to(data[None, :, lag:], (k, k, months - lag))
+        both = ~np.isnan(x) & ~np.isnan(y)
+        x, y = np.where(both, x, np.nan), np.where(both, y, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # empty pairs give NaN, reported with n = 0
+            for m, method in enumerate(methods):
+                if method == "pearson":
+                    r[m, l], n[l] = _paired_pearson(x, y)
+                elif method == "spearman":
+                    r[m, l], n[l] = _paired_pearson(_row_ranks(x), _row_ranks(y))
+                else:
+                    raise ValueError(f"Unknown correlation method: {method}")
+    return Correlations(columns, lags, methods, r, n)
+
+
+def correlations_key(store, lags, methods):
+    """Cache key: the monthly table's content plus the requested lags and methods."""
+    parts = [cache.file_digest(store.path("monthly")), ",".join(map(str, lags)), ",".join(methods)]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest() + f"-v{CORRELATIONS_VERSION}"
+
+
+_loaded = {}
+
+
+def correlations(store, lags=DEFAULT_LAGS, methods=METHODS):
+    """The store's correlation cube: from memory, from the cache, or computed and cached."""
+    if not os.path.exists(store.path("monthly")):
+        # Monthly table built in memory (not materialized yet): nothing stable to key a cache on
+        return compute_correlations(store["monthly"], lags, methods)
+
+    key = correlations_key(store, tuple(lags), tuple(methods))
+    if key in _loaded:
+        return _loaded[key]
+    cache_folder = cache.cache_folder_for(store.root)
+    arrays = cache.load_arrays(CORRELATIONS_NAME, key, cache_folder)
+    if arrays is not None:
+        result = Correlations.from_arrays(arrays)
+    else:
+        result = compute_correlations(store["monthly"], lags, methods)
+        cache.store_arrays(CORRELATIONS_NAME, result.to_arrays(), key, cache_folder)
+    _loaded[key] = result
+    return result
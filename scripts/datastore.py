@@ -0,0 +1,178 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import rollups
+from anomalies import ANOMALIES_FILENAME
+from rolling import ROLLING_FILENAME
+from cache import cache_folder_for, file_digest, load_cleaned
+from monthly import MONTHLY_FILENAME, MONTHLY_METRICS, add_derived_metrics, build_monthly_table
+from parsing import parse_durations
+from samples import SampleStore, store_folder
+from schema import enforce
+
+# 🔹 One place to find the cleaned datasets (override with the GARMIN_DATA_ROOT environment variable)
+DATA_ROOT = os.environ.get("GARMIN_DATA_ROOT", "cleaned_data")
+
+# 🔹 Dataset names used by the analysis scripts -> cleaned filenames
+DATASETS = {
+    "activities": "Activities.csv",
+    "heart_rate": "Average Heart Rate.csv",
+    "calories": "Calories.csv",
+    "floors": "Floors Climbed.csv",
+    "intensity": "Intensity Minutes.csv",
+    "max_hr": "Max Heart Rate.csv",
+    "sleep": "Sleep.csv",
+    "stress": "Stress.csv",
+    "steps": "Steps.csv",
+    "monthly": MONTHLY_FILENAME,
+    "daily": rollups.ROLLUP_FILENAMES["day"],
+    "weekly": rollups.ROLLUP_FILENAMES["week"],
+    "seasonal": rollups.ROLLUP_FILENAMES["season"],
+    "rolling": ROLLING_FILENAME,
+    "anomalies": ANOMALIES_FILENAME,
+}
+
+# 🔹 Resolution -> dataset holding the metrics at that resolution
+RESOLUTIONS = {"day": "daily", "week": "weekly", "month": "monthly", "season": "seasonal"}
+
+
+def clean_column_names(df):
+    """Standardizes column names to lower_snake_case."""
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+    return df
+
+
+def sleep_duration_to_minutes(df):
+    """Sleep is cleaned as 'Xh Ymin' text; every analysis wants minutes."""
+    if not pd.api.types.is_numeric_dtype(df["avg_duration"]):
+        df["avg_duration"], _ = parse_durations(df["avg_duration"])
+    return df
+
+
+# Extra per-dataset steps applied once after loading
+POST_LOAD = {
+    "sleep": sleep_duration_to_minutes,
+    "monthly": add_derived_metrics,  # only fills in metrics a table written by an older version lacks
+}
+
+
+class DataStore:
+    """Loads cleaned datasets lazily on first access and keeps them for the rest of the process."""
+
+    def __init__(self, root=None, max_workers=4):
+        self.root = root or DATA_ROOT
+        self.max_workers = max_workers
+        self._frames = {}
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def path(self, name):
+        return os.path.join(self.root, DATASETS[name])
+
+    def fingerprint(self, name, columns=None):
+        """Content hash of a dataset's file, or only of some of its columns (with the dates they belong to).
+
+        Read from disk every time, so it sees a table rewritten after it was loaded.
+        """
+        path = self.path(name)
+        if not os.path.exists(path):
+            return "missing"
+        if columns is None:
+            return file_digest(path)
+        wanted = ["date", *columns]
+        df = pd.read_csv(path, usecols=lambda c: c in wanted, dtype=str)
+        present = [c for c in wanted if c in df]
+        digest = hashlib.sha256(",".join(present).encode())
+        digest.update(pd.util.hash_pandas_object(df[present], index=False).to_numpy().tobytes())  # one hash per row
+        return digest.hexdigest()
+
+    def available(self):
+        """Names of the datasets that exist under the root."""
+        return [name for name in DATASETS if os.path.exists(self.path(name))]
+
+    def _read(self, name):
+        if name == "monthly" and not os.path.exists(self.path(name)):
+            # Not materialized yet (cleaning ran before the table existed): build it in memory
+            sources = [source for source in MONTHLY_METRICS if source in self]
+            return enforce(DATASETS[name], build_monthly_table(self.load(*sources)))
+        if name in ("daily", "weekly", "seasonal") and not os.path.exists(self.path(name)):
+            # Rollups not materialized yet: build the one asked for from the cached partials
+            resolution = next(r for r, n in RESOLUTIONS.items() if n == name)
+            sources = rollups.load_sources(DATASETS, cache_folder_for(self.root))
+            return enforce(DATASETS[name], rollups.build_rollups(*sources, resolutions=[resolution])[resolution])
+        df = clean_column_names(load_cleaned(DATASETS[name], self.root))
+        if name in POST_LOAD:
+            df = POST_LOAD[name](df)
+        return df
+
+    def __getitem__(self, name):
+        if name not in DATASETS:
+            raise KeyError(f"Unknown dataset: {name}")
+        if name not in self._frames:
+            df = self._read(name)
+            with self._lock:
+                self._frames.setdefault(name, df)
+        return self._frames[name]
+
+    def __contains__(self, name):
+        return name in self._frames or (name in DATASETS and os.path.exists(self.path(name)))
+
+    def load(self, *names):
+        """Loads several datasets at once, reading the ones not yet in memory concurrently."""
+        missing = [name for name in names if name not in self._frames]
+        if len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                list(pool.map(self.__getitem__, missing))
+        return {name: self[name] for name in names}
+
+    def monthly(self, *columns, dropna=True):
+        """Selects metric columns from the wide monthly table (months missing any of them are dropped)."""
+        df = self["monthly"][["date", *columns]]
+        return df.dropna(subset=list(columns)) if dropna else df.copy()
+
+    def rollup(self, resolution, *columns, dropna=True):
+        """Selects metric columns at one resolution: 'day', 'week', 'month' (the monthly table) or 'season'.
+
+        Week and season tables keep their label column ('2024-W05', 'Winter 2025') after the date.
+        """
+        if resolution == "month":
+            return self.monthly(*columns, dropna=dropna)
+        df = self[RESOLUTIONS[resolution]]
+        labels = [c for c in ("week", "season") if c in df]
+        df = df[["date", *labels, *columns]]
+        return df.dropna(subset=list(columns)) if dropna else df.copy()
+
+    def query(self, sql, params=None):
+        """Runs SQL over the datasets under the root (see sql.py); reads only what the query needs, not the loaded frames."""
+        import sql as engine
+
+        with self._lock:
+            if self._connection is None:
+                self._connection = engine.connect(self.root)
+            cursor = self._connection.cursor()  # one per query, so threads can query at the same time
+        return cursor.execute(sql, params or []).df()
+
+    def heart_rate_samples(self):
+        """The memory-mapped intraday heart-rate samples kept next to the cleaned data (see samples.py)."""
+        return SampleStore(store_folder(cache_folder_for(self.root)))
+
+    def clear(self):
+        """Forgets every loaded dataset (e.g. after the cleaned data changed)."""
+        with self._lock:
+            self._frames.clear()
+            self._connection = None  # datasets written since get their views
+
+
+_default_store = None
+
+
+def default_store():
+    """Returns the process-wide store rooted at DATA_ROOT."""
+    global _default_store
+    if _default_store is None:
+        _default_store = DataStore()
+    return _default_store
@@ -1,33 +1,19 @@
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from datastore import default_store
+from plotting import pyplot
 
-# Set folder path for cleaned data
-CLEANED_FOLDER = "cleaned_data"
+# Cleaned datasets to explore
+names = ["activities", "heart_rate", "max_hr", "calories", "floors", "intensity", "stress", "sleep"]
 
-# List of cleaned CSV files
-files = [
-    "Activities.csv",
-    "Average Heart Rate.csv",
-    "Max Heart Rate.csv",
-    "Calories.csv",
-    "Floors Climbed.csv",
-    "Intensity Minutes.csv",
-    "Stress.csv",
-    "Sleep.csv"
-]
-
-# Load all datasets into a dictionary
-data = {}
-for file in files:
-    file_path = os.path.join(CLEANED_FOLDER, file)
-    if os.path.exists(file_path):
-        df = pd.read_csv(file_path)
-        data[file] = df
-        print(f"✅ Loaded {file} with shape {df.shape}")
-    else:
-        print(f"⚠️ {file} not found, skipping...")
+# Load the available datasets together into a dictionary
+def load_datasets():
+    store = default_store()
+    for name in names:
+        if name not in store:
+            print(f"⚠️ {name} not found, skipping...")
+    data = store.load(*[name for name in names if name in store])
+    for name, df in data.items():
+        print(f"✅ Loaded {name} with shape {df.shape}")
+    return data
 
 # Function to display basic information about datasets
 def summarize_datasets(data):
@@ -38,12 +24,10 @@ def summarize_datasets(data):
         print("\n🔍 Missing Values:\n", df.isnull().sum())  # Missing values
         print("\n📈 Basic Statistics:\n", df.describe())  # Summary statistics
 
-# Run initial summaries
-summarize_datasets(data)
-
 # Exploratory Visualizations
 def plot_time_series(df, x_col, y_col, title, ylabel):
     """Plots a time series chart."""
+    plt, sns = pyplot()
     plt.figure(figsize=(10, 5))
     sns.lineplot(data=df, x=x_col, y=y_col, marker="o")
     plt.title(title)
@@ -53,26 +37,35 @@ def plot_time_series(df, x_col, y_col, title, ylabel):
     plt.grid()
     plt.show()
 
-# Plot key metrics
-if "Average Heart Rate.csv" in data:
-    plot_time_series(data["Average Heart Rate.csv"], "date", "heart_rate", "Average Heart Rate Over Time", "Heart Rate (bpm)")
+def main():
+    data = load_datasets()
+
+    # Run initial summaries
+    summarize_datasets(data)
+
+    # Plot key metrics
+    if "heart_rate" in data:
+        plot_time_series(data["heart_rate"], "date", "heart_rate", "Average Heart Rate Over Time", "Heart Rate (bpm)")
+
+    if "max_hr" in data:
+        plot_time_series(data["max_hr"], "date", "max_heart_rate", "Max Heart Rate Over Time", "Max Heart Rate (bpm)")
 
-if "Max Heart Rate.csv" in data:
-    plot_time_series(data["Max Heart Rate.csv"], "date", "max_heart_rate", "Max Heart Rate Over Time", "Max Heart Rate (bpm)")
+    if "calories" in data:
+        plot_time_series(data["calories"], "date", "total_calories", "Total Calories Burned Over Time", "Calories Burned")
 
-if "Calories.csv" in data:
-    plot_time_series(data["Calories.csv"], "date", "total_calories", "Total Calories Burned Over Time", "Calories Burned")
+    if "floors" in data:
+        plot_time_series(data["floors"], "date", "climbed_floors", "Floors Climbed Over Time", "Floors Climbed")
 
-if "Floors Climbed.csv" in data:
-    plot_time_series(data["Floors Climbed.csv"], "date", "climbed_floors", "Floors Climbed Over Time", "Floors Climbed")
+    if "intensity" in data:
+        plot_time_series(data["intensity"], "date", "actual", "Intensity Minutes Over Time", "Minutes")
 
-if "Intensity Minutes.csv" in data:
-    plot_time_series(data["Intensity Minutes.csv"], "date", "actual", "Intensity Minutes Over Time", "Minutes")
+    if "stress" in data:
+        plot_time_series(data["stress"], "date", "stress", "Average Stress Levels Over Time", "Stress Score")
 
-if "Stress.csv" in data:
-    plot_time_series(data["Stress.csv"], "date", "stress", "Average Stress Levels Over Time", "Stress Score")
+    if "sleep" in data:
+        plot_time_series(data["sleep"], "date", "avg_duration", "Average Sleep Duration Over Time", "Sleep Duration (minutes)")
 
-if "Sleep.csv" in data:
-    plot_time_series(data["Sleep.csv"], "date", "avg_duration", "Average Sleep Duration Over Time", "Sleep Duration (minutes)")
+    print("\n✅ EDA complete! Visualizations and summaries generated.")
 
-print("\n✅ EDA complete! Visualizations and summaries generated.")
+if __name__ == "__main__":
+    main()
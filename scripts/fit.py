@@ -0,0 +1,268 @@
+import functools
+import math
+import mmap
+import struct
+
+import numpy as np
+import pandas as pd
+
+# 🔹 Minimal reader and writer for Garmin FIT files (the binary format the watch records).
+# A FIT file is a 12/14-byte header, a stream of records and a 2-byte CRC. Each record starts with a one-byte
+# header: definition records describe the layout of a "local" message type (global message number, fields,
+# sizes, base types, byte order); data records carry the values in that layout, and compressed-timestamp
+# records carry a 5-bit time offset in the header instead of a timestamp field.
+# The reader maps the file into memory, checks the CRC (so a corrupted file is rejected rather than decoded
+# into wrong samples) and decodes each data record with one precompiled struct that reads only the fields
+# asked for; records of other messages are skipped by their size.
+
+FIT_EPOCH = 631065600  # 1989-12-31T00:00:00Z, FIT time zero, in Unix seconds
+TIMESTAMP_FIELD = 253
+TIMESTAMP_16 = "timestamp_16"  # column name marking a 16-bit timestamp field (e.g. monitoring field 26)
+HEADER = struct.Struct("<BBHI4s")
+
+# Global message numbers used by the ingester
+FILE_ID = 0
+MONITORING = 55
+MONITORING_INFO = 103
+MONITORING_HR_DATA = 211
+STRESS_LEVEL = 227
+SLEEP_LEVEL = 275
+
+# Base type -> (struct code, size, invalid value)
+ENUM, SINT8, UINT8, SINT16, UINT16, SINT32, UINT32 = 0x00, 0x01, 0x02, 0x83, 0x84, 0x85, 0x86
+BASE_TYPES = {
+    ENUM: ("B", 1, 0xFF),
+    SINT8: ("b", 1, 0x7F),
+    UINT8: ("B", 1, 0xFF),
+    SINT16: ("h", 2, 0x7FFF),
+    UINT16: ("H", 2, 0xFFFF),
+    SINT32: ("i", 4, 0x7FFFFFFF),
+    UINT32: ("I", 4, 0xFFFFFFFF),
+    0x88: ("f", 4, None),                 # float32
+    0x89: ("d", 8, None),                 # float64
+    0x0A: ("B", 1, 0x00),                 # uint8z
+    0x8B: ("H", 2, 0x0000),               # uint16z
+    0x8C: ("I", 4, 0x00000000),           # uint32z
+    0x0D: ("B", 1, 0xFF),                 # byte
+    0x8E: ("q", 8, 0x7FFFFFFFFFFFFFFF),   # sint64
+    0x8F: ("Q", 8, 0xFFFFFFFFFFFFFFFF),   # uint64
+    0x90: ("Q", 8, 0x0000000000000000),   # uint64z
+}
+
+
+NUMPY_TYPES = {"B": "u1", "b": "i1", "H": "u2", "h": "i2", "I": "u4", "i": "i4",
+               "f": "f4", "d": "f8", "q": "i8", "Q": "u8"}
+
+
+class FitError(ValueError):
+    """Raised for files that are not FIT files, are cut short or fail their CRC."""
+
+
+def _crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _crc_table()
+_CRC_ARRAY = np.array(_CRC_TABLE, dtype="uint16")
+
+
+def _crc16_bytes(data, crc=0):
+    for byte in data:
+        crc = (crc >> 8) ^ _CRC_TABLE[(crc ^ byte) & 0xFF]
+    return crc
+
+
+@functools.lru_cache(maxsize=None)
+def _shift_tables(length):
+    """What `length` zero bytes turn a CRC into, by its low and its high byte (the CRC is linear in them)."""
+    bits = [_crc16_bytes(bytes(length), 1 << bit) for bit in range(16)]
+    tables = []
+    for half in (bits[:8], bits[8:]):
+        table = [0] * 256
+        for value in range(1, 256):
+            low = value & -value
+            table[value] = table[value ^ low] ^ half[low.bit_length() - 1]
+        tables.append(table)
+    return tables
+
+
+def crc16(data, crc=0):
+    """The FIT CRC-16 (CRC-16/ARC) of a byte string, continuing from `crc`.
+
+    Long inputs are cut into blocks whose CRCs are computed side by side with NumPy, then chained: the CRC
+    of A + B is the CRC of A carried over len(B) zero bytes, XOR the CRC of B alone.
+    """
+    data = np.frombuffer(data, dtype="uint8")
+    block = max(64, math.isqrt(len(data)))
+    count = len(data) // block
+    if count < 2:
+        return _crc16_bytes(data.tobytes(), crc)
+    blocks = data[:count * block].reshape(count, block)
+    crcs = np.zeros(count, dtype="uint16")
+    for column in blocks.T:
+        crcs = (crcs >> 8) ^ _CRC_ARRAY[(crcs ^ column) & 0xFF]
+    low, high = _shift_tables(block)
+    for value in crcs.tolist():
+        crc = low[crc & 0xFF] ^ high[crc >> 8] ^ value
+    return _crc16_bytes(data[count * block:].tobytes(), crc)
+
+
+class _Definition:
+    """Layout of one local message type, with a struct that reads only the wanted fields."""
+
+    def __init__(self, global_number, fields, big_endian, columns):
+        order = ">" if big_endian else "<"
+        self.global_number = global_number
+        self.size = sum(size for _, size, _ in fields)
+        self.timestamp_offset = self.timestamp_16_offset = None
+        self.names, self.invalid, self.rows = [], [], []
+        codes, offset = [], 0
+        for number, size, base_type in fields:
+            code, base_size, invalid = BASE_TYPES.get(base_type, ("B", 1, None))
+            name = (columns or {}).get(number)
+            if size == base_size and number == TIMESTAMP_FIELD and code == "I":
+                self.timestamp_offset = offset
+            if size == base_size and name == TIMESTAMP_16 and code == "H":
+                self.timestamp_16_offset = offset
+            if size == base_size and name is not None and name != TIMESTAMP_16:
+                codes.append(code)
+                self.names.append(name)
+                self.invalid.append(invalid)
+            else:
+                codes.append(f"{size}x")
+            offset += size
+        self.unpack = struct.Struct(order + "".join(codes)).unpack_from if columns is not None else None
+        self.uint32 = struct.Struct(order + "I").unpack_from
+        self.uint16 = struct.Struct(order + "H").unpack_from
+
+    def frame(self, columns):
+        """The decoded records as a DataFrame: timestamp (Unix seconds) plus every wanted column."""
+        values = np.array(self.rows, dtype="float64").reshape(len(self.rows), len(self.names) + 1)
+        frame = pd.DataFrame(values, columns=["timestamp", *self.names])
+        for name, invalid in zip(self.names, self.invalid):
+            if invalid is not None:
+                frame[name] = frame[name].mask(frame[name] == invalid)
+        frame["timestamp"] += FIT_EPOCH
+        return frame.reindex(columns=["timestamp", *columns])
+
+
+def read_messages(path, wanted):
+    """Decodes the messages of one FIT file.
+
+    `wanted` maps global message numbers to {field number: column name}. The result maps each of them to a
+    DataFrame with a 'timestamp' column (Unix seconds, NaN if the message has no time) and one column per
+    field (NaN where the value is invalid). A field named 'timestamp_16' is read as a 16-bit timestamp
+    relative to the last full one, as monitoring heart-rate records use.
+    """
+    definitions, used = {}, []
+    last_timestamp = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if len(data) < 12:
+            raise FitError(f"{path}: too short for a FIT header")
+        header_size, _, _, data_size, signature = HEADER.unpack_from(data, 0)
+        if signature != b".FIT":
+            raise FitError(f"{path}: not a FIT file")
+        end = header_size + data_size
+        if len(data) < end + 2:
+            raise FitError(f"{path}: file is cut short ({len(data)} of {end + 2} bytes)")
+        # The CRC of the header and records followed by their stored CRC is zero when nothing changed
+        if crc16(data[:end + 2]) != 0:
+            raise FitError(f"{path}: CRC mismatch (the file is corrupted)")
+        pos = header_size
+        while pos < end:
+            record_header = data[pos]
+            pos += 1
+            timestamp = None
+            if record_header & 0x80:  # compressed timestamp: a 5-bit offset from the last full timestamp
+                local = (record_header >> 5) & 0x03
+                last_timestamp += ((record_header & 0x1F) - last_timestamp) & 0x1F
+                timestamp = last_timestamp
+            elif record_header & 0x40:  # definition message
+                big_endian = data[pos + 1] == 1
+                global_number = struct.unpack_from(">H" if big_endian else "<H", data, pos + 2)[0]
+                count = data[pos + 4]
+                pos += 5
+                fields = [tuple(data[pos + 3 * i: pos + 3 * i + 3]) for i in range(count)]
+                pos += 3 * count
+                if record_header & 0x20:  # developer fields: only their sizes matter here
+                    extra = data[pos]
+                    fields += [(None, data[pos + 2 + 3 * i], None) for i in range(extra)]
+                    pos += 1 + 3 * extra
+                definition = _Definition(global_number, fields, big_endian, wanted.get(global_number))
+                definitions[record_header & 0x0F] = definition
+                if definition.unpack is not None:
+                    used.append(definition)
+                continue
+            else:
+                local = record_header & 0x0F
+
+            definition = definitions.get(local)
+            if definition is None:
+                raise FitError(f"{path}: data record at byte {pos - 1} uses undefined local message {local}")
+            if pos + definition.size > end:
+                raise FitError(f"{path}: record at byte {pos - 1} runs past the end of the data")
+            if definition.timestamp_offset is not None:
+                last_timestamp = timestamp = definition.uint32(data, pos + definition.timestamp_offset)[0]
+            elif definition.timestamp_16_offset is not None:
+                timestamp_16 = definition.uint16(data, pos + definition.timestamp_16_offset)[0]
+                last_timestamp += (timestamp_16 - (last_timestamp & 0xFFFF)) & 0xFFFF
+                timestamp = last_timestamp
+            if definition.unpack is not None:
+                definition.rows.append((np.nan if timestamp is None else timestamp, *definition.unpack(data, pos)))
+            pos += definition.size
+
+    frames = {}
+    for number, columns in wanted.items():
+        names = [name for name in columns.values() if name != TIMESTAMP_16]
+        parts = [d.frame(names) for d in used if d.global_number == number and d.rows]
+        frames[number] = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+            columns=["timestamp", *names], dtype="float64")
+    return frames
+
+
+class FitWriter:
+    """Writes a FIT file from definition and data messages (little-endian); used for synthetic archives."""
+
+    def __init__(self, path):
+        self.path = path
+        self.body = bytearray()
+        self.layouts = {}
+
+    def define(self, local, global_number, fields):
+        """Declares local message type `local` as `global_number` with fields [(field number, base type), ...]."""
+        self.body += struct.pack("<BBBHB", 0x40 | local, 0, 0, global_number, len(fields))
+        for number, base_type in fields:
+            self.body += struct.pack("<BBB", number, BASE_TYPES[base_type][1], base_type)
+        # Data records of this type as a NumPy record layout (header byte first), so arrays encode in one go
+        self.layouts[local] = np.dtype([("header", "u1")] + [
+            (str(number), "<" + NUMPY_TYPES[BASE_TYPES[base_type][0]]) for number, base_type in fields])
+
+    def write(self, local, columns):
+        """Appends one data message per element of the column arrays ({field number: values})."""
+        layout = self.layouts[local]
+        records = np.zeros(len(next(iter(columns.values()))), dtype=layout)
+        records["header"] = local
+        for number, values in columns.items():
+            records[str(number)] = values
+        self.body += records.tobytes()
+
+    def close(self):
+        header = HEADER.pack(14, 0x20, 2132, len(self.body), b".FIT")
+        header += struct.pack("<H", crc16(header))
+        with open(self.path, "wb") as f:
+            f.write(header)
+            f.write(self.body)
+            f.write(struct.pack("<H", crc16(self.body, crc16(header))))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        if exc_type is None:
+            self.close()
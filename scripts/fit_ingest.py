@@ -0,0 +1,260 @@
+import argparse
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import cache
+import fit
+import instrument
+import partials
+import process_and_clean as pac
+import samples
+
+# 🔹 Ingest a folder of FIT files straight from the watch into the cleaned tables process_and_clean.py writes.
+# Each file is decoded on its own (optionally in parallel worker processes) and reduced to small per-day
+# summaries, so memory grows with the number of days rather than the number of samples (the intraday
+# heart-rate samples themselves go to the memory-mapped sample store, see samples.py):
+#   monitoring       -> steps, calories, floors and intensity minutes (daily running totals per activity type)
+#                       and the day's maximum heart rate (from the sample store)
+#   monitoring_hr    -> resting heart rate per day
+#   stress_level     -> stress, averaged over every valid reading
+#   sleep_level      -> nights (bedtime, wake time, minutes asleep), dated by the morning they end
+# The cleaned tables, their typed cache entries and their monthly / per-day partials are written exactly as
+# for the CSV exports, so the monthly table, the rollups and every analysis work unchanged.
+# Activities come from activity files, not monitoring files, so Activities.csv is left as it is.
+
+FIT_VERSION = 2
+METERS_PER_FLOOR = 3.0
+STEP_ACTIVITY_TYPES = [1, 6]   # running, walking: their cycles are steps (other types count strokes)
+ASLEEP_LEVELS = [2, 3, 4]      # light, deep, REM (1 is awake)
+NIGHT_GAP = 60 * 60            # seconds without a sleep record that end a night
+
+WANTED = {
+    fit.MONITORING_INFO: {0: "local_timestamp"},
+    fit.MONITORING: {5: "activity_type", 3: "cycles", 1: "calories", 19: "active_calories", 31: "ascent",
+                     32: "descent", 33: "moderate", 34: "vigorous", 26: fit.TIMESTAMP_16, 27: "heart_rate"},
+    fit.MONITORING_HR_DATA: {1: "resting_heart_rate"},
+    fit.STRESS_LEVEL: {0: "stress", 1: "time"},
+    fit.SLEEP_LEVEL: {0: "level"},
+}
+TOTALS = ["cycles", "calories", "active_calories", "ascent", "descent", "moderate", "vigorous"]
+
+
+def days_of(seconds):
+    """Local day of each local timestamp (Unix seconds)."""
+    return pd.to_datetime(np.floor(np.asarray(seconds, dtype="float64") / 86400), unit="D")
+
+
+def summarize_file(path):
+    """Decodes one FIT file into per-day summaries (all times shifted to the device's local time)."""
+    messages = fit.read_messages(path, WANTED)
+    info = messages[fit.MONITORING_INFO].dropna()
+    utc_offset = float(info["local_timestamp"].iloc[0] + fit.FIT_EPOCH - info["timestamp"].iloc[0]) if len(info) else 0.0
+
+    monitoring = messages[fit.MONITORING]
+    monitoring = monitoring.assign(timestamp=monitoring["timestamp"] + utc_offset)
+    # Running totals restart every day: the day's total per activity type is its largest value
+    totals = monitoring.dropna(subset=["activity_type", "timestamp"])
+    totals = (totals[TOTALS].groupby([days_of(totals["timestamp"]).rename("date"), totals["activity_type"]]).max()
+              .reset_index())
+    heart_rate = monitoring.dropna(subset=["heart_rate", "timestamp"])
+    heart_rate = (heart_rate["timestamp"].to_numpy("int64"), heart_rate["heart_rate"].to_numpy("uint8"))
+
+    resting = messages[fit.MONITORING_HR_DATA].dropna()
+    resting = pd.DataFrame({"timestamp": resting["timestamp"] + utc_offset, "heart_rate": resting["resting_heart_rate"]})
+
+    stress = messages[fit.STRESS_LEVEL]
+    stress = stress[stress["stress"] >= 0].dropna(subset=["time"])  # negative levels mean "could not measure"
+    stress = partials.to_partials(
+        pd.DataFrame({"date": days_of(stress["time"] + fit.FIT_EPOCH + utc_offset), "stress": stress["stress"].to_numpy()}),
+        with_max=True)
+
+    sleep = messages[fit.SLEEP_LEVEL].dropna()
+    sleep = pd.DataFrame({"timestamp": sleep["timestamp"] + utc_offset, "level": sleep["level"]})
+    return {"totals": totals, "heart_rate": heart_rate, "resting": resting, "stress": stress, "sleep": sleep,
+            "records": sum(len(m) for m in messages.values())}
+
+
+def nights(sleep):
+    """Turns per-minute sleep levels into one row per night: wake day, minutes asleep, bedtime and wake time."""
+    if sleep.empty:
+        return pd.DataFrame(columns=["date", "avg_duration", "avg_bedtime", "avg_wake_time"])
+    sleep = sleep.sort_values("timestamp").drop_duplicates("timestamp")
+    times = sleep["timestamp"].to_numpy()
+    gaps = np.diff(times)
+    night = np.concatenate([[0], np.cumsum(gaps > NIGHT_GAP)])
+    # Each record lasts until the next one; the last record of a night lasts the usual interval
+    interval = np.median(gaps[gaps <= NIGHT_GAP]) if (gaps <= NIGHT_GAP).any() else 60.0
+    lasts = np.where(np.concatenate([gaps, [NIGHT_GAP + 1]]) > NIGHT_GAP, interval, np.concatenate([gaps, [0]]))
+    asleep = np.where(np.isin(sleep["level"].to_numpy(), ASLEEP_LEVELS), lasts, 0.0)
+    grouped = pd.DataFrame({"night": night, "start": times, "end": times + lasts, "asleep": asleep}).groupby("night")
+    table = pd.DataFrame({"start": grouped["start"].min(), "end": grouped["end"].max(),
+                          "asleep": grouped["asleep"].sum()})
+    table = table[table["asleep"] > 0]
+    return pd.DataFrame({
+        "date": days_of(table["end"]),
+        "avg_duration": (table["asleep"] / 60).to_numpy(),
+        "avg_bedtime": (table["start"] % 86400 / 60).to_numpy(),
+        "avg_wake_time": (table["end"] % 86400 / 60).to_numpy(),
+    })
+
+
+def daily_rows(summaries, store, digests=None):
+    """Combines the per-file summaries into the day-level rows (or per-day partials) of every dataset.
+
+    The heart-rate samples of the files the store does not hold yet (by their digests, aligned with
+    `summaries`) are added to `store` first, in one append; the daily maxima are read back from it.
+    """
+    digests = digests or [None] * len(summaries)
+    stored = store.sources()
+    new = [(summary, digest) for summary, digest in zip(summaries, digests) if digest is None or digest not in stored]
+    if new:
+        store.append(np.concatenate([s["heart_rate"][0] for s, _ in new]), np.concatenate([s["heart_rate"][1] for s, _ in new]))
+        store.record_sources([digest for _, digest in new if digest is not None])
+    sample_days = np.concatenate([s["heart_rate"][0] for s in summaries]) // 86400 * 86400
+    totals = pd.concat([s["totals"] for s in summaries], ignore_index=True)
+    totals = totals.groupby(["date", "activity_type"])[TOTALS].max().reset_index()
+    by_day = totals.groupby("date")
+    steps = totals[totals["activity_type"].isin(STEP_ACTIVITY_TYPES)].groupby("date")["cycles"].sum()
+    calories = by_day[["calories", "active_calories"]].sum()
+    floors = by_day[["ascent", "descent"]].sum() / 1000 / METERS_PER_FLOOR  # ascent is in millimeters
+    minutes = by_day[["moderate", "vigorous"]].sum()
+
+    resting = pd.concat([s["resting"] for s in summaries], ignore_index=True).sort_values("timestamp")
+    resting = resting.groupby(days_of(resting["timestamp"]).rename("date"))["heart_rate"].last().reset_index()
+
+    return {
+        "steps": steps.reindex(by_day.size().index, fill_value=0).rename("steps").reset_index(),
+        "calories": pd.DataFrame({
+            "active_calories": calories["active_calories"],
+            "resting_calories": calories["calories"] - calories["active_calories"],
+            "total_calories": calories["calories"],
+        }).reset_index(),
+        "floors": pd.DataFrame({"climbed_floors": floors["ascent"].round(), "descended_floors": floors["descent"].round()}).reset_index(),
+        # Vigorous minutes count double towards intensity minutes, as on the watch
+        "intensity": pd.DataFrame({"actual": minutes["moderate"] + 2 * minutes["vigorous"]}).reset_index(),
+        "heart_rate": resting,
+        # The day's highest sample, as in the Max Heart Rate export
+        "max_hr": (store.daily(sample_days.min(), sample_days.max() + 86400)[["date", "max_heart_rate"]]
+                   if len(sample_days) else pd.DataFrame(columns=["date", "max_heart_rate"])),
+        "stress": partials.merge_partials(*[s["stress"] for s in summaries]),
+        "sleep": nights(pd.concat([s["sleep"] for s in summaries], ignore_index=True)),
+    }
+
+
+# Dataset -> (cleaned filename, cleaning function whose aggregation and formatting the table follows)
+OUTPUTS = {
+    "calories": ("Calories.csv", pac.clean_calories),
+    "floors": ("Floors Climbed.csv", pac.clean_floors_climbed),
+    "intensity": ("Intensity Minutes.csv", pac.clean_intensity_minutes),
+    "stress": ("Stress.csv", pac.clean_stress),
+    "sleep": ("Sleep.csv", pac.clean_sleep),
+    "steps": ("Steps.csv", pac.clean_steps),
+    "heart_rate": ("Average Heart Rate.csv", pac.clean_average_heart_rate),
+    "max_hr": ("Max Heart Rate.csv", pac.clean_max_heart_rate),
+}
+
+
+def cleaned_tables(rows):
+    """Turns the day-level rows into {filename: (cleaned table, monthly partials, per-day partials)}."""
+    tables = {}
+    for name, (filename, cleaning_function) in OUTPUTS.items():
+        data = rows[name]
+        if data.empty:
+            continue
+        daily = data if name == "stress" else pac.daily_partials(data)  # stress is already per-day partials
+        if cleaning_function in pac.MONTHLY_STEPS:
+            _, how, finish = pac.MONTHLY_STEPS[cleaning_function]
+            monthly = pac.monthly_partials(None, daily)
+            tables[filename] = (pac.finish_monthly(monthly, how, finish), monthly, daily)
+        else:
+            tables[filename] = (pac.by_month(data), None, daily)
+    return tables
+
+
+def archive_files(folder):
+    """The FIT files of an archive folder (searched recursively), in name order."""
+    found = []
+    for root, _, files in os.walk(folder):
+        found += [os.path.join(root, name) for name in files if name.lower().endswith(".fit")]
+    return sorted(found)
+
+
+def archive_key(files, digests=None):
+    """Cache key of everything ingested from an archive: the content of every file plus the ingester version."""
+    digests = digests or [cache.file_digest(path) for path in files]
+    digest = hashlib.sha256()
+    for path, file_digest in zip(files, digests):
+        digest.update(f"{os.path.basename(path)}={file_digest}|".encode())
+    return digest.hexdigest() + f"-fit-v{FIT_VERSION}"
+
+
+def ingest(folder, workers=1):
+    """Decodes every FIT file of an archive and writes the cleaned tables; returns 'cleaned', 'cached' or 'skipped'."""
+    files = archive_files(folder)
+    if not files:
+        print(f"⚠️ No FIT files found in {folder}. Skipping.")
+        return "skipped"
+    digests = [cache.file_digest(path) for path in files]
+    key = archive_key(files, digests)
+    outputs = [filename for filename, _ in OUTPUTS.values()]
+    if all(os.path.exists(os.path.join(pac.CLEANED_FOLDER, f)) and cache.is_fresh(f, key, pac.CACHE_FOLDER)
+           for f in outputs):
+        print(f"⏩ FIT archive {folder} unchanged since last run. Using cached tables.")
+        return "cached"
+
+    print(f"\n🔹 Decoding {len(files)} FIT file(s) from {folder}...")
+    with instrument.stage("read"):
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                summaries = list(pool.map(summarize_file, files, chunksize=16))
+        else:
+            summaries = [summarize_file(path) for path in files]
+    instrument.rows("rows_in", sum(s["records"] for s in summaries))
+    with instrument.stage("clean"):
+        rows = daily_rows(summaries, samples.SampleStore(samples.store_folder(pac.CACHE_FOLDER)), digests)
+    with instrument.stage("aggregate"):
+        tables = cleaned_tables(rows)
+
+    os.makedirs(pac.CLEANED_FOLDER, exist_ok=True)
+    for filename, (df, monthly, daily) in tables.items():
+        pac.save_cleaned(filename, df, key, monthly, daily)
+        cache.clear_deltas(filename, pac.CACHE_FOLDER)
+    for filename in outputs:
+        if filename not in tables:
+            print(f"⚠️ No data for {filename} in the FIT archive. Keeping the existing table, if any.")
+    return "cleaned"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest a folder of Garmin FIT files into cleaned_data/.")
+    parser.add_argument("fit_folder", help="folder of .fit files (monitoring files from the watch)")
+    parser.add_argument("--cleaned-folder", default=pac.CLEANED_FOLDER, help="where the cleaned tables are written")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="decode files in parallel across this many processes (0 = one per CPU)")
+    parser.add_argument("--profile", metavar="JSONL", help="record stage timings as for process_and_clean.py")
+    args = parser.parse_args(argv)
+    if args.profile or instrument.enabled():
+        instrument.start_run(args.profile)
+
+    pac.set_folders(pac.DATA_FOLDER, args.cleaned_folder)
+    try:
+        with instrument.dataset("FIT archive", source=args.fit_folder) as record:
+            record["status"] = ingest(args.fit_folder, workers=args.workers or os.cpu_count())
+    except fit.FitError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    pac.write_monthly_table()
+    pac.write_rollups()
+    pac.write_rolling()
+    pac.write_anomalies()
+    if instrument.enabled():
+        instrument.print_summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import importlib
+import os
+import sys
+
+# 🔹 Command-line entry point for the whole pipeline.
+# Modules are imported only by the command that needs them, so compute-only commands skip matplotlib/seaborn.
+
+# Commands implemented by another script's main(argv): command -> (module, help)
+PASSTHROUGH = {
+    "clean": ("process_and_clean", "clean the raw exports (options as for process_and_clean.py)"),
+    "render": ("render", "render the report figures headlessly (options as for render.py)"),
+    "batch": ("batch", "clean and analyse a cohort of user export folders (options as for batch.py)"),
+    "build": ("build", "rebuild only the stale tables, analyses, figures and report sections (options as for build.py)"),
+    "sql": ("sql", "query the cleaned and raw datasets with SQL (options as for sql.py)"),
+    "serve": ("api", "serve the analysis results as JSON for dashboards (options as for api.py)"),
+    "ingest-fit": ("fit_ingest", "clean a folder of FIT files from the watch (options as for fit_ingest.py)"),
+}
+
+# Analysis scripts that can be run as a whole with `analyze`
+ANALYSES = {
+    "activity": "activity_analysis",
+    "calories": "calories_analysis",
+    "sleep": "sleep_analysis",
+    "stress": "stress_analysis",
+    "stress-correlation": "stress_correlation_analysis",
+    "steps": "step_count_analysis",
+    "eda": "eda",
+}
+
+# Compute-only commands: command -> (module, function that prints the result, help)
+REPORTS = {
+    "active-months": ("activity_analysis", "calculate_most_and_least_active_month",
+                      "print the most and least active months"),
+    "stress-extremes": ("stress_analysis", "analyze_stress_extremes",
+                        "print the most and least stressful months"),
+    "sleep-extremes": ("sleep_analysis", "analyze_best_worst_sleep",
+                       "print the average, best and worst sleep months"),
+    "correlations": ("stress_correlation_analysis", "print_correlations",
+                     "print the stress / intensity / sleep / heart rate correlations, including next-month stress"),
+}
+
+
+def run(module_name, function_name, *args):
+    return getattr(importlib.import_module(module_name), function_name)(*args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="garmin", description="Clean, analyze and plot Garmin exports.")
+    parser.add_argument("--data-root", help="folder with the cleaned datasets (default: cleaned_data)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Arguments after these commands are passed through to the script that implements them
+    for name, (module_name, help_text) in PASSTHROUGH.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    analyze = commands.add_parser("analyze", help="run a whole analysis script, plots included")
+    analyze.add_argument("analysis", choices=list(ANALYSES))
+    for name, (_, _, help_text) in REPORTS.items():
+        commands.add_parser(name, help=help_text)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, passthrough = parser.parse_known_args(argv)
+    if passthrough and args.command not in PASSTHROUGH:
+        parser.error(f"unrecognized arguments: {' '.join(passthrough)}")
+    if args.data_root:
+        # Read by datastore at import time, so it must be set before any analysis module loads
+        os.environ["GARMIN_DATA_ROOT"] = args.data_root
+
+    if args.command in PASSTHROUGH:
+        run(PASSTHROUGH[args.command][0], "main", passthrough)
+    elif args.command == "analyze":
+        run(ANALYSES[args.analysis], "main")
+    else:
+        module_name, function_name, _ = REPORTS[args.command]
+        run(module_name, function_name)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
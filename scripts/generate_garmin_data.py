@@ -0,0 +1,279 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# 🔹 Synthetic Garmin Connect exports in the raw formats process_and_clean.py expects:
+#    "Mon" month labels (calories, floors, stress, sleep), YYYY-MM-DD dates (heart rate, intensity, steps),
+#    "NN bpm" heart rates, "Xh Ymin" sleep durations and "HH:MM AM/PM" clock times.
+# Values follow seasonal and weekly cycles with a little noise, and a small share of cells is malformed
+# the way real exports sometimes are, so cleaning and analysis scale realistically.
+
+ACTIVITY_TYPES = ["Cycling", "Running", "Hiking", "Walking", "Strength", "Mountain Biking", "Swimming"]
+
+
+def month_labels(dates, month="%b"):
+    """Month labels as Garmin writes them: 'Apr' for a single 2024 export, 'Apr 2025' otherwise ('%B': 'April')."""
+    if (dates.year == 2024).all():
+        return dates.strftime(month)
+    return dates.strftime(f"{month} %Y")
+
+
+def clock_times(minutes):
+    """Formats minutes since midnight as 'H:MM AM/PM'."""
+    minutes = np.asarray(minutes, dtype=int) % (24 * 60)
+    hours, mins = minutes // 60, minutes % 60
+    hours12 = np.where(hours % 12 == 0, 12, hours % 12).astype(str)
+    meridiem = np.where(hours < 12, " AM", " PM")
+    return pd.Series(hours12) + ":" + pd.Series(mins).astype(str).str.zfill(2) + meridiem
+
+
+def durations(minutes):
+    """Formats minutes as 'Xh Ymin'."""
+    minutes = np.asarray(minutes, dtype=int)
+    return pd.Series(minutes // 60).astype(str) + "h " + pd.Series(minutes % 60).astype(str) + "min"
+
+
+def corrupt(series, rng, rate, value="--"):
+    """Replaces a small random share of cells with a malformed value."""
+    series = series.astype(object)
+    if rate:
+        series[rng.random(len(series)) < rate] = value
+    return series
+
+
+def daily_values(rng, dates):
+    """One user's true per-day values, shared by the CSV exports and the FIT archives."""
+    n = len(dates)
+    day_of_year = dates.dayofyear.to_numpy()
+    season = np.sin(2 * np.pi * (day_of_year - 100) / 365.25)  # peaks in early summer
+    weekday = dates.dayofweek.to_numpy()
+    fitness = rng.normal(0, 1)  # per-user offset
+
+    # Activity & calories
+    intensity = np.clip(rng.gamma(2.0, 18 + 8 * season + 4 * fitness), 0, None).round().astype(int)
+    steps = np.clip(rng.normal(9000 + 2500 * season + 800 * fitness, 2500, n), 500, None).round().astype(int)
+    climbed = np.clip(rng.poisson(np.clip(12 + 6 * season, 1, None)), 0, None)
+    descended = np.clip(climbed + rng.integers(-3, 4, n), 0, None)
+    resting = rng.normal(1650, 25, n).round().astype(int)
+    active = (intensity * 9 + steps * 0.04 + climbed * 4 + rng.normal(0, 60, n)).clip(50).round().astype(int)
+
+    # Heart rate, stress & sleep
+    resting_hr = (58 - 2 * fitness + 0.04 * intensity + rng.normal(0, 2, n)).round().astype(int)
+    max_hr = (150 + 0.3 * intensity + rng.normal(0, 10, n)).clip(100, 205).round().astype(int)
+    stress = (38 + 6 * np.sin(2 * np.pi * day_of_year / 30) + 4 * (weekday < 5) + rng.normal(0, 8, n)).clip(5, 95)
+    sleep = (465 - 12 * season - 0.1 * stress + rng.normal(0, 35, n)).clip(240, 660).round().astype(int)
+    bedtime = (22 * 60 + 40 + rng.normal(0, 35, n)).round().astype(int)
+    wake = (bedtime + sleep + rng.integers(5, 25, n)) % (24 * 60)
+    return dict(intensity=intensity, steps=steps, climbed=climbed, descended=descended, resting=resting,
+                active=active, resting_hr=resting_hr, max_hr=max_hr, stress=stress, sleep=sleep,
+                bedtime=bedtime, wake=wake)
+
+
+def generate_export(folder, start="2024-01-01", days=365, samples_per_day=1, seed=0, error_rate=0.002):
+    """Writes one user's raw export (9 CSVs) covering `days` days from `start`.
+
+    samples_per_day > 1 repeats the stress and heart-rate rows within each day, like full-resolution exports.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D")
+    n = len(dates)
+    iso = dates.strftime("%Y-%m-%d")
+    labels = month_labels(dates)
+    values = daily_values(rng, dates)
+    intensity, steps, climbed, descended = values["intensity"], values["steps"], values["climbed"], values["descended"]
+    resting, active, resting_hr, max_hr = values["resting"], values["active"], values["resting_hr"], values["max_hr"]
+    stress, sleep, bedtime, wake = values["stress"], values["sleep"], values["bedtime"], values["wake"]
+
+    repeat = max(int(samples_per_day), 1)
+
+    def per_sample(values):
+        return np.repeat(values, repeat)
+
+    months = dates.to_period("M").unique().to_timestamp()
+    activity_rows = pd.DataFrame({
+        "Month": month_labels(months, "%B"),
+        "Activity Type": rng.choice(ACTIVITY_TYPES, len(months)),
+    })
+    activity_rows.to_csv(os.path.join(folder, "Activities.csv"), index=False)
+
+    pd.DataFrame({
+        "Date": per_sample(iso),
+        "Resting Heart Rate": corrupt(pd.Series(per_sample(resting_hr + rng.integers(0, 2, n))).astype(str) + " bpm",
+                                      rng, error_rate),
+    }).to_csv(os.path.join(folder, "Average Heart Rate.csv"), index=False)
+    pd.DataFrame({
+        "Date": iso,
+        "Max Heart Rate": corrupt(pd.Series(max_hr).astype(str) + " bpm", rng, error_rate),
+    }).to_csv(os.path.join(folder, "Max Heart Rate.csv"), index=False)
+    pd.DataFrame({
+        "Date": labels, "Active Calories": active, "Resting Calories": resting, "Total": active + resting,
+    }).to_csv(os.path.join(folder, "Calories.csv"), index=False)
+    pd.DataFrame({
+        "Date": labels, "Climbed Floors": climbed, "Descended Floors": descended,
+    }).to_csv(os.path.join(folder, "Floors Climbed.csv"), index=False)
+    pd.DataFrame({
+        "Date": iso, "Actual": intensity, "Goal": 150,
+    }).to_csv(os.path.join(folder, "Intensity Minutes.csv"), index=False)
+    pd.DataFrame({
+        "Date": per_sample(labels),
+        "Stress": per_sample(stress.round().astype(int)) + rng.integers(-3, 4, n * repeat),
+    }).to_csv(os.path.join(folder, "Stress.csv"), index=False)
+    pd.DataFrame({
+        "Date": labels,
+        "Avg Duration": corrupt(durations(sleep), rng, error_rate),
+        "Avg Bedtime": corrupt(clock_times(bedtime), rng, error_rate),
+        "Avg Wake Time": clock_times(wake),
+        "Sleep Score": (60 + sleep / 20 + rng.normal(0, 5, n)).clip(0, 100).round().astype(int),
+    }).to_csv(os.path.join(folder, "Sleep.csv"), index=False)
+    pd.DataFrame({
+        "Date": iso, "Steps": steps,
+    }).to_csv(os.path.join(folder, "Steps.csv"), index=False)
+    return folder
+
+
+# Monitoring activity types (FIT enum) the daily totals are split across
+GENERIC, RUNNING, WALKING = 0, 1, 6
+METERS_PER_FLOOR = 3
+MONITORING_INTERVAL = 15 * 60
+STRESS_INTERVAL = 3 * 60
+SLEEP_LEVELS = [2, 3, 2, 4]  # light, deep, light, REM: the cycle asleep minutes go through
+
+
+def cumulative(total, steps):
+    """A running total over the day's monitoring records that ends exactly at `total`."""
+    profile = np.sin(np.linspace(0, np.pi, steps)) ** 2 + 0.05
+    running = np.floor(total * np.cumsum(profile) / profile.sum()).astype(np.int64)
+    running[-1] = total
+    return running
+
+
+def sleep_records(start, values):
+    """One sleep-level record per minute for every night: (Unix seconds, level), the night before each day.
+
+    Each night starts at that day's bedtime (on the evening before, or just after midnight), lies awake for a
+    few minutes either side and has exactly the day's sleep duration of light / deep / REM minutes.
+    """
+    times, levels = [], []
+    for i, (bedtime, sleep, wake) in enumerate(zip(values["bedtime"], values["sleep"], values["wake"])):
+        awake = int((wake - bedtime - sleep) % (24 * 60))
+        first = start + (i - 1) * 86400 + int(bedtime) * 60
+        before = awake // 2
+        night = np.concatenate([np.ones(before), np.resize(np.repeat(SLEEP_LEVELS, 20), int(sleep)),
+                                np.ones(awake - before)])
+        times.append(first + 60 * np.arange(len(night)))
+        levels.append(night)
+    return np.concatenate(times), np.concatenate(levels).astype(np.uint8)
+
+
+def generate_fit_archive(folder, start="2024-01-01", days=365, seed=0, hr_interval=60, utc_offset=0):
+    """Writes one monitoring FIT file per day (YYYY-MM-DD.fit) carrying the same per-day values as generate_export.
+
+    Each file holds cumulative monitoring records every 15 minutes (steps, calories, ascent / descent and
+    intensity minutes per activity type), heart-rate samples every `hr_interval` seconds with 16-bit
+    timestamps, the day's resting heart rate, stress levels every 3 minutes and per-minute sleep levels
+    (a night that crosses midnight is split across two files, as on the watch).
+    """
+    from fit import (ENUM, FIT_EPOCH, FILE_ID, MONITORING, MONITORING_HR_DATA, MONITORING_INFO, SINT16,
+                     SLEEP_LEVEL, STRESS_LEVEL, UINT8, UINT16, UINT32, FitWriter)
+
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D")
+    values = daily_values(rng, dates)
+    midnights = (dates - pd.Timestamp(0)).total_seconds().astype(np.int64).to_numpy() - utc_offset
+    sleep_times, sleep_levels = sleep_records(midnights[0], values)
+
+    per_day = 86400 // MONITORING_INTERVAL
+    stress_pattern = np.resize([-2, -1, 0, 1, 2], 86400 // STRESS_INTERVAL)  # sums to zero over the day
+    for i, date in enumerate(dates):
+        midnight = midnights[i] - FIT_EPOCH
+        with FitWriter(os.path.join(folder, f"{date:%Y-%m-%d}.fit")) as writer:
+            writer.define(0, FILE_ID, [(0, ENUM), (1, UINT16), (4, UINT32)])
+            writer.write(0, {0: [32], 1: [1], 4: [midnight]})  # monitoring_b file from a Garmin device
+            writer.define(1, MONITORING_INFO, [(253, UINT32), (0, UINT32)])
+            writer.write(1, {253: [midnight], 0: [midnight + utc_offset]})
+
+            # Heart rate every hr_interval seconds; 16-bit timestamps count on from the full one above
+            times = midnight + np.arange(hr_interval, 86400, hr_interval)
+            heart_rate = values["resting_hr"][i] + np.abs(rng.normal(0, 8, len(times))).round()
+            heart_rate = heart_rate.clip(0, values["max_hr"][i] - 1)
+            heart_rate[len(times) * 2 // 3] = values["max_hr"][i]  # the day's peak, mid-afternoon
+            heart_rate[rng.random(len(times)) < 0.01] = 0xFF  # watch not worn: invalid samples
+            writer.define(2, MONITORING, [(26, UINT16), (27, UINT8)])
+            writer.write(2, {26: times & 0xFFFF, 27: heart_rate})
+
+            # Cumulative daily totals per activity type, every 15 minutes
+            steps_run = values["steps"][i] // 7
+            active_walk = int(values["active"][i] * 0.7)
+            vigorous = values["intensity"][i] // 4
+            totals = {
+                WALKING: {3: values["steps"][i] - steps_run, 1: active_walk, 19: active_walk},
+                RUNNING: {3: steps_run, 1: values["active"][i] - active_walk, 19: values["active"][i] - active_walk},
+                GENERIC: {1: values["resting"][i], 31: values["climbed"][i] * METERS_PER_FLOOR * 1000,
+                          32: values["descended"][i] * METERS_PER_FLOOR * 1000,
+                          33: values["intensity"][i] - 2 * vigorous, 34: vigorous},
+            }
+            fields = [(3, UINT32), (1, UINT16), (19, UINT16), (31, UINT32), (32, UINT32), (33, UINT16), (34, UINT16)]
+            writer.define(3, MONITORING, [(253, UINT32), (5, ENUM)] + fields)
+            times = midnight + MONITORING_INTERVAL * np.arange(1, per_day + 1) - 1
+            for activity_type, total in totals.items():
+                columns = {number: cumulative(total.get(number, 0), per_day) for number, _ in fields}
+                writer.write(3, {253: times, 5: np.full(per_day, activity_type), **columns})
+
+            writer.define(4, MONITORING_HR_DATA, [(253, UINT32), (0, UINT8), (1, UINT8)])
+            writer.write(4, {253: [midnight + 86399], 0: [values["resting_hr"][i]], 1: [values["resting_hr"][i]]})
+
+            # Stress every 3 minutes around the day's level, plus a few unmeasurable (-1) readings
+            times = midnight + STRESS_INTERVAL * np.arange(len(stress_pattern))
+            level = np.full(len(times), round(values["stress"][i])) + stress_pattern
+            unmeasurable = times[rng.random(len(times)) < 0.02] + 1
+            writer.define(5, STRESS_LEVEL, [(0, SINT16), (1, UINT32)])
+            writer.write(5, {0: np.concatenate([level, np.full(len(unmeasurable), -1)]),
+                             1: np.concatenate([times, unmeasurable])})
+
+            # Sleep levels recorded on this day (the first file also takes the evening before it)
+            lo = 0 if i == 0 else np.searchsorted(sleep_times, midnights[i])
+            hi = np.searchsorted(sleep_times, midnights[i] + 86400)
+            if hi > lo:
+                writer.define(6, SLEEP_LEVEL, [(253, UINT32), (0, ENUM)])
+                writer.write(6, {253: sleep_times[lo:hi] - FIT_EPOCH, 0: sleep_levels[lo:hi]})
+    return folder
+
+
+def generate_cohort(folder, users, **kwargs):
+    """Writes one export folder per user (user_0001, user_0002, ...) for batch.py."""
+    seed = kwargs.pop("seed", 0)
+    for i in range(users):
+        generate_export(os.path.join(folder, f"user_{i + 1:04d}"), seed=seed + i, **kwargs)
+    return folder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic raw Garmin exports for testing and benchmarks.")
+    parser.add_argument("folder", help="output folder (the export itself, or the cohort folder with --users)")
+    parser.add_argument("--start", default="2024-01-01", help="first day (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=365, help="number of days, e.g. 3650 for 10 years")
+    parser.add_argument("--samples-per-day", type=int, default=1, help="stress / heart-rate rows per day")
+    parser.add_argument("--users", type=int, default=None, help="write a cohort of this many users")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fit", action="store_true",
+                        help="write a FIT archive (one monitoring file per day) instead of CSV exports")
+    args = parser.parse_args(argv)
+
+    options = dict(start=args.start, days=args.days, samples_per_day=args.samples_per_day, seed=args.seed)
+    if args.fit:
+        generate_fit_archive(args.folder, start=args.start, days=args.days, seed=args.seed)
+        print(f"✅ Wrote a {args.days}-day FIT archive to {args.folder}")
+    elif args.users:
+        generate_cohort(args.folder, args.users, **options)
+        print(f"✅ Wrote {args.users} exports of {args.days} days to {args.folder}")
+    else:
+        generate_export(args.folder, **options)
+        print(f"✅ Wrote a {args.days}-day export to {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import contextlib
+import json
+import os
+import sys
+import time
+import uuid
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 🔹 Per-dataset instrumentation for the cleaning pipeline.
+# Set GARMIN_PROFILE=<file.jsonl> (or pass --profile to process_and_clean.py) to record, for every dataset,
+# the time spent reading, cleaning, aggregating and writing, the row counts in and out and the peak memory.
+# One JSON line is appended per dataset; worker processes inherit the setting through the environment.
+# Peak memory is the process's resident-set high-water mark, reset per dataset on Linux (elsewhere it is the
+# peak since the process started), so recording adds no allocation tracing to the timed stages.
+# When it is off, stage() hands back a shared no-op context manager, so the hooks cost a function call.
+
+PROFILE_ENV = "GARMIN_PROFILE"
+RUN_ENV = "GARMIN_PROFILE_RUN"
+STAGES = ["read", "clean", "aggregate", "write"]
+
+_NULL_STAGE = contextlib.nullcontext()
+_record = None  # the dataset being recorded in this process
+_stack = []     # open stages: [name, start]; a nested stage pauses the one around it
+
+
+def enabled():
+    return bool(os.environ.get(PROFILE_ENV))
+
+
+def start_run(path=None):
+    """Turns recording on (for this process and the workers it starts) and tags the records with a new run id."""
+    if path:
+        os.environ[PROFILE_ENV] = path
+    os.environ[RUN_ENV] = uuid.uuid4().hex[:12]
+    return os.environ[RUN_ENV]
+
+
+@contextlib.contextmanager
+def _timed_stage(name):
+    now = time.perf_counter()
+    if _stack:
+        outer = _stack[-1]
+        _record[f"{outer[0]}_s"] += now - outer[1]
+    _stack.append([name, now])
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        _record[f"{name}_s"] = _record.get(f"{name}_s", 0.0) + now - _stack.pop()[1]
+        if _stack:
+            _stack[-1][1] = now
+
+
+def stage(name):
+    """Times a block as one pipeline stage of the current dataset (time in nested stages is not double counted)."""
+    if _record is None:
+        return _NULL_STAGE
+    return _timed_stage(name)
+
+
+def timed_iter(iterable, name="read"):
+    """Charges the time spent producing each item (e.g. reading a CSV chunk) to a stage."""
+    if _record is None:
+        return iterable
+
+    def items():
+        iterator, done = iter(iterable), object()
+        while True:
+            with stage(name):
+                item = next(iterator, done)
+            if item is done:
+                return
+            yield item
+    return items()
+
+
+def rows(counter, n):
+    """Adds n to a row counter ('rows_in' / 'rows_out') of the current dataset."""
+    if _record is not None:
+        _record[counter] = _record.get(counter, 0) + int(n)
+
+
+def _reset_peak_rss():
+    """Resets the kernel's peak RSS counter (VmHWM) for this process, where the kernel allows it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 2**10, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 2**20 if sys.platform == "darwin" else 2**10
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+@contextlib.contextmanager
+def dataset(name, source=None):
+    """Records one dataset's stages; yields the record so the caller can add fields such as 'status'."""
+    global _record
+    path = os.environ.get(PROFILE_ENV)
+    if not path or _record is not None:
+        yield {}
+        return
+
+    _record = {"run": os.environ.get(RUN_ENV), "dataset": name, "source": source, "pid": os.getpid(),
+               **{f"{s}_s": 0.0 for s in STAGES}, "rows_in": 0, "rows_out": 0}
+    _reset_peak_rss()
+    started = time.perf_counter()
+    try:
+        yield _record
+    except BaseException as e:
+        _record.setdefault("status", "failed")
+        _record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record, _record = _record, None
+        _stack.clear()
+        record["total_s"] = time.perf_counter() - started
+        record["peak_rss_mb"] = _peak_rss_mb()
+        record["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        for key in [f"{s}_s" for s in STAGES] + ["total_s"]:
+            record[key] = round(record[key], 6)
+        # One short write per record in append mode, so records from parallel workers do not interleave
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def load_records(path, run=None):
+    """Reads the recorded lines, optionally only those of one run."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if run is None or r.get("run") == run]
+
+
+def print_summary(path=None, run=None):
+    """Prints one line per dataset of a run (the current one by default) with its slowest stage marked."""
+    path = path or os.environ.get(PROFILE_ENV)
+    run = run or os.environ.get(RUN_ENV)
+    records = load_records(path, run)
+    if not records:
+        return
+    print(f"\n⏱️ Stage timings (ms) for run {run}, recorded in {path}:")
+    print(f"   {'dataset':<24}{'status':<9}{'rows in':>10}{'rows out':>10}"
+          + "".join(f"{s:>11}" for s in STAGES) + f"{'total':>11}{'peak RSS MB':>13}")
+    for r in sorted(records, key=lambda r: r["total_s"], reverse=True):
+        slowest = max(STAGES, key=lambda s: r[f"{s}_s"])
+        cells = "".join(f"{r[f'{s}_s'] * 1000:>10.1f}" + ("*" if s == slowest and r[f"{s}_s"] > 0 else " ")
+                        for s in STAGES)
+        print(f"   {r['dataset']:<24}{r.get('status', ''):<9}{r['rows_in']:>10,}{r['rows_out']:>10,}"
+              f"{cells}{r['total_s'] * 1000:>10.1f} {r['peak_rss_mb'] or 0:>12.1f}")
+    total = sum(r["total_s"] for r in records)
+    print(f"   * slowest stage per dataset; {len(records)} dataset(s), {total:.2f}s recorded")
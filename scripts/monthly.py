@@ -0,0 +1,78 @@
+import hashlib
+from collections import ChainMap
+
+import numpy as np
+import pandas as pd
+
+# 🔹 Wide monthly fact table: one row per month, one column per metric.
+# Built once per cleaning run from the cleaned datasets so analyses select columns instead of merging tables.
+
+MONTHLY_FILENAME = "Monthly.csv"
+MONTHLY_VERSION = 4  # bump whenever a metric or a derived-metric formula changes
+
+# Dataset -> (metric columns, how rows within a month are combined)
+# Most cleaned tables already hold one row per month; the heart-rate tables keep one row per day.
+MONTHLY_METRICS = {
+    "steps": (["steps"], "sum"),
+    "calories": (["active_calories", "resting_calories", "total_calories"], "sum"),
+    "floors": (["climbed_floors", "descended_floors"], "sum"),
+    "intensity": (["actual"], "sum"),
+    "stress": (["stress"], "mean"),
+    "sleep": (["avg_duration", "avg_bedtime", "avg_wake_time"], "mean"),
+    "heart_rate": (["heart_rate"], "mean"),
+    "max_hr": (["max_heart_rate"], "max"),
+}
+
+
+AVERAGE_MINUTES_PER_WORKOUT = 30
+
+# Derived metric -> (columns it reads, formula over whole columns)
+# Formulas see the monthly table plus the derived metrics declared above them, and must stay vectorized.
+DERIVED_METRICS = {
+    "total_activity": (
+        ["climbed_floors", "actual"],
+        lambda t: t["climbed_floors"] + t["actual"],
+    ),
+    # Activity score excluding steps: floors climbed (scaled for impact) + intensity minutes + calories
+    "total_activity_score": (
+        ["climbed_floors", "actual", "total_calories"],
+        lambda t: t["climbed_floors"] * 10 + t["actual"] + t["total_calories"],
+    ),
+    # Intensity minutes as 30-minute workouts, capped at the number of days in the month
+    "estimated_active_days": (
+        ["date", "actual"],
+        lambda t: np.minimum(t["actual"] / AVERAGE_MINUTES_PER_WORKOUT, t["date"].dt.days_in_month),
+    ),
+}
+
+
+def add_derived_metrics(table, names=None):
+    """Adds the derived metrics (all, or the given names) that the table has the inputs for, in one assign."""
+    derived = {}
+    columns = ChainMap(derived, table)
+    for name, (inputs, formula) in DERIVED_METRICS.items():
+        if (names is None or name in names) and name not in table and all(c in columns for c in inputs):
+            derived[name] = formula(columns)
+    return table.assign(**derived) if derived else table
+
+
+def build_monthly_table(frames):
+    """Joins the metric columns of every available dataset into one table sorted by month."""
+    parts = []
+    for name, (columns, how) in MONTHLY_METRICS.items():
+        if name not in frames:
+            continue
+        df = frames[name]
+        values = df[columns].astype("float64")  # cleaned tables are typed (schema.py); sums and means in float64
+        parts.append(values.groupby(df["date"]).agg(how))
+    if not parts:
+        return pd.DataFrame(columns=["date"])
+    table = pd.concat(parts, axis=1, join="outer").sort_index()
+    table.index.name = "date"
+    return add_derived_metrics(table[table.index.notna()].reset_index())
+
+
+def table_key(digests):
+    """Cache key of the monthly table: the digests of the cleaned files it was built from."""
+    joined = "|".join(f"{name}={digest}" for name, digest in sorted(digests.items()))
+    return hashlib.sha256(joined.encode()).hexdigest() + f"-v{MONTHLY_VERSION}"
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# 🔹 Column-at-once parsers for Garmin text fields.
+# Each parser returns (values, rejected): `values` holds the parsed minutes or months (NaN / NaT where
+# parsing failed) and `rejected` is a boolean mask of non-empty cells that could not be parsed.
+# Exports repeat the same few hundred strings many times, so each distinct value is parsed once and mapped back.
+
+DURATION_PATTERN = r"^\s*(?:(?P<hours>\d+)\s*h)?\s*(?:(?P<minutes>\d+)\s*min)?\s*$"
+CLOCK_PATTERN = r"^\s*(?P<hour>\d{1,2}):(?P<minute>\d{2})\s*(?P<meridiem>[AaPp][Mm])\s*$"
+MONTH_PATTERN = r"^\s*(?P<month>[A-Za-z]{3})[A-Za-z]*\.?(?:\s+(?P<year>\d{4}))?\s*$"
+
+
+def _as_text(series):
+    """Returns the series as strings (missing values stay missing) plus a mask of non-empty cells."""
+    series = pd.Series(series)
+    present = series.notna()
+    text = series.astype("string").where(present)
+    present &= text.str.strip().ne("").fillna(False).astype(bool)
+    return text, present
+
+
+def _parse_distinct(series, parser, dtype="float64"):
+    """Runs `parser` over the distinct values of `series` and broadcasts the results back to every row."""
+    series = pd.Series(series)
+    codes, uniques = pd.factorize(series)
+    values, rejected = parser(pd.Series(uniques, dtype=object))
+
+    # factorize marks missing cells with code -1; give them a NaN (NaT) / not-rejected slot at the end
+    values = np.append(values.to_numpy(dtype=dtype), np.array([None], dtype=dtype))
+    rejected = np.append(rejected.to_numpy(dtype=bool), False)
+    out_values, out_rejected = values[codes], rejected[codes]
+    return (
+        pd.Series(out_values, index=series.index, dtype=dtype),
+        pd.Series(out_rejected, index=series.index, dtype=bool),
+    )
+
+
+def parse_durations(series):
+    """Converts a column of 'Xh Ymin' durations (e.g. '8h 29min', '7h', '45min') to total minutes."""
+    return _parse_distinct(series, _parse_durations)
+
+
+def parse_clock_times(series):
+    """Converts a column of 'HH:MM AM/PM' clock times to minutes since midnight."""
+    return _parse_distinct(series, _parse_clock_times)
+
+
+def parse_months(series, default_year=None):
+    """Converts month labels ('Apr', 'April', 'Apr 2025', 'April 2025') to the first day of that month.
+
+    When no label in the column carries a year, every label gets `default_year` (exports covering a
+    single year write bare month names); otherwise labels without a year are rejected.
+    """
+    return _parse_distinct(series, lambda uniques: _parse_months(uniques, default_year), "datetime64[ns]")
+
+
+def parse_iso_months(series):
+    """Converts 'YYYY-MM-DD' dates to the first day of their month."""
+    return _parse_distinct(series, _parse_iso_months, "datetime64[ns]")
+
+
+def parse_iso_days(series):
+    """Converts 'YYYY-MM-DD' dates to days (datetimes at midnight)."""
+    return _parse_distinct(series, _parse_iso_days, "datetime64[ns]")
+
+
+def _parse_durations(series):
+    text, present = _as_text(series)
+    parts = text.str.extract(DURATION_PATTERN)
+    hours = pd.to_numeric(parts["hours"], errors="coerce")
+    minutes = pd.to_numeric(parts["minutes"], errors="coerce")
+
+    matched = (hours.notna() | minutes.notna()).to_numpy(dtype=bool)
+    values = pd.Series(
+        np.where(matched, hours.fillna(0).to_numpy(dtype=float) * 60 + minutes.fillna(0).to_numpy(dtype=float), np.nan),
+        index=text.index,
+        dtype="float64",
+    )
+    rejected = present & ~pd.Series(matched, index=text.index)
+    return values, rejected
+
+
+def _parse_clock_times(series):
+    text, present = _as_text(series)
+    parts = text.str.extract(CLOCK_PATTERN)
+    hour = pd.to_numeric(parts["hour"], errors="coerce")
+    minute = pd.to_numeric(parts["minute"], errors="coerce")
+    is_pm = parts["meridiem"].str.upper().eq("PM").fillna(False).astype(bool)
+
+    valid = (hour.between(1, 12) & minute.between(0, 59)).fillna(False).astype(bool)
+    values = ((hour % 12) * 60 + minute + is_pm * 720).where(valid).astype("float64")
+    rejected = present & ~valid
+    return values, rejected
+
+
+def _parse_months(series, default_year):
+    text, present = _as_text(series)
+    parts = text.str.extract(MONTH_PATTERN)
+    year = parts["year"]
+    if default_year is not None and year.isna().all():
+        year = year.fillna(str(default_year))
+    months = pd.to_datetime(parts["month"].str.title() + " " + year, format="%b %Y", errors="coerce")
+    return months, present & months.isna()
+
+
+def _parse_iso_days(series):
+    text, present = _as_text(series)
+    days = pd.to_datetime(text, format="ISO8601", errors="coerce").dt.normalize()
+    return days, present & days.isna()
+
+
+def _parse_iso_months(series):
+    days, rejected = _parse_iso_days(series)
+    return days.dt.to_period("M").dt.to_timestamp(), rejected
+
+
+def format_durations(minutes, missing="Unknown"):
+    """Formats a column of minutes back to 'Xh Ymin' strings."""
+    minutes = pd.Series(minutes, dtype="float64")
+    hours = (minutes // 60).astype("Int64").astype("string")
+    mins = ((minutes % 60) // 1).astype("Int64").astype("string")
+    formatted = hours + "h " + mins + "min"
+    return formatted.fillna(missing).astype(object)
+
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+# 🔹 Monthly aggregates kept as mergeable partials.
+# A partial holds, per month, the sum and the count of non-missing values of every metric column.
+# Sums of partials are exact, so a month can be updated from a new export without re-reading its history:
+# summed metrics are read back as the sum, averaged metrics as sum / count (what groupby().mean() computes).
+
+SUM_SUFFIX = "_sum"
+COUNT_SUFFIX = "_count"
+MAX_SUFFIX = "_max"
+
+
+def to_partials(df, key="date", with_max=False):
+    """Reduces row-level data to one partial row per month (or per value of `key`, e.g. per day)."""
+    columns = [c for c in df.columns if c != key]
+    grouped = df.groupby(key)
+    parts = [grouped[columns].sum().add_suffix(SUM_SUFFIX), grouped[columns].count().add_suffix(COUNT_SUFFIX)]
+    if with_max:
+        parts.append(grouped[columns].max().add_suffix(MAX_SUFFIX))
+    return pd.concat(parts, axis=1).reset_index()
+
+
+def merge_partials(*partials, key="date"):
+    """Combines partials; months present in several inputs are added together (maxima take the larger)."""
+    frames = [p for p in partials if p is not None and not p.empty]
+    if not frames:
+        return partials[0]
+    if len(frames) == 1:
+        return frames[0]
+    return _combine(pd.concat(frames, ignore_index=True), key)
+
+
+def _combine(rows, key):
+    """Collapses partial rows sharing a key: sums and counts add up, maxima take the larger."""
+    how = {c: "max" if c.endswith(MAX_SUFFIX) else "sum" for c in rows.columns if c != key}
+    return rows.groupby(key, as_index=False).agg(how)
+
+
+def coarsen(partials, period_start, key="date"):
+    """Re-buckets partials into coarser periods, e.g. days into weeks; period_start maps each key to its period."""
+    return _combine(partials.assign(**{key: period_start(partials[key])}), key)
+
+
+def metric_columns(partials):
+    """Lists the metric columns a partial table describes."""
+    return [c[: -len(SUM_SUFFIX)] for c in partials.columns if c.endswith(SUM_SUFFIX)]
+
+
+def finalize(partials, how, key="date"):
+    """Turns partials into the cleaned monthly table ('sum', 'mean' or 'max' per month)."""
+    result = partials[[key]].copy()
+    for column in metric_columns(partials):
+        total = partials[column + SUM_SUFFIX]
+        if how == "sum":
+            result[column] = total
+        elif how == "mean":
+            count = partials[column + COUNT_SUFFIX]
+            result[column] = (total / count.where(count > 0, np.nan)).astype("float64")
+        elif how == "max" and column + MAX_SUFFIX in partials:
+            result[column] = partials[column + MAX_SUFFIX]
+        else:
+            raise ValueError(f"Unknown aggregation: {how}")
+    return result
+
+
+def touched_months(partials, key="date"):
+    """Returns the months a partial table covers."""
+    return sorted(partials[key].dropna().unique().tolist())
@@ -0,0 +1,60 @@
+# 🔹 Plotting libraries are imported on first use so compute-only commands never pay for them
+
+def pyplot():
+    """Returns (matplotlib.pyplot, seaborn), importing them the first time a figure is drawn."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
+def regplot(x, y, ax=None, ci=95, scatter_kws=None, line_kws=None, cleaned_folder=None):
+    """Draws what sns.regplot draws (points, fitted line, bootstrap band) from the cached fit in regression.py."""
+    import matplotlib as mpl
+    from regression import regression
+
+    plt, _ = pyplot()
+    ax = ax or plt.gca()
+    scatter_kws, line_kws = dict(scatter_kws or {}), dict(line_kws or {})
+    fit = regression(x, y, ci=ci, cleaned_folder=cleaned_folder)
+
+    # Same defaults as seaborn: the next colour in the cycle, slightly transparent points, a thicker line
+    lines, = ax.plot([], [])
+    color = mpl.colors.rgb2hex(mpl.colors.colorConverter.to_rgb(lines.get_color()))
+    lines.remove()
+    scatter_kws.setdefault("color", color)
+    scatter_kws.setdefault("alpha", .8)
+    scatter_kws.setdefault("linewidths", mpl.rcParams["lines.markeredgewidth"])
+    line_kws.setdefault("color", color)
+    line_kws.setdefault("linewidth", line_kws.pop("lw", mpl.rcParams["lines.linewidth"] * 1.5))
+
+    ax.scatter(x, y, **scatter_kws)
+    ax.plot(fit["grid"], fit["fitted"], **line_kws)
+    if len(fit["low"]):
+        ax.fill_between(fit["grid"], fit["low"], fit["high"], facecolor=line_kws["color"], alpha=.15)
+    for name, set_label in ((getattr(x, "name", None), ax.set_xlabel), (getattr(y, "name", None), ax.set_ylabel)):
+        if name is not None:
+            set_label(name)
+    return ax
+
+
+def rolling_plot(df, metric, ax=None, windows=(7, 28, 90)):
+    """Draws a daily metric with its rolling means (from Rolling.csv): the shortest window with a ±1 std band."""
+    from rolling import ROLLING_METRICS, column_name
+
+    plt, _ = pyplot()
+    ax = ax or plt.gca()
+    label = ROLLING_METRICS[metric].lower()
+    if metric not in df:
+        print(f"⚠️ No daily {label} data to plot (month-labelled exports only have monthly values).")
+        return ax
+    ax.plot(df["date"], df[metric], color="lightgray", marker=".", linestyle="none", label=f"Daily {label}")
+    for window in windows:
+        mean = df[column_name(metric, "mean", window)]
+        lines, = ax.plot(df["date"], mean, label=f"{window}-day mean")
+        if window == windows[0]:
+            std = df[column_name(metric, "std", window)]
+            ax.fill_between(df["date"], mean - std, mean + std, color=lines.get_color(), alpha=.15)
+    ax.plot(df["date"], df[column_name(metric, "ewm", windows[-1])], linestyle="dashed", color="black",
+            label=f"EWM ({windows[-1]}-day span)")
+    ax.legend()
+    return ax
@@ -1,34 +1,60 @@
+import argparse
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 
+import anomalies
+import cache
+import instrument
+import partials
+import rolling
+import rollups
+import schema
+from datastore import DATASETS, DataStore
+from monthly import MONTHLY_FILENAME, MONTHLY_METRICS, build_monthly_table, table_key
+from parsing import format_durations, parse_clock_times, parse_durations, parse_iso_days, parse_iso_months, parse_months
+
 # Set folder paths
 DATA_FOLDER = "data"
 CLEANED_FOLDER = "cleaned_data"
-os.makedirs(CLEANED_FOLDER, exist_ok=True)
-
-# ✅ Helper function: Convert dates to "Month YYYY" safely
-def format_month_year(date_series, add_year=True):
-    """Converts date column to 'Month YYYY' format while preserving original values on failure."""
-    try:
-        # **Only add year if it's missing**
-        if add_year and not date_series.str.contains(r'\d{4}', regex=True, na=False).any():
-            date_series = date_series.str[:3] + " 2024"  # Extract first 3 letters & append "2024"
-        
-        formatted_dates = pd.to_datetime(date_series, format="%b %Y", errors="coerce").dt.strftime("%B %Y")
+CACHE_FOLDER = cache.cache_folder_for(CLEANED_FOLDER)
 
-        # **Fix:** If conversion fails, return original values instead of "Unknown"
-        formatted_dates[formatted_dates.isna()] = date_series
+# ✅ Point the pipeline at another export (e.g. one user of a cohort)
+def set_folders(data_folder, cleaned_folder):
+    global DATA_FOLDER, CLEANED_FOLDER, CACHE_FOLDER
+    DATA_FOLDER = data_folder
+    CLEANED_FOLDER = cleaned_folder
+    CACHE_FOLDER = cache.cache_folder_for(cleaned_folder)
 
-        return formatted_dates
+# ✅ Cleaned dates are the first day of their month (a datetime column, written out as "Month YYYY")
+MONTH_FORMAT = "%B %Y"
 
-    except Exception as e:
-        print(f"⚠️ Date formatting error: {e}")
-        return date_series
+# ✅ Helper function: Normalize month labels ("Apr", "April 2025", ...) to months
+def format_month_year(date_series, add_year=True):
+    """Converts month labels to month-start datetimes; labels are assumed to be 2024 when none has a year."""
+    months, rejected = parse_months(date_series, default_year=2024 if add_year else None)
+    report_rejects(date_series.name, rejected)
+    return months
 
 # ✅ More precise function for datasets already in YYYY-MM-DD format
 def format_yyyy_mm_dd_to_month_year(date_series):
-    """Converts 'YYYY-MM-DD' dates into 'Month YYYY' format."""
-    return pd.to_datetime(date_series, errors="coerce").dt.strftime("%B %Y")
+    """Converts 'YYYY-MM-DD' dates to month-start datetimes."""
+    months, rejected = parse_iso_months(date_series)
+    report_rejects(date_series.name, rejected)
+    return months
+
+# ✅ Datasets exported by day keep the day until their rows are rolled up
+def format_yyyy_mm_dd_to_day(date_series):
+    """Converts 'YYYY-MM-DD' dates to day datetimes."""
+    days, rejected = parse_iso_days(date_series)
+    report_rejects(date_series.name, rejected)
+    return days
+
+def by_month(df):
+    """Returns the rows with their dates moved to the first day of the month."""
+    return df.assign(date=rollups.month_start(df["date"]))
 
 # ✅ Convert numeric columns safely
 def convert_to_numeric(df, columns):
@@ -36,27 +62,11 @@ def convert_to_numeric(df, columns):
     df[columns] = df[columns].apply(pd.to_numeric, errors="coerce")
     return df
 
-# ✅ Convert time (HH:MM AM/PM) to minutes
-def convert_time_to_minutes(time_str):
-    """Converts time in 'HH:MM AM/PM' format to minutes since midnight."""
-    try:
-        time_obj = pd.to_datetime(time_str, format="%I:%M %p")
-        return time_obj.hour * 60 + time_obj.minute
-    except:
-        return None
-
-# ✅ Convert sleep duration (e.g., "8h 29min") to total minutes
-def convert_duration_to_minutes(duration_str):
-    """Converts sleep duration from 'Xh Ymin' format to total minutes."""
-    try:
-        hours, minutes = 0, 0
-        if "h" in duration_str:
-            hours = int(duration_str.split("h")[0].strip())
-        if "min" in duration_str:
-            minutes = int(duration_str.split("h")[-1].replace("min", "").strip())
-        return hours * 60 + minutes
-    except:
-        return None
+# ✅ Warn about values the vectorized parsers could not read
+def report_rejects(column, rejected):
+    """Prints how many non-empty values in a column were rejected by the parser."""
+    if rejected.any():
+        print(f"⚠️ {int(rejected.sum())} unparseable value(s) in '{column}' (first at row {rejected.idxmax()}), treated as missing.")
 
 # 🛠 **Cleaning Functions**
 def clean_activities(df):
@@ -67,76 +77,380 @@ def clean_activities(df):
     df["month"] = format_month_year(df["month"], add_year=True)
     return df
 
-def clean_average_heart_rate(df):
-    """Formats date and removes 'bpm' from values."""
+def prepare_average_heart_rate(df):
+    """Row-level part of clean_average_heart_rate: formats date (keeping the day) and removes 'bpm' from values."""
     df.columns = ["date", "heart_rate"]
-    df["date"] = format_yyyy_mm_dd_to_month_year(df["date"])  # ✅ Use correct date function
+    df["date"] = format_yyyy_mm_dd_to_day(df["date"])  # ✅ Use correct date function
     df["heart_rate"] = df["heart_rate"].str.replace(" bpm", "", regex=True)
     return df.dropna(subset=["date"])  # Ensure dates are retained
 
-def clean_max_heart_rate(df):
+def clean_average_heart_rate(df):
     """Formats date and removes 'bpm' from values."""
+    return by_month(prepare_average_heart_rate(df))
+
+def prepare_max_heart_rate(df):
+    """Row-level part of clean_max_heart_rate: formats date (keeping the day) and removes 'bpm' from values."""
     df.columns = ["date", "max_heart_rate"]
-    df["date"] = format_yyyy_mm_dd_to_month_year(df["date"])  # ✅ Use correct date function
+    df["date"] = format_yyyy_mm_dd_to_day(df["date"])  # ✅ Use correct date function
     df["max_heart_rate"] = df["max_heart_rate"].str.replace(" bpm", "", regex=True)
     return df.dropna(subset=["date"])
 
+def clean_max_heart_rate(df):
+    """Formats date and removes 'bpm' from values."""
+    return by_month(prepare_max_heart_rate(df))
+
+def prepare_calories(df):
+    """Row-level part of clean_calories: formats date and converts calories to numeric."""
+    df.columns = ["date", "active_calories", "resting_calories", "total_calories"]
+    df["date"] = format_month_year(df["date"], add_year=True)
+    return convert_to_numeric(df, ["active_calories", "resting_calories", "total_calories"])
+
 def clean_calories(df):
     """Formats date, converts calories to numeric, and aggregates by month."""
-    df.columns = ["date", "active_calories", "resting_calories", "total_calories"]
+    return aggregate_monthly(prepare_calories(df), "sum")
+
+def prepare_floors_climbed(df):
+    """Row-level part of clean_floors_climbed: formats date and converts floors to numeric."""
+    df.columns = ["date", "climbed_floors", "descended_floors"]
     df["date"] = format_month_year(df["date"], add_year=True)
-    df = convert_to_numeric(df, ["active_calories", "resting_calories", "total_calories"])
-    return df.groupby("date", as_index=False).sum()
+    return convert_to_numeric(df, ["climbed_floors", "descended_floors"])
 
 def clean_floors_climbed(df):
     """Formats date, converts floors climbed, and aggregates by month."""
-    df.columns = ["date", "climbed_floors", "descended_floors"]
-    df["date"] = format_month_year(df["date"], add_year=True)
-    df = convert_to_numeric(df, ["climbed_floors", "descended_floors"])
-    return df.groupby("date", as_index=False).sum()
+    return aggregate_monthly(prepare_floors_climbed(df), "sum")
+
+def prepare_intensity_minutes(df):
+    """Row-level part of clean_intensity_minutes: formats dates (keeping the day) and converts actual minutes to numeric."""
+    df.columns = ["date", "actual", "goal"]
+    df["date"] = format_yyyy_mm_dd_to_day(df["date"])  # ✅ Use correct date function
+    return convert_to_numeric(df, ["actual"]).drop(columns=["goal"])
 
 def clean_intensity_minutes(df):
     """Formats dates, converts actual intensity minutes to numeric, and aggregates by month."""
-    df.columns = ["date", "actual", "goal"]
-    df["date"] = format_yyyy_mm_dd_to_month_year(df["date"])  # ✅ Use correct date function
-    df = convert_to_numeric(df, ["actual"]).drop(columns=["goal"])
-    return df.groupby("date", as_index=False).sum()
+    return aggregate_monthly(prepare_intensity_minutes(df), "sum")
 
-def clean_stress(df):
-    """Formats date, converts stress values to numeric, and computes the average stress per month."""
+def prepare_stress(df):
+    """Row-level part of clean_stress: formats date and converts stress values to numeric."""
     df.columns = ["date", "stress"]
     df["date"] = format_month_year(df["date"], add_year=True)
-    df = convert_to_numeric(df, ["stress"])
-    return df.groupby("date", as_index=False).mean()
+    return convert_to_numeric(df, ["stress"])
 
-def clean_sleep(df):
-    """Formats sleep data: converts dates, durations, and times to minutes, then averages per month."""
+def clean_stress(df):
+    """Formats date, converts stress values to numeric, and computes the average stress per month."""
+    return aggregate_monthly(prepare_stress(df), "mean")
+
+def prepare_sleep(df):
+    """Row-level part of clean_sleep: converts dates, durations, and times to minutes."""
     df = df.iloc[:, :4]  # Keep only the first 4 columns
     df.columns = ["date", "avg_duration", "avg_bedtime", "avg_wake_time"]
 
     df["date"] = format_month_year(df["date"], add_year=True)
 
-    df["avg_duration"] = df["avg_duration"].apply(convert_duration_to_minutes)
-    df["avg_bedtime"] = df["avg_bedtime"].apply(convert_time_to_minutes)
-    df["avg_wake_time"] = df["avg_wake_time"].apply(convert_time_to_minutes)
-
-    df = df.groupby("date", as_index=False).mean()
+    df["avg_duration"], rejected = parse_durations(df["avg_duration"])
+    report_rejects("avg_duration", rejected)
+    for column in ["avg_bedtime", "avg_wake_time"]:
+        df[column], rejected = parse_clock_times(df[column])
+        report_rejects(column, rejected)
+    return df
 
-    df["avg_duration"] = df["avg_duration"].apply(lambda x: f"{int(x // 60)}h {int(x % 60)}min" if pd.notna(x) else "Unknown")
+def finish_sleep(df):
+    """Formats the monthly average sleep duration back to 'Xh Ymin'."""
+    df["avg_duration"] = format_durations(df["avg_duration"])
     return df
 
+def clean_sleep(df):
+    """Formats sleep data: converts dates, durations, and times to minutes, then averages per month."""
+    return finish_sleep(aggregate_monthly(prepare_sleep(df), "mean"))
+
+def prepare_steps(df):
+    """Row-level part of clean_steps: formats dates (keeping the day) and converts steps to numeric."""
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+    df = df[["date", "steps"]].copy()
+    df["date"] = format_yyyy_mm_dd_to_day(df["date"])
+    return convert_to_numeric(df, ["steps"])
+
+def clean_steps(df):
+    """Formats dates and sums step counts by month."""
+    return aggregate_monthly(prepare_steps(df), "sum")
+
+# ✅ Monthly aggregation goes through partials (sum + count per month) so it can be updated incrementally
+def aggregate_monthly(df, how):
+    """Aggregates row-level data by month: 'sum' or 'mean' of every metric column."""
+    return partials.finalize(partials.to_partials(by_month(df)), how)
+
+# ✅ Datasets aggregated by month: cleaning function -> (row-level step, aggregation, final formatting)
+MONTHLY_STEPS = {
+    clean_calories: (prepare_calories, "sum", None),
+    clean_floors_climbed: (prepare_floors_climbed, "sum", None),
+    clean_intensity_minutes: (prepare_intensity_minutes, "sum", None),
+    clean_stress: (prepare_stress, "mean", None),
+    clean_sleep: (prepare_sleep, "mean", finish_sleep),
+    clean_steps: (prepare_steps, "sum", None),
+}
+
+# ✅ Datasets exported with one row per day: cleaning function -> row-level step that keeps the day.
+# Their per-day partials feed the day / week / season rollups (see rollups.py).
+DAILY_STEPS = {
+    clean_average_heart_rate: prepare_average_heart_rate,
+    clean_max_heart_rate: prepare_max_heart_rate,
+    clean_intensity_minutes: prepare_intensity_minutes,
+    clean_steps: prepare_steps,
+}
+
+def daily_partials(rows):
+    """Per-day partials (sum, count and max of every metric) of day-dated rows."""
+    values = rows.drop(columns=["date"]).apply(pd.to_numeric, errors="coerce")
+    return partials.to_partials(values.assign(date=rows["date"]), with_max=True)
+
+def monthly_partials(rows, daily=None):
+    """Monthly partials of prepared rows, coarsened from their per-day partials when there are some."""
+    if daily is not None:
+        return partials.coarsen(daily, rollups.month_start)
+    return partials.to_partials(by_month(rows))
+
+def clean_with_partials(df, cleaning_function):
+    """Cleans a raw table and also returns its monthly and per-day partials (None where they do not apply)."""
+    if cleaning_function not in MONTHLY_STEPS:
+        if cleaning_function not in DAILY_STEPS:
+            with instrument.stage("clean"):
+                return cleaning_function(df), None, None
+        with instrument.stage("clean"):
+            rows = DAILY_STEPS[cleaning_function](df)
+        with instrument.stage("aggregate"):
+            daily = daily_partials(rows)
+        return by_month(rows), None, daily
+    prepare, how, finish = MONTHLY_STEPS[cleaning_function]
+    with instrument.stage("clean"):
+        rows = prepare(df)
+    with instrument.stage("aggregate"):
+        daily = daily_partials(rows) if cleaning_function in DAILY_STEPS else None
+        monthly = monthly_partials(rows, daily)
+        return finish_monthly(monthly, how, finish), monthly, daily
+
+def finish_monthly(monthly, how, finish=None):
+    """Turns monthly partials into the cleaned table written to cleaned_data/."""
+    df = partials.finalize(monthly, how)
+    return finish(df) if finish else df
+
+# ✅ Cleaner versions: bump one whenever that function's output changes so its cached tables are rebuilt
+CLEANER_VERSIONS = {
+    "clean_activities": 2,
+    "clean_average_heart_rate": 3,
+    "clean_max_heart_rate": 3,
+    "clean_calories": 2,
+    "clean_floors_climbed": 2,
+    "clean_intensity_minutes": 3,
+    "clean_stress": 3,
+    "clean_sleep": 3,
+    "clean_steps": 3,
+}
+
+# ✅ Streaming: clean a large raw file chunk by chunk so peak memory does not grow with the file
+def stream_partials(file_path, prepare, chunksize, by_day=False):
+    """Folds every chunk of a raw file into monthly partials (and per-day partials when by_day is set)."""
+    monthly = daily = None
+    for chunk in instrument.timed_iter(pd.read_csv(file_path, dtype=str, chunksize=chunksize)):
+        instrument.rows("rows_in", len(chunk))
+        with instrument.stage("clean"):
+            rows = prepare(chunk)
+        with instrument.stage("aggregate"):
+            if by_day:
+                daily = partials.merge_partials(daily, daily_partials(rows))
+            else:
+                monthly = partials.merge_partials(monthly, monthly_partials(rows))
+    if by_day and daily is not None:
+        with instrument.stage("aggregate"):
+            monthly = monthly_partials(None, daily)
+    return monthly, daily
+
+def stream_rows(file_path, cleaned_path, cleaning_function, chunksize, daily=None):
+    """Cleans a row-level raw file chunk by chunk, appending each cleaned chunk to the cleaned CSV.
+
+    For datasets exported by day, the per-day partials of every chunk are added to the `daily` list.
+    """
+    first = True
+    by_day = daily is not None and cleaning_function in DAILY_STEPS
+    for chunk in instrument.timed_iter(pd.read_csv(file_path, dtype=str, chunksize=chunksize)):
+        instrument.rows("rows_in", len(chunk))
+        with instrument.stage("clean"):
+            if by_day:
+                prepared = DAILY_STEPS[cleaning_function](chunk)
+                rows = by_month(prepared)
+            else:
+                rows = cleaning_function(chunk)
+        if by_day:
+            with instrument.stage("aggregate"):
+                daily.append(daily_partials(prepared))
+        with instrument.stage("write"):
+            rows = schema.enforce(os.path.basename(cleaned_path), rows)
+            rows.to_csv(cleaned_path, mode="w" if first else "a", header=first, index=False, date_format=MONTH_FORMAT)
+        instrument.rows("rows_out", len(rows))
+        first = False
+        yield rows
+
 # ✅ Process CSV files
-def process_csv(filename, cleaning_function):
+def process_csv(filename, cleaning_function, chunksize=None):
     file_path = os.path.join(DATA_FOLDER, filename)
     if os.path.exists(file_path):
-        df = pd.read_csv(file_path, dtype=str)
-        print(f"\n🔹 Cleaning {filename}...")
-        df = cleaning_function(df)
+        os.makedirs(CLEANED_FOLDER, exist_ok=True)
         cleaned_path = os.path.join(CLEANED_FOLDER, filename)
-        print(f"✅ Saving {filename} to {cleaned_path}")
-        df.to_csv(cleaned_path, index=False)
+        key = cache.cache_key(file_path, CLEANER_VERSIONS.get(cleaning_function.__name__, 1))
+        if os.path.exists(cleaned_path) and cache.is_fresh(filename, key, CACHE_FOLDER):
+            print(f"⏩ {filename} unchanged since last run. Using cached copy.")
+            return "cached"
+        print(f"\n🔹 Cleaning {filename}..." + (f" (streaming {chunksize:,} rows at a time)" if chunksize else ""))
+        if chunksize and cleaning_function not in MONTHLY_STEPS:
+            print(f"✅ Saving {filename} to {cleaned_path}")
+            chunks = []
+            with instrument.stage("write"):  # reading and cleaning happen inside the stream and are timed there
+                rows = stream_rows(file_path, cleaned_path, cleaning_function, chunksize, chunks)
+                cache.store_chunks(filename, rows, key, CACHE_FOLDER, source=cleaned_path)
+            with instrument.stage("aggregate"):
+                daily = partials.merge_partials(*chunks) if chunks else None
+            if daily is not None:
+                with instrument.stage("write"):
+                    cache.store_partials(filename, daily, CACHE_FOLDER, kind="daily")
+        else:
+            if chunksize:
+                prepare, how, finish = MONTHLY_STEPS[cleaning_function]
+                monthly, daily = stream_partials(file_path, prepare, chunksize, by_day=cleaning_function in DAILY_STEPS)
+                with instrument.stage("aggregate"):
+                    df = finish_monthly(monthly, how, finish)
+            else:
+                with instrument.stage("read"):
+                    raw = pd.read_csv(file_path, dtype=str)
+                instrument.rows("rows_in", len(raw))
+                df, monthly, daily = clean_with_partials(raw, cleaning_function)
+            save_cleaned(filename, df, key, monthly, daily)
+        cache.clear_deltas(filename, CACHE_FOLDER)
+        return "cleaned"
     else:
         print(f"⚠️ {filename} not found. Skipping.")
+        return "skipped"
+
+# ✅ Write a cleaned table, its typed cache entry and its partials (stale partials of another source are removed)
+def save_cleaned(filename, df, key, monthly=None, daily=None):
+    cleaned_path = os.path.join(CLEANED_FOLDER, filename)
+    print(f"✅ Saving {filename} to {cleaned_path}")
+    with instrument.stage("write"):
+        df = schema.enforce(filename, df)
+        df.to_csv(cleaned_path, index=False, date_format=MONTH_FORMAT)
+        cache.store(filename, df, key, CACHE_FOLDER, source=cleaned_path)
+        for kind, table in (("partials", monthly), ("daily", daily)):
+            if table is not None:
+                cache.store_partials(filename, table, CACHE_FOLDER, kind=kind)
+            else:
+                cache.drop_partials(filename, CACHE_FOLDER, kind=kind)
+    instrument.rows("rows_out", len(df))
+
+# ✅ Run one cleaning job and report its outcome instead of raising (used by the serial and parallel modes)
+def run_job(filename, cleaning_function, chunksize=None):
+    try:
+        with instrument.dataset(filename, source=DATA_FOLDER) as record:
+            record["status"] = process_csv(filename, cleaning_function, chunksize)
+        return filename, record["status"], None
+    except Exception as e:
+        return filename, "failed", f"{type(e).__name__}: {e}"
+
+# ✅ Clean every dataset, optionally across a process pool (the cleaning functions share no state)
+def process_all(datasets, workers=1, chunksize=None):
+    """Runs process_csv for every dataset and returns {filename: (status, error)}."""
+    results = {}
+    if workers <= 1:
+        for filename, function in datasets.items():
+            name, status, error = run_job(filename, function, chunksize)
+            results[name] = (status, error)
+    else:
+        # Start the largest raw files first so the long jobs (heart rate, sleep) overlap instead of queueing
+        def raw_size(filename):
+            path = os.path.join(DATA_FOLDER, filename)
+            return os.path.getsize(path) if os.path.exists(path) else 0
+
+        jobs = sorted(datasets.items(), key=lambda item: raw_size(item[0]), reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_job, filename, function, chunksize) for filename, function in jobs]
+            for future in as_completed(futures):
+                name, status, error = future.result()
+                results[name] = (status, error)
+    # Report in the order the datasets were listed
+    results = {filename: results[filename] for filename in datasets}
+
+    print("\n📋 Cleaning summary:")
+    for filename, (status, error) in results.items():
+        icon = {"cleaned": "✅", "cached": "⏩", "skipped": "⚠️"}.get(status, "❌")
+        print(f"   {icon} {filename}: {status}" + (f" ({error})" if error else ""))
+    return results
+
+# ✅ Fold a delta export (e.g. the last week) into the cleaned tables, touching only the months it covers
+def append_csv(filename, cleaning_function, delta_folder):
+    delta_path = os.path.join(delta_folder, filename)
+    if not os.path.exists(delta_path):
+        print(f"⚠️ {filename} not in delta export. Skipping.")
+        return "skipped"
+    digest = cache.file_digest(delta_path)
+    if digest in cache.applied_deltas(filename, CACHE_FOLDER):
+        print(f"⏩ {filename} delta already applied. Skipping.")
+        return "cached"
+
+    os.makedirs(CLEANED_FOLDER, exist_ok=True)
+    cleaned_path = os.path.join(CLEANED_FOLDER, filename)
+    with instrument.stage("read"):
+        df = pd.read_csv(delta_path, dtype=str)
+    instrument.rows("rows_in", len(df))
+    print(f"\n🔹 Appending {filename}...")
+
+    if cleaning_function not in MONTHLY_STEPS:
+        # Row-level tables: append the new rows; the CSV stays the source of truth for this table
+        with instrument.stage("clean"):
+            prepared = DAILY_STEPS[cleaning_function](df) if cleaning_function in DAILY_STEPS else None
+            rows = by_month(prepared) if prepared is not None else cleaning_function(df)
+        if prepared is not None:
+            append_daily(filename, prepared)
+        with instrument.stage("write"):
+            rows = schema.enforce(filename, rows)
+            rows.to_csv(cleaned_path, mode="a", header=not os.path.exists(cleaned_path), index=False,
+                        date_format=MONTH_FORMAT)
+            cache.drop(filename, CACHE_FOLDER)
+        instrument.rows("rows_out", len(rows))
+        print(f"✅ Appended {len(rows)} row(s) to {cleaned_path}")
+    else:
+        with instrument.stage("read"):
+            existing = cache.load_partials(filename, CACHE_FOLDER)
+        if existing is None:
+            print(f"⚠️ No monthly partials for {filename}. Run a full clean first. Skipping.")
+            return "skipped"
+        prepare, how, finish = MONTHLY_STEPS[cleaning_function]
+        with instrument.stage("clean"):
+            rows = prepare(df)
+        if cleaning_function in DAILY_STEPS:
+            append_daily(filename, rows)
+        with instrument.stage("aggregate"):
+            delta = monthly_partials(rows)
+            merged = partials.merge_partials(existing, delta)
+            result = finish_monthly(merged, how, finish)
+        with instrument.stage("write"):
+            result = schema.enforce(filename, result)
+            result.to_csv(cleaned_path, index=False, date_format=MONTH_FORMAT)
+            # The appended table no longer matches the raw file in data/, so a full run rebuilds it from scratch
+            cache.store(filename, result, f"append-{digest}", CACHE_FOLDER, source=cleaned_path)
+            cache.store_partials(filename, merged, CACHE_FOLDER)
+        instrument.rows("rows_out", len(result))
+        months = [month.strftime(MONTH_FORMAT) for month in partials.touched_months(delta)]
+        print(f"✅ Updated {', '.join(months)} in {cleaned_path}")
+    cache.record_delta(filename, digest, CACHE_FOLDER)
+    return "appended"
+
+def append_daily(filename, rows):
+    """Folds the per-day partials of appended day-dated rows into the dataset's cached ones."""
+    with instrument.stage("read"):
+        existing = cache.load_partials(filename, CACHE_FOLDER, kind="daily")
+    if existing is None:
+        print(f"⚠️ No daily partials for {filename}; day and week rollups need a full clean first.")
+        return
+    with instrument.stage("aggregate"):
+        merged = partials.merge_partials(existing, daily_partials(rows))
+    with instrument.stage("write"):
+        cache.store_partials(filename, merged, CACHE_FOLDER, kind="daily")
 
 # ✅ Process all datasets
 datasets = {
@@ -148,7 +462,163 @@ datasets = {
     "Intensity Minutes.csv": clean_intensity_minutes,
     "Stress.csv": clean_stress,
     "Sleep.csv": clean_sleep,
+    "Steps.csv": clean_steps,
 }
 
-for filename, function in datasets.items():
-    process_csv(filename, function)
+# ✅ Materialize the wide monthly table (one row per month, every metric column) from the cleaned datasets
+def write_monthly_table():
+    with instrument.dataset(MONTHLY_FILENAME, source=CLEANED_FOLDER) as record:
+        record["status"] = _write_monthly_table()
+
+def _write_monthly_table():
+    store = DataStore(CLEANED_FOLDER)
+    sources = [name for name in MONTHLY_METRICS if name in store]
+    key = table_key({name: cache.file_digest(store.path(name)) for name in sources})
+    monthly_path = os.path.join(CLEANED_FOLDER, MONTHLY_FILENAME)
+    if os.path.exists(monthly_path) and cache.is_fresh(MONTHLY_FILENAME, key, CACHE_FOLDER):
+        print(f"⏩ {MONTHLY_FILENAME} unchanged since last run. Using cached copy.")
+        return "cached"
+    with instrument.stage("read"):
+        frames = store.load(*sources)
+    instrument.rows("rows_in", sum(len(df) for df in frames.values()))
+    with instrument.stage("aggregate"):
+        table = build_monthly_table(frames)
+    os.makedirs(CLEANED_FOLDER, exist_ok=True)
+    with instrument.stage("write"):
+        table = schema.enforce(MONTHLY_FILENAME, table)
+        table.to_csv(monthly_path, index=False, date_format=MONTH_FORMAT)
+        cache.store(MONTHLY_FILENAME, table, key, CACHE_FOLDER, source=monthly_path)
+    instrument.rows("rows_out", len(table))
+    print(f"✅ Saved monthly table ({len(table)} months x {len(table.columns) - 1} metrics) to {monthly_path}")
+    return "cleaned"
+
+# ✅ Materialize the day / week / season rollups from the cached partials (the month one is Monthly.csv)
+def write_rollups():
+    with instrument.dataset("Rollups", source=CACHE_FOLDER) as record:
+        record["status"] = _write_rollups()
+
+def _write_rollups():
+    key = rollups.rollups_key(DATASETS, CACHE_FOLDER)
+    paths = {resolution: os.path.join(CLEANED_FOLDER, filename) for resolution, filename in rollups.ROLLUP_FILENAMES.items()}
+    if all(os.path.exists(path) and cache.is_fresh(os.path.basename(path), key, CACHE_FOLDER) for path in paths.values()):
+        print("⏩ Rollups unchanged since last run. Using cached copies.")
+        return "cached"
+    with instrument.stage("read"):
+        daily, monthly = rollups.load_sources(DATASETS, CACHE_FOLDER)
+    instrument.rows("rows_in", sum(len(p) for p in [*daily.values(), *monthly.values()]))
+    with instrument.stage("aggregate"):
+        tables = rollups.build_rollups(daily, monthly)
+    os.makedirs(CLEANED_FOLDER, exist_ok=True)
+    with instrument.stage("write"):
+        for resolution, table in tables.items():
+            tables[resolution] = table = schema.enforce(os.path.basename(paths[resolution]), table)
+            table.to_csv(paths[resolution], index=False, date_format=rollups.DAY_FORMAT)
+            cache.store(os.path.basename(paths[resolution]), table, key, CACHE_FOLDER, source=paths[resolution])
+    instrument.rows("rows_out", sum(len(table) for table in tables.values()))
+    print("✅ Saved rollups: " + ", ".join(f"{len(table)} {resolution}s" for resolution, table in tables.items()))
+    return "cleaned"
+
+# ✅ Rolling statistics of the daily metrics, resumed from the first changed day (see rolling.py)
+def write_rolling():
+    with instrument.dataset(rolling.ROLLING_FILENAME, source=CLEANED_FOLDER) as record:
+        record["status"] = _write_rolling()
+
+def _write_rolling():
+    daily_path = os.path.join(CLEANED_FOLDER, DATASETS["daily"])
+    if not os.path.exists(daily_path):
+        print(f"⚠️ {DATASETS['daily']} not found. Skipping rolling statistics.")
+        return "skipped"
+    version = f"-v{rolling.ROLLING_VERSION}"
+    key = cache.file_digest(daily_path) + version
+    rolling_path = os.path.join(CLEANED_FOLDER, rolling.ROLLING_FILENAME)
+    previous_key = cache.stored_key(rolling.ROLLING_FILENAME, CACHE_FOLDER)
+    if os.path.exists(rolling_path) and previous_key == key:
+        print(f"⏩ {rolling.ROLLING_FILENAME} unchanged since last run. Using cached copy.")
+        return "cached"
+    with instrument.stage("read"):
+        daily = cache.load_cleaned(DATASETS["daily"], CLEANED_FOLDER)
+        # The previous table is resumed from, unless it was computed by another version
+        previous = cache.load(rolling.ROLLING_FILENAME, CACHE_FOLDER) if (previous_key or "").endswith(version) else None
+    instrument.rows("rows_in", len(daily))
+    with instrument.stage("aggregate"):
+        table, updated = rolling.update_rolling(daily, previous)
+    os.makedirs(CLEANED_FOLDER, exist_ok=True)
+    with instrument.stage("write"):
+        table = schema.enforce(rolling.ROLLING_FILENAME, table)
+        table.to_csv(rolling_path, index=False, date_format=rollups.DAY_FORMAT)
+        cache.store(rolling.ROLLING_FILENAME, table, key, CACHE_FOLDER, source=rolling_path)
+    instrument.rows("rows_out", updated)
+    print(f"✅ Saved rolling statistics ({updated} of {len(table)} days computed) to {rolling_path}")
+    return "cleaned"
+
+# ✅ Flag anomalous days (against the previous 28) and months (against the whole history) of every metric
+def write_anomalies():
+    with instrument.dataset(anomalies.ANOMALIES_FILENAME, source=CLEANED_FOLDER) as record:
+        record["status"] = _write_anomalies()
+
+def _write_anomalies():
+    sources = {"day": DATASETS["daily"], "month": MONTHLY_FILENAME}
+    sources = {resolution: name for resolution, name in sources.items() if os.path.exists(os.path.join(CLEANED_FOLDER, name))}
+    if not sources:
+        print("⚠️ No daily or monthly table found. Skipping anomaly detection.")
+        return "skipped"
+    key = table_key({name: cache.file_digest(os.path.join(CLEANED_FOLDER, name)) for name in sources.values()})
+    key += f"-anomalies-v{anomalies.ANOMALIES_VERSION}"
+    anomalies_path = os.path.join(CLEANED_FOLDER, anomalies.ANOMALIES_FILENAME)
+    if os.path.exists(anomalies_path) and cache.is_fresh(anomalies.ANOMALIES_FILENAME, key, CACHE_FOLDER):
+        print(f"⏩ {anomalies.ANOMALIES_FILENAME} unchanged since last run. Using cached copy.")
+        return "cached"
+    with instrument.stage("read"):
+        tables = {resolution: cache.load_cleaned(name, CLEANED_FOLDER) for resolution, name in sources.items()}
+    instrument.rows("rows_in", sum(len(table) for table in tables.values()))
+    with instrument.stage("aggregate"):
+        found = pd.concat([anomalies.detect(table, window=anomalies.WINDOW if resolution == "day" else None)
+                           .assign(resolution=resolution) for resolution, table in tables.items()], ignore_index=True)
+        found = found[["date", "resolution", "metric", "value", "score"]]
+    os.makedirs(CLEANED_FOLDER, exist_ok=True)
+    with instrument.stage("write"):
+        found = schema.enforce(anomalies.ANOMALIES_FILENAME, found)
+        found.to_csv(anomalies_path, index=False, date_format=rollups.DAY_FORMAT)
+        cache.store(anomalies.ANOMALIES_FILENAME, found, key, CACHE_FOLDER, source=anomalies_path)
+    instrument.rows("rows_out", len(found))
+    print(f"✅ Saved {len(found)} anomalies to {anomalies_path}")
+    return "cleaned"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the raw Garmin exports in data/ into cleaned_data/.")
+    parser.add_argument("--append", metavar="DELTA_FOLDER",
+                        help="fold a delta export into the existing cleaned tables instead of rebuilding them")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="clean datasets in parallel across this many processes (0 = one per CPU)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream raw files in chunks of this many rows to keep memory flat on large exports")
+    parser.add_argument("--profile", metavar="JSONL",
+                        help="record per-dataset stage timings, row counts and peak memory to this file "
+                             "(or set GARMIN_PROFILE)")
+    args = parser.parse_args(argv)
+    if args.profile or instrument.enabled():
+        instrument.start_run(args.profile)
+
+    failed = False
+    if args.append:
+        for filename, function in datasets.items():
+            with instrument.dataset(filename, source=args.append) as record:
+                record["status"] = append_csv(filename, function, args.append)
+        write_monthly_table()
+        write_rollups()
+        write_rolling()
+        write_anomalies()
+    else:
+        results = process_all(datasets, workers=args.workers or os.cpu_count(), chunksize=args.chunksize)
+        write_monthly_table()
+        write_rollups()
+        write_rolling()
+        write_anomalies()
+        failed = any(status == "failed" for status, _ in results.values())
+    if instrument.enabled():
+        instrument.print_summary()
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
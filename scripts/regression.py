@@ -0,0 +1,119 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+import cache
+
+# 🔹 Least-squares line fits with bootstrap confidence bands, computed once per input and cached.
+# The band is what seaborn's regplot draws: 1,000 resamples of the points, refitted all at once with
+# array operations, and the percentile interval of the fitted lines on a 100-point grid over x.
+# Fits are keyed by a hash of the data and settings, so re-rendering an unchanged figure reads the cache.
+# They are cached next to the cleaned folder the figures read; the least recently used beyond MAX_CACHED_FITS
+# are removed, so fits of superseded data do not pile up.
+
+REGRESSION_VERSION = 1
+N_BOOT = 1000
+GRID_SIZE = 100
+BOOT_CELLS = 2_000_000  # resampled points held in memory at once
+MAX_CACHED_FITS = 64  # a few times the fits the figures draw
+
+_fits = {}
+
+
+def _lines(x, y):
+    """Slope and intercept of the least-squares line through every row of x / y (fits along the last axis)."""
+    dx = x - x.mean(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (dx * y).sum(axis=-1) / (dx * dx).sum(axis=-1)
+    return slope, y.mean(axis=-1) - slope * x.mean(axis=-1)
+
+
+def fit_line(x, y, ci=95, n_boot=N_BOOT, grid_size=GRID_SIZE, seed=0):
+    """Fits y = intercept + slope * x on the pairs where both values exist, with a bootstrap band."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    x, y = x[keep], y[keep]
+    n = len(x)
+    fit = {"n": np.int64(n), "slope": np.float64(np.nan), "intercept": np.float64(np.nan),
+           "r": np.float64(np.nan), "grid": np.array([]), "fitted": np.array([]),
+           "low": np.array([]), "high": np.array([])}
+    if n < 2:
+        return fit
+
+    slope, intercept = _lines(x, y)
+    grid = np.linspace(x.min(), x.max(), grid_size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.corrcoef(x, y)[0, 1]
+    fit.update(slope=slope, intercept=intercept, r=np.float64(r), grid=grid, fitted=intercept + slope * grid)
+
+    if ci:
+        rng = np.random.default_rng(seed)
+        predictions = np.empty((n_boot, grid_size))
+        block = max(1, BOOT_CELLS // n)
+        for start in range(0, n_boot, block):
+            stop = min(start + block, n_boot)
+            idx = rng.integers(0, n, (stop - start, n))
+            slopes, intercepts = _lines(x[idx], y[idx])
+            predictions[start:stop] = intercepts[:, None] + slopes[:, None] * grid[None, :]
+        fit["low"], fit["high"] = np.nanpercentile(predictions, [50 - ci / 2, 50 + ci / 2], axis=0)
+    return fit
+
+
+def fit_key(x, y, ci, n_boot, grid_size, seed):
+    """Hash of the data and every setting that changes the fit."""
+    digest = hashlib.sha256()
+    for values in (x, y):
+        digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+        digest.update(b"|")
+    digest.update(f"{ci}|{n_boot}|{grid_size}|{seed}|v{REGRESSION_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def _prune(cache_folder, keep=MAX_CACHED_FITS):
+    """Removes the least recently used fits beyond `keep` (a fit's .key is touched whenever it is read)."""
+    keys = glob.glob(os.path.join(cache_folder, "Regression-*.key"))
+    if len(keys) <= keep:
+        return
+    used = {path: stat.st_mtime_ns for path, stat in zip(keys, map(_stat, keys)) if stat}
+    for key_path in sorted(used, key=used.get, reverse=True)[keep:]:
+        for path in (key_path, key_path[:-len(".key")] + ".npz"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # removed by another process rendering at the same time
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def regression(x, y, ci=95, n_boot=N_BOOT, grid_size=GRID_SIZE, seed=0, cleaned_folder=None):
+    """The fit for (x, y): from memory, from the cache next to the cleaned folder, or computed and cached.
+
+    `cleaned_folder` defaults to the root of the default store, the folder the analysis scripts read.
+    """
+    key = fit_key(x, y, ci, n_boot, grid_size, seed)
+    if key in _fits:
+        return _fits[key]
+    if cleaned_folder is None:
+        from datastore import default_store
+        cleaned_folder = default_store().root
+    cache_folder = cache.cache_folder_for(cleaned_folder)
+    name = f"Regression-{key[:16]}"
+    fit = cache.load_arrays(name, key, cache_folder)
+    if fit is None:
+        fit = fit_line(x, y, ci, n_boot, grid_size, seed)
+        cache.store_arrays(name, fit, key, cache_folder)
+        _prune(cache_folder)
+    else:
+        try:
+            os.utime(os.path.join(cache_folder, f"{name}.key"))  # mark it recently used
+        except FileNotFoundError:
+            pass
+    _fits[key] = fit
+    return fit
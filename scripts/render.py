@@ -0,0 +1,175 @@
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import file_digest
+from rolling import rolling_columns
+
+# 🔹 Headless rendering of every report figure into outputs/.
+# Each figure is rendered in a worker process with the non-interactive Agg backend and skipped when
+# neither the dataset columns it reads nor its plotting code changed since the last render. Rolling
+# figures are left out when the export has no daily series for them (month-labelled CSVs).
+
+OUTPUT_FOLDER = os.environ.get("GARMIN_OUTPUT_FOLDER", "outputs")
+MANIFEST_NAME = ".render_manifest.json"
+
+# Modules every figure draws with besides its own (plotting helpers and the cached regression fits)
+SHARED_CODE = ["plotting", "regression"]
+
+# Output file -> (module, plotting function, {cleaned dataset it reads: its columns, or None for the whole file})
+MERGED_STRESS = ["stress", "actual", "avg_duration", "heart_rate"]
+FIGURES = {
+    "activity_levels_over_time.png": ("activity_analysis", "plot_activity_trends", {"monthly": ["climbed_floors", "actual"]}),
+    "activity_bar_chart.png": ("activity_analysis", "plot_activity_bar_chart", {"monthly": ["total_activity"]}),
+    "workout_frequency.png": ("activity_analysis", "plot_workout_frequency", {"monthly": ["estimated_active_days"]}),
+    "resting_hr.png": ("activity_analysis", "plot_rhr_vs_intensity", {"monthly": ["heart_rate", "actual"]}),
+    "monthly.calorie_burn.png": ("calories_analysis", "plot_calorie_burn_trend", {"monthly": ["total_calories"]}),
+    "intensity_vs_cal.png": ("calories_analysis", "plot_intensity_vs_calories", {"monthly": ["actual", "total_calories"]}),
+    "impact_stairs.png": ("calories_analysis", "plot_floors_vs_calories", {"monthly": ["climbed_floors", "total_calories"]}),
+    "activity_on_sleep.png": ("calories_analysis", "plot_activity_vs_sleep", {"monthly": ["actual", "avg_duration"]}),
+    "sleep_duration.png": ("sleep_analysis", "plot_sleep_trends", {"sleep": None}),
+    "sleep_vs_activity.png": ("sleep_analysis", "plot_activity_vs_sleep", {"monthly": ["avg_duration", "actual"]}),
+    "stress_v_sleep.png": ("sleep_analysis", "plot_stress_vs_sleep", {"monthly": ["avg_duration", "stress"]}),
+    "monthly_stress.png": ("stress_analysis", "plot_stress_trends", {"stress": None}),
+    "stress_vs_activity.png": ("stress_analysis", "plot_stress_vs_activity", {"monthly": ["stress", "actual", "steps", "climbed_floors"]}),
+    "intensity_stress.png": ("stress_correlation_analysis", "plot_intensity_vs_stress", {"monthly": MERGED_STRESS}),
+    "hr_stress.png": ("stress_correlation_analysis", "plot_rhr_vs_stress", {"monthly": MERGED_STRESS}),
+    "monthly_step.png": ("step_count_analysis", "plot_monthly_steps", {"steps": None}),
+    "rolling_stress.png": ("stress_analysis", "plot_stress_rolling", {"rolling": rolling_columns("stress")}),
+    "rolling_sleep.png": ("sleep_analysis", "plot_sleep_rolling", {"rolling": rolling_columns("avg_duration")}),
+    "rolling_resting_hr.png": ("activity_analysis", "plot_rhr_rolling", {"rolling": rolling_columns("heart_rate")}),
+    "rolling_steps.png": ("step_count_analysis", "plot_step_rolling", {"rolling": rolling_columns("steps")}),
+}
+
+
+def _digest(path):
+    return file_digest(path) if os.path.exists(path) else "missing"
+
+
+def figure_code(output):
+    """Modules whose code draws a figure: its own (whole, so helpers in it count) and SHARED_CODE."""
+    return [FIGURES[output][0], *SHARED_CODE]
+
+
+def figure_fingerprint(output, store):
+    """Hashes a figure's plotting code and the dataset columns it reads."""
+    _, _, inputs = FIGURES[output]
+    parts = [output] + [_digest(importlib.util.find_spec(module).origin) for module in figure_code(output)]
+    parts += [f"{name}={store.fingerprint(name, columns)}" for name, columns in inputs.items()]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def has_data(output, store):
+    """False for a rolling figure whose daily series is missing or empty, which would draw blank axes."""
+    _, _, inputs = FIGURES[output]
+    if "rolling" not in inputs:
+        return True
+    metric = inputs["rolling"][0]
+    return "rolling" in store and metric in store["rolling"] and bool(store["rolling"][metric].notna().any())
+
+
+def drop_figure(output, output_folder):
+    """Removes a figure rendered when its data still existed."""
+    path = os.path.join(output_folder, output)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def render_figure(output, output_folder):
+    """Worker: draws one figure with the Agg backend and saves it."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    module_name, function_name, _ = FIGURES[output]
+    plot = getattr(importlib.import_module(module_name), function_name)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # plt.show() is a no-op under Agg; seaborn deprecation notices are noise here
+        plot()
+        plt.gcf().savefig(os.path.join(output_folder, output), bbox_inches="tight")
+    plt.close("all")
+    return output
+
+
+def _load_manifest(output_folder):
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, output_folder):
+    with open(os.path.join(output_folder, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def render_all(outputs=None, workers=None, force=False, output_folder=OUTPUT_FOLDER):
+    """Renders the requested figures (all by default) in parallel, skipping unchanged ones."""
+    from datastore import default_store
+
+    os.makedirs(output_folder, exist_ok=True)
+    os.environ["MPLBACKEND"] = "Agg"  # inherited by the worker processes
+    store = default_store()
+    manifest = _load_manifest(output_folder)
+
+    stale, empty = {}, []
+    for output in outputs or FIGURES:
+        if not has_data(output, store):
+            print(f"⏩ {output}: no daily data to plot. Skipping.")
+            drop_figure(output, output_folder)
+            manifest.pop(output, None)
+            empty.append(output)
+            continue
+        fingerprint = figure_fingerprint(output, store)
+        up_to_date = manifest.get(output) == fingerprint and os.path.exists(os.path.join(output_folder, output))
+        if up_to_date and not force:
+            print(f"⏩ {output} unchanged. Skipping.")
+        else:
+            stale[output] = fingerprint
+
+    failed = {}
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render_figure, output, output_folder): output for output in stale}
+            for future in as_completed(futures):
+                output = futures[future]
+                try:
+                    future.result()
+                    manifest[output] = stale[output]
+                    print(f"✅ Rendered {output}")
+                except Exception as e:
+                    failed[output] = f"{type(e).__name__}: {e}"
+                    manifest.pop(output, None)
+                    print(f"❌ {output} failed: {failed[output]}")
+    if stale or empty:
+        _save_manifest(manifest, output_folder)
+    unchanged = len(outputs or FIGURES) - len(stale) - len(empty)
+    print(f"\n🖼️ {len(stale) - len(failed)} rendered, {unchanged} unchanged, {len(empty)} without data, {len(failed)} failed")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the report figures into outputs/ without a display.")
+    parser.add_argument("figures", nargs="*", metavar="FIGURE", help="figures to render (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-render even if nothing changed")
+    parser.add_argument("--output-folder", default=OUTPUT_FOLDER)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.figures if name not in FIGURES]
+    if unknown:
+        parser.error(f"unknown figure(s): {', '.join(unknown)}. Choose from: {', '.join(FIGURES)}")
+
+    failures = render_all(args.figures or None, workers=args.workers, force=args.force, output_folder=args.output_folder)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# 🔹 Rolling statistics of the daily metrics (Rolling.csv), updated incrementally.
+# For every metric and window (7, 28 and 90 calendar days ending on each day) the table holds the mean,
+# standard deviation, min and max of the days that have a value, plus an exponentially weighted mean
+# (span = window, missing days skipped). Each new day updates every window in O(1): exact running sums of
+# the values and their squares (Shewchuk partials, so they depend only on the days in the window and a
+# resumed window gives the same statistics as one built from the start), monotonic deques for min / max
+# and one step of the EWM recurrence.
+# The windows only depend on their last 90 days and the EWM on its previous value, so when days arrive
+# (or recent ones are revised) the table is resumed from the first changed day instead of recomputed.
+
+ROLLING_FILENAME = "Rolling.csv"
+ROLLING_VERSION = 3
+WINDOWS = (7, 28, 90)
+STATISTICS = ("mean", "std", "min", "max", "ewm")
+
+# Daily rollup column -> what it is (resting heart rate is the 'heart_rate' column)
+ROLLING_METRICS = {
+    "stress": "Stress",
+    "heart_rate": "Resting Heart Rate",
+    "avg_duration": "Sleep Duration",
+    "steps": "Steps",
+}
+
+
+def _add(partials, value):
+    """Adds `value` to an exact sum kept as non-overlapping float partials (Shewchuk, as math.fsum)."""
+    i = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[i] = low
+            i += 1
+        value = high
+    partials[i:] = [value]
+
+
+def column_name(metric, statistic, window):
+    """Rolling.csv column of one statistic, e.g. 'stress_mean_7d'."""
+    return f"{metric}_{statistic}_{window}d"
+
+
+def rolling_columns(metric):
+    """Every Rolling.csv column of a metric: its daily value and each statistic of each window."""
+    return [metric] + [column_name(metric, s, w) for w in WINDOWS for s in STATISTICS]
+
+
+class RollingWindow:
+    """Mean, standard deviation, min, max and EWM of a metric over the last `days` calendar days."""
+
+    def __init__(self, days, ewm=float("nan")):
+        self.days = days
+        self.alpha = 2 / (days + 1)
+        self.values = deque()   # (day, value) inside the window, oldest first
+        self.lows = deque()     # (day, value) with increasing values: the front is the minimum
+        self.highs = deque()    # (day, value) with decreasing values: the front is the maximum
+        self.sums, self.squares = [], []  # exact sums of the values and of their squares
+        self.ewm = ewm
+
+    def push(self, day, value):
+        """Moves the window to end on `day` (an integer day number) and adds its value (NaN if missing)."""
+        oldest = day - self.days
+        while self.values and self.values[0][0] <= oldest:
+            self._remove(self.values.popleft()[1])
+        for extremes in (self.lows, self.highs):
+            while extremes and extremes[0][0] <= oldest:
+                extremes.popleft()
+        if math.isnan(value):
+            return
+        self.values.append((day, value))
+        _add(self.sums, value)
+        _add(self.squares, value * value)
+        while self.lows and self.lows[-1][1] >= value:
+            self.lows.pop()
+        self.lows.append((day, value))
+        while self.highs and self.highs[-1][1] <= value:
+            self.highs.pop()
+        self.highs.append((day, value))
+        self.ewm = value if math.isnan(self.ewm) else self.ewm + self.alpha * (value - self.ewm)
+
+    def _remove(self, value):
+        _add(self.sums, -value)
+        _add(self.squares, -value * value)
+
+    def statistics(self):
+        """(mean, std, min, max, ewm); NaN where the window has too few values."""
+        count = len(self.values)
+        if count == 0:
+            return (math.nan,) * 4 + (self.ewm,)
+        total = math.fsum(self.sums)
+        mean = total / count
+        m2 = max(math.fsum(self.squares + [-total * mean]), 0.0)
+        std = math.sqrt(m2 / (count - 1)) if count > 1 else math.nan
+        return mean, std, self.lows[0][1], self.highs[0][1], self.ewm
+
+
+def day_numbers(dates):
+    """Integer day numbers of datetimes (days since 1970-01-01)."""
+    return dates.to_numpy("datetime64[D]").astype("int64")
+
+
+def first_changed(daily, rolling, metrics):
+    """Index of the first day whose date or inputs differ from the ones `rolling` was computed from."""
+    known = min(len(daily), len(rolling))
+    same = daily["date"].iloc[:known].to_numpy() == rolling["date"].iloc[:known].to_numpy()
+    old = rolling[metrics].iloc[:known].to_numpy("float64")
+    new = daily[metrics].iloc[:known].to_numpy("float64")
+    same &= ((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+    return int((~same).argmax()) if not same.all() else known
+
+
+def update_rolling(daily, rolling=None):
+    """Extends (or rebuilds) the rolling table for the daily rollup `daily`.
+
+    `rolling` is the table computed last time, if any: its rows before the first day whose inputs changed are
+    kept, the windows are re-seeded from the 90 days before it and only the days from there on are pushed.
+    """
+    metrics = [m for m in ROLLING_METRICS if m in daily]
+    daily = daily.sort_values("date").reset_index(drop=True)
+    if rolling is not None and not all(column_name(m, "ewm", w) in rolling for m in metrics for w in WINDOWS):
+        rolling = None  # a metric appeared since: start over
+    start = 0 if rolling is None else first_changed(daily, rolling, metrics)
+    kept = rolling.iloc[:start] if rolling is not None else None
+
+    days = day_numbers(daily["date"])
+    values = {m: daily[m].to_numpy("float64") for m in metrics}
+    windows = {}
+    for metric in metrics:
+        for window in WINDOWS:
+            ewm = kept[column_name(metric, "ewm", window)].iloc[-1] if kept is not None and len(kept) else math.nan
+            windows[metric, window] = RollingWindow(window, float(ewm))
+    # Re-seed the windows with the days before `start` they still cover (the EWM is already seeded)
+    seed = int(np.searchsorted(days, days[start] - max(WINDOWS), "right")) if start < len(days) else start
+    for i in range(seed, start):
+        for (metric, window), state in windows.items():
+            ewm = state.ewm
+            state.push(days[i], values[metric][i])
+            state.ewm = ewm
+
+    rows = np.full((len(days) - start, len(windows) * len(STATISTICS)), np.nan)
+    for row, i in enumerate(range(start, len(days))):
+        for w, ((metric, _), state) in enumerate(windows.items()):
+            state.push(days[i], values[metric][i])
+            rows[row, w * len(STATISTICS):(w + 1) * len(STATISTICS)] = state.statistics()
+    columns = [column_name(m, s, w) for (m, w) in windows for s in STATISTICS]
+    added = pd.concat([daily.loc[start:, ["date", *metrics]].reset_index(drop=True),
+                       pd.DataFrame(rows, columns=columns)], axis=1)
+    if kept is None or kept.empty:
+        return added, len(added)
+    return pd.concat([kept, added.astype(kept.dtypes.to_dict())], ignore_index=True), len(added)
@@ -0,0 +1,122 @@
+import hashlib
+import os
+
+import pandas as pd
+
+import cache
+import partials
+from monthly import MONTHLY_METRICS
+
+# 🔹 Rollup cube: the metrics at day, ISO-week, month and season resolution.
+# Cleaning keeps per-day partials (sum, count and max of every metric) for the datasets exported by day
+# (heart rate, intensity minutes, steps); the month-labelled exports only have monthly partials.
+# Every resolution is a coarsening of those partials, so all of them are built in one pass over the cached
+# partials, each metric with its own aggregator from MONTHLY_METRICS, without re-reading the raw exports.
+# Month-labelled datasets only appear at month and season resolution.
+
+ROLLUPS_VERSION = 3
+SEASONS = {12: "Winter", 1: "Winter", 2: "Winter", 3: "Spring", 4: "Spring", 5: "Spring",
+           6: "Summer", 7: "Summer", 8: "Summer", 9: "Autumn", 10: "Autumn", 11: "Autumn"}
+
+
+def day_start(dates):
+    return dates.dt.normalize()
+
+
+def week_start(dates):
+    """Monday of each date's ISO week."""
+    days = dates.dt.normalize()
+    return days - pd.to_timedelta(days.dt.dayofweek, unit="D")
+
+
+def month_start(dates):
+    return dates.dt.to_period("M").dt.to_timestamp()
+
+
+def season_start(dates):
+    """First day of each date's meteorological season (December opens the next year's winter)."""
+    months = dates.dt.year * 12 + dates.dt.month - 1
+    months -= dates.dt.month % 3  # Mar/Jun/Sep/Dec start a season
+    return pd.to_datetime(pd.DataFrame({"year": months // 12, "month": months % 12 + 1, "day": 1}))
+
+
+# Resolution -> (period start of a date, name of the label column written next to it)
+RESOLUTIONS = {
+    "day": (day_start, None),
+    "week": (week_start, "week"),
+    "month": (month_start, None),
+    "season": (season_start, "season"),
+}
+
+# Resolution -> cleaned filename of its table (the month table is Monthly.csv, built with the cleaned datasets)
+ROLLUP_FILENAMES = {"day": "Daily.csv", "week": "Weekly.csv", "season": "Seasonal.csv"}
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def period_labels(resolution, starts):
+    """Readable names of period starts: '2024-W05' for weeks, 'Winter 2025' for seasons."""
+    if resolution == "week":
+        iso = starts.dt.isocalendar()
+        return iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)
+    if resolution == "season":
+        # A winter is named after the year of its January and February
+        year = starts.dt.year + (starts.dt.month == 12)
+        return starts.dt.month.map(SEASONS) + " " + year.astype(str)
+    return None
+
+
+def build_rollups(daily, monthly, resolutions=ROLLUP_FILENAMES):
+    """Builds one wide table per resolution from per-dataset partials ({dataset: partials}).
+
+    `daily` holds the per-day partials of the datasets exported by day, `monthly` the monthly partials of the
+    others; each metric is rolled up with its MONTHLY_METRICS aggregator (sum, mean or max).
+    """
+    tables = {}
+    for resolution in resolutions:
+        period, _ = RESOLUTIONS[resolution]
+        parts = []
+        for name, (columns, how) in MONTHLY_METRICS.items():
+            source = daily.get(name)
+            if source is None and resolution not in ("day", "week"):
+                source = monthly.get(name)
+            if source is None:
+                continue
+            finished = partials.finalize(partials.coarsen(source, period), how).set_index("date")
+            parts.append(finished[[c for c in columns if c in finished]])
+        table = pd.concat(parts, axis=1, join="outer").sort_index() if parts else pd.DataFrame(index=pd.DatetimeIndex([]))
+        table.index.name = "date"
+        table = table[table.index.notna()].reset_index()
+        labels = period_labels(resolution, table["date"])
+        if labels is not None:
+            table.insert(1, RESOLUTIONS[resolution][1], labels)
+        tables[resolution] = table
+    return tables
+
+
+def partial_sources(filenames, cache_folder):
+    """Finds the cached partials of each dataset ({name: cleaned filename}): (daily paths, monthly paths)."""
+    daily, monthly = {}, {}
+    for name in MONTHLY_METRICS:
+        if name not in filenames:
+            continue
+        for kind, found in (("daily", daily), ("partials", monthly)):
+            path = cache.partials_path(filenames[name], cache_folder, kind)
+            if os.path.exists(path):
+                found[name] = path
+    return daily, monthly
+
+
+def load_sources(filenames, cache_folder):
+    """Reads the partials build_rollups needs: per-day ones where they exist, monthly ones otherwise."""
+    daily_paths, monthly_paths = partial_sources(filenames, cache_folder)
+    daily = {name: cache.load_partials(filenames[name], cache_folder, "daily") for name in daily_paths}
+    monthly = {name: cache.load_partials(filenames[name], cache_folder) for name in monthly_paths if name not in daily}
+    return daily, monthly
+
+
+def rollups_key(filenames, cache_folder):
+    """Cache key of the rollup tables: the digests of the partials they are built from."""
+    daily, monthly = partial_sources(filenames, cache_folder)
+    parts = [f"{kind}:{name}={cache.file_digest(path)}"
+             for kind, paths in (("daily", daily), ("monthly", monthly)) for name, path in sorted(paths.items())]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest() + f"-v{ROLLUPS_VERSION}"
@@ -0,0 +1,180 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import partials
+
+# 🔹 Append-only store of intraday heart-rate samples, kept next to the cleaned cache.
+# Samples live in two flat files that grow together: timestamps (int64 local time in seconds, sorted) and
+# heart rates (uint8 bpm). Both are memory-mapped, so a range query (a night, a workout, a month) is two
+# binary searches on the timestamps and returns array views into the mapped files without copying; only
+# the pages a query touches are read from disk, so years of 1-second data never have to fit in RAM.
+# Daily averages and maxima are computed block by block from the same files.
+
+SAMPLES_FOLDER_NAME = "heart_rate_samples"
+TIMES_FILE = "timestamps.i8"
+VALUES_FILE = "heart_rate.u1"
+SOURCES_FILE = "sources.txt"  # digests of the files already appended
+TIME_TYPE = np.dtype("<i8")
+VALUE_TYPE = np.dtype("u1")
+BLOCK = 1 << 22  # samples summarized at a time (a few tens of MB of temporaries)
+
+
+def store_folder(cache_folder):
+    """Folder of the heart-rate sample store that belongs to a cache folder."""
+    return os.path.join(cache_folder, SAMPLES_FOLDER_NAME)
+
+
+def to_seconds(moment):
+    """Seconds of a query bound: numbers are taken as seconds, anything else goes through pd.Timestamp."""
+    if moment is None or isinstance(moment, (int, np.integer, float, np.floating)):
+        return moment
+    return pd.Timestamp(moment).value // 10**9
+
+
+def _newest_per_timestamp(timestamps, heart_rates):
+    """Sorts samples by timestamp, keeping the last given value of a repeated timestamp."""
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, heart_rates = timestamps[order], heart_rates[order]
+    last = np.append(timestamps[1:] != timestamps[:-1], True)
+    return timestamps[last], heart_rates[last]
+
+
+def _map(path, dtype, count):
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class SampleStore:
+    """Sorted, memory-mapped heart-rate samples; appending new samples never rewrites the older ones."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.times_path = os.path.join(folder, TIMES_FILE)
+        self.values_path = os.path.join(folder, VALUES_FILE)
+        self.sources_path = os.path.join(folder, SOURCES_FILE)
+        self._arrays = None
+
+    def __len__(self):
+        # A write cut short leaves one file longer than the other: only complete samples count
+        sizes = [os.path.getsize(p) // t.itemsize if os.path.exists(p) else 0
+                 for p, t in ((self.times_path, TIME_TYPE), (self.values_path, VALUE_TYPE))]
+        return min(sizes)
+
+    def arrays(self):
+        """(timestamps, heart rates) of every stored sample, as read-only memory maps."""
+        if self._arrays is None:
+            count = len(self)
+            self._arrays = (_map(self.times_path, TIME_TYPE, count), _map(self.values_path, VALUE_TYPE, count))
+        return self._arrays
+
+    def span(self):
+        """First and last stored timestamp (None, None for an empty store)."""
+        times, _ = self.arrays()
+        return (int(times[0]), int(times[-1])) if len(times) else (None, None)
+
+    def range(self, start=None, end=None):
+        """Samples with start <= timestamp < end, as views into the mapped files (no data is copied)."""
+        times, values = self.arrays()
+        first = 0 if start is None else int(np.searchsorted(times, to_seconds(start), "left"))
+        last = len(times) if end is None else int(np.searchsorted(times, to_seconds(end), "left"))
+        return times[first:last], values[first:last]
+
+    def append(self, timestamps, heart_rates):
+        """Adds samples (any order); returns how many the store grew by.
+
+        Samples after the last stored one are appended as they are, without touching the stored ones. Older
+        ones (a backfilled day) are merged, block by block, into the stored tail from the first timestamp they
+        change, which is rewritten once; a timestamp already stored takes the new value.
+        """
+        timestamps = np.asarray(timestamps, dtype=TIME_TYPE)
+        heart_rates = np.asarray(heart_rates, dtype=VALUE_TYPE)
+        if len(timestamps) == 0:
+            return 0
+        timestamps, heart_rates = _newest_per_timestamp(timestamps, heart_rates)
+        times, values = self.arrays()
+        count = len(times)
+        keep = count if count == 0 or timestamps[0] > times[-1] else int(np.searchsorted(times, timestamps[0], "left"))
+
+        os.makedirs(self.folder, exist_ok=True)
+        if keep == count:
+            self._arrays = times = values = None  # release the maps before the files change
+            self._write(keep, arrays=(timestamps, heart_rates))
+            return len(timestamps)
+        # The merged tail goes to temporary files first, as it is read from the files it replaces
+        merged = self._merge_tail(times, values, keep, timestamps, heart_rates)
+        self._arrays = times = values = None
+        grown = self._write(keep, files=merged) - count
+        for path in merged:
+            os.remove(path)
+        return grown
+
+    def _merge_tail(self, times, values, keep, timestamps, heart_rates):
+        """Writes the stored samples from `keep` on merged with the new (sorted) ones; returns the two temp files."""
+        paths = (self.times_path + ".merge", self.values_path + ".merge")
+        with open(paths[0], "wb") as times_file, open(paths[1], "wb") as values_file:
+            used = 0
+            for offset in range(keep, len(times), BLOCK):
+                block_times, block_values = times[offset: offset + BLOCK], values[offset: offset + BLOCK]
+                last = offset + BLOCK >= len(times)
+                # New samples up to the block's last timestamp (all that remain, for the last block)
+                upto = len(timestamps) if last else int(np.searchsorted(timestamps, block_times[-1], "right"))
+                # Stored first, so a duplicated timestamp keeps the new value
+                block_times, block_values = _newest_per_timestamp(
+                    np.concatenate([block_times, timestamps[used:upto]]), np.concatenate([block_values, heart_rates[used:upto]]))
+                times_file.write(block_times.tobytes())
+                values_file.write(block_values.tobytes())
+                used = upto
+        return paths
+
+    def _write(self, keep, arrays=None, files=None):
+        """Cuts both files after `keep` samples, then adds (timestamps, heart rates) arrays or copies two files."""
+        for index, (path, dtype) in enumerate(((self.values_path, VALUE_TYPE), (self.times_path, TIME_TYPE))):
+            with open(path, "ab") as f:
+                f.truncate(keep * dtype.itemsize)
+                if files is not None:
+                    with open(files[1 - index], "rb") as source:
+                        shutil.copyfileobj(source, f, 1 << 24)
+                else:
+                    f.write(arrays[1 - index].astype(dtype).tobytes())
+        return len(self)
+
+    def sources(self):
+        """Digests of the files whose samples the store holds (see record_sources)."""
+        if len(self) == 0 or not os.path.exists(self.sources_path):
+            return set()
+        with open(self.sources_path) as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def record_sources(self, digests):
+        """Remembers that the samples of these files were appended, so they are not appended again."""
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.sources_path, "a") as f:
+            f.writelines(f"{digest}\n" for digest in digests)
+
+    def daily_partials(self, start=None, end=None):
+        """Per-day partials (sum, count and max) of the samples in a range, summarized block by block."""
+        times, values = self.range(start, end)
+        blocks = []
+        for offset in range(0, len(times), BLOCK):
+            days = times[offset: offset + BLOCK] // 86400
+            block = values[offset: offset + BLOCK]
+            # Timestamps are sorted, so each day is one run of the block
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(days)) + 1])
+            blocks.append(pd.DataFrame({
+                "date": pd.to_datetime(days[starts], unit="D"),
+                "heart_rate_sum": np.add.reduceat(block.astype("int64"), starts),
+                "heart_rate_count": np.diff(np.append(starts, len(block))),
+                "heart_rate_max": np.maximum.reduceat(block, starts),
+            }))
+        if not blocks:
+            return pd.DataFrame(columns=["date", "heart_rate_sum", "heart_rate_count", "heart_rate_max"])
+        return partials.merge_partials(*blocks)  # a day split across two blocks is added back together
+
+    def daily(self, start=None, end=None):
+        """Daily average and maximum heart rate of the samples in a range ('heart_rate', 'max_heart_rate')."""
+        daily = self.daily_partials(start, end)
+        return partials.finalize(daily, "mean").assign(max_heart_rate=partials.finalize(daily, "max")["heart_rate"])
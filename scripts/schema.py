@@ -0,0 +1,77 @@
+import pandas as pd
+
+from monthly import MONTHLY_METRICS
+from rolling import ROLLING_METRICS, WINDOWS, column_name
+
+# 🔹 Column types of every cleaned table, enforced when a table is written and when it is read back.
+# Per-dataset tables use the smallest type that holds their values (nullable integers keep missing days),
+# activity types are categoricals and dates are datetimes (the first day of the month in monthly tables).
+# The wide tables (Monthly.csv, the rollups and the rolling statistics) hold averaged metrics as float32 and
+# totals as float64, which stays exact (and is written without exponents) for any step or calorie count;
+# NaN where a period lacks a metric. The rolling EWMs are float64 too: an appended run resumes from them.
+
+DATE = "datetime64[ns]"
+MONTH_LABEL_FORMAT = "%B %Y"
+METRIC = "float32"
+TOTAL = "float64"
+# Wide-table columns that are totals: the summed metrics and the derived metrics that add them up
+TOTALS = {c for columns, how in MONTHLY_METRICS.values() if how == "sum" for c in columns}
+TOTALS |= {"total_activity", "total_activity_score"}
+# Rolling.csv columns read back as state, so resuming gives the same values as a full rebuild
+RESUMED = {column_name(metric, "ewm", window) for metric in ROLLING_METRICS for window in WINDOWS}
+
+SCHEMAS = {
+    "Activities.csv": {"month": DATE, "activity_type": "category"},
+    "Average Heart Rate.csv": {"date": DATE, "heart_rate": "UInt8"},
+    "Max Heart Rate.csv": {"date": DATE, "max_heart_rate": "UInt8"},
+    "Calories.csv": {"date": DATE, "active_calories": "Int32", "resting_calories": "Int32", "total_calories": "Int32"},
+    "Floors Climbed.csv": {"date": DATE, "climbed_floors": "Int32", "descended_floors": "Int32"},
+    "Intensity Minutes.csv": {"date": DATE, "actual": "Int32"},
+    "Stress.csv": {"date": DATE, "stress": "float32"},
+    "Sleep.csv": {"date": DATE, "avg_duration": "string", "avg_bedtime": "float32", "avg_wake_time": "float32"},
+    "Steps.csv": {"date": DATE, "steps": "Int32"},
+    "Anomalies.csv": {"date": DATE, "resolution": "category", "metric": "category", "value": TOTAL, "score": "float32"},
+}
+
+# Wide tables: the period start, its label ('2024-W05', 'Winter 2025') and any number of metric columns
+WIDE_TABLES = {"Monthly.csv", "Daily.csv", "Weekly.csv", "Seasonal.csv", "Rolling.csv"}
+LABELS = {"week": "category", "season": "category"}
+
+
+def schema_for(name, columns):
+    """The {column: dtype} schema of a cleaned table (None for tables without one)."""
+    if name in SCHEMAS:
+        return SCHEMAS[name]
+    if name in WIDE_TABLES:
+        return {c: DATE if c == "date" else LABELS.get(c, TOTAL if c in TOTALS | RESUMED else METRIC) for c in columns}
+    return None
+
+
+def to_dates(series):
+    """Parses 'Month YYYY' labels (or 'YYYY-MM-DD' days, as in the day-level rollups) into datetimes."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, format=MONTH_LABEL_FORMAT, errors="coerce")
+    if parsed.isna().any():
+        parsed = parsed.fillna(pd.to_datetime(series, format="ISO8601", errors="coerce"))
+    return parsed
+
+
+def _cast(series, dtype):
+    if dtype == DATE:
+        return to_dates(series).astype(DATE)
+    if dtype in ("category", "string"):
+        return series.astype(dtype)
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")  # cells such as "--" become missing
+    return series.astype(dtype)
+
+
+def enforce(name, df):
+    """Casts a cleaned table to its schema; columns the schema does not list are left as they are."""
+    schema = schema_for(name, df.columns)
+    if schema is None:
+        return df
+    casts = {column: _cast(df[column], dtype) for column, dtype in schema.items()
+             if column in df and df[column].dtype != dtype}
+    return df.assign(**casts) if casts else df
@@ -1,54 +1,14 @@
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# 🔹 Set the correct path to the cleaned data folder
-DATA_FOLDER = "/Users/Elissa/Documents/garmin_data_analysis/cleaned_data"
-
-# 🔹 Define dataset filenames
-files = {
-    "sleep": "Sleep.csv",
-    "intensity": "Intensity Minutes.csv",
-    "stress": "Stress.csv"
-}
-
-# 🔹 Load datasets
-data = {name: pd.read_csv(os.path.join(DATA_FOLDER, filename)) for name, filename in files.items()}
-
-# 🔹 Standardize column names
-def clean_column_names(df):
-    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
-    return df
-
-data = {name: clean_column_names(df) for name, df in data.items()}
-
-# 🔹 Convert date columns to datetime format
-def convert_date_column(df, column="date"):
-    if column in df.columns:
-        df[column] = pd.to_datetime(df[column], format="%B %Y", errors="coerce")
-    return df
-
-data = {name: convert_date_column(df) for name, df in data.items()}
-
-# 🔹 Convert sleep duration from "Xh Ymin" format to total minutes
-def convert_duration_to_minutes(duration_str):
-    """Converts sleep duration from 'Xh Ymin' format to total minutes."""
-    try:
-        hours, minutes = 0, 0
-        if "h" in duration_str:
-            hours = int(duration_str.split("h")[0].strip())
-        if "min" in duration_str:
-            minutes = int(duration_str.split("h")[-1].replace("min", "").strip())
-        return hours * 60 + minutes
-    except:
-        return None  # Return None for invalid values
-
-data["sleep"]["avg_duration"] = data["sleep"]["avg_duration"].apply(convert_duration_to_minutes)
+from correlations import correlations
+from datastore import default_store
+from plotting import pyplot, regplot, rolling_plot
+
+# 🔹 Cleaned datasets, loaded on first use (sleep duration comes back in minutes)
+data = default_store()
 
 # --- 📊 Sleep Duration Over Time ---
 def plot_sleep_trends():
     """Plots sleep duration trends over time."""
+    plt, sns = pyplot()
     df = data["sleep"].sort_values("date")
 
     plt.figure(figsize=(10, 5))
@@ -61,56 +21,84 @@ def plot_sleep_trends():
     plt.grid(True)
     plt.show()
 
-plot_sleep_trends()
+# --- 📊 Nightly Sleep Duration with Rolling Windows ---
+def plot_sleep_rolling():
+    """Plots nightly sleep duration with its 7, 28 and 90-day rolling averages."""
+    plt, _ = pyplot()
+    plt.figure(figsize=(12, 5))
+    rolling_plot(data["rolling"], "avg_duration")
+    plt.xticks(rotation=45)
+    plt.ylabel("Sleep Duration (minutes)")
+    plt.xlabel("Day")
+    plt.title("Daily Sleep Duration with Rolling Averages")
+    plt.grid(True)
+    plt.show()
 
 # --- 📊 Correlation Between Physical Activity & Sleep ---
 def plot_activity_vs_sleep():
     """Analyzes correlation between intensity minutes and sleep duration."""
-    df = data["sleep"].merge(data["intensity"], on="date", how="inner").sort_values("date")
+    plt, _ = pyplot()
+    df = data.monthly("avg_duration", "actual")
 
     plt.figure(figsize=(8, 5))
-    sns.regplot(x=df["actual"], y=df["avg_duration"], scatter_kws={"alpha": 0.6}, line_kws={"color": "red"})
+    regplot(x=df["actual"], y=df["avg_duration"], scatter_kws={"alpha": 0.6}, line_kws={"color": "red"})
     plt.xlabel("Intensity Minutes")
     plt.ylabel("Sleep Duration (minutes)")
     plt.title("Correlation: Physical Activity vs. Sleep Duration")
     plt.grid(True)
     plt.show()
 
-    correlation = df["actual"].corr(df["avg_duration"])
+    correlation = correlations(data).get("actual", "avg_duration")
     print(f"\n📊 Correlation between Intensity Minutes & Sleep Duration: {correlation:.3f}")
 
-plot_activity_vs_sleep()
-
 # --- 📊 Correlation Between Stress & Sleep ---
 def plot_stress_vs_sleep():
     """Analyzes correlation between stress levels and sleep duration."""
-    df = data["sleep"].merge(data["stress"], on="date", how="inner").sort_values("date")
+    plt, _ = pyplot()
+    df = data.monthly("avg_duration", "stress")
 
     plt.figure(figsize=(8, 5))
-    sns.regplot(x=df["stress"], y=df["avg_duration"], scatter_kws={"alpha": 0.6, "color": "red"}, line_kws={"color": "blue"})
+    regplot(x=df["stress"], y=df["avg_duration"], scatter_kws={"alpha": 0.6, "color": "red"}, line_kws={"color": "blue"})
     plt.xlabel("Average Stress Level")
     plt.ylabel("Sleep Duration (minutes)")
     plt.title("Correlation: Stress Levels vs. Sleep Duration")
     plt.grid(True)
     plt.show()
 
-    correlation = df["stress"].corr(df["avg_duration"])
+    correlation = correlations(data).get("stress", "avg_duration")
     print(f"\n📊 Correlation between Stress Levels & Sleep Duration: {correlation:.3f}")
 
-plot_stress_vs_sleep()
-
 # --- 📊 Compute Best & Worst Sleep Months ---
+def best_worst_sleep(df):
+    """Returns the average sleep duration and the best and worst sleep months (durations in minutes)."""
+    best = df.loc[df["avg_duration"].idxmax()]
+    worst = df.loc[df["avg_duration"].idxmin()]
+    return {
+        "average_minutes": df["avg_duration"].mean(),
+        "best_month": best["date"],
+        "best_minutes": best["avg_duration"],
+        "worst_month": worst["date"],
+        "worst_minutes": worst["avg_duration"],
+    }
+
 def analyze_best_worst_sleep():
     """Finds the best and worst sleep months and computes the average sleep duration."""
-    avg_sleep = data["sleep"]["avg_duration"].mean()
-    best_sleep_month = data["sleep"].loc[data["sleep"]["avg_duration"].idxmax(), ["date", "avg_duration"]]
-    worst_sleep_month = data["sleep"].loc[data["sleep"]["avg_duration"].idxmin(), ["date", "avg_duration"]]
+    result = best_worst_sleep(data["sleep"])
+    avg_sleep = result["average_minutes"]
 
     print(f"\n💤 Average Sleep Duration: {avg_sleep:.1f} minutes (~{avg_sleep // 60:.0f}h {avg_sleep % 60:.0f}m)")
-    print(f"🌟 Best Sleep Month: {best_sleep_month['date'].strftime('%B %Y')} ({best_sleep_month['avg_duration']:.0f} minutes)")
-    print(f"📉 Worst Sleep Month: {worst_sleep_month['date'].strftime('%B %Y')} ({worst_sleep_month['avg_duration']:.0f} minutes)")
+    print(f"🌟 Best Sleep Month: {result['best_month'].strftime('%B %Y')} ({result['best_minutes']:.0f} minutes)")
+    print(f"📉 Worst Sleep Month: {result['worst_month'].strftime('%B %Y')} ({result['worst_minutes']:.0f} minutes)")
+
+def main():
+    plot_sleep_trends()
+    plot_sleep_rolling()
+    plot_activity_vs_sleep()
+    plot_stress_vs_sleep()
+    analyze_best_worst_sleep()
 
-analyze_best_worst_sleep()
+    # ✅ Ensure Plots Do Not Block Terminal Execution
+    pyplot()[0].show(block=False)
 
-# ✅ Ensure Plots Do Not Block Terminal Execution
-plt.show(block=False)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import os
+
+import cache
+from datastore import DATA_ROOT, DATASETS
+from parsing import DURATION_PATTERN
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# 🔹 SQL over the cleaned and raw datasets with DuckDB, an in-process columnar engine (no server).
+# Every cleaned dataset is a view named like the DataStore dataset (steps, sleep, monthly, weekly, rolling, ...)
+# over its typed Parquet cache entry, or over the cleaned CSV when there is none (or the CSV changed since);
+# every raw export in the data folder is a view named raw_<dataset> over the CSV as exported (column names in
+# lower_snake_case).
+# Views only describe the files: a query reads just the columns it selects, and WHERE clauses are pushed into
+# the scan (Parquet row groups whose min / max rule a filter out are skipped), so nothing is loaded into pandas
+# except the result.
+#
+#   SELECT week, actual, heart_rate FROM weekly WHERE actual > 500 ORDER BY actual DESC
+
+RAW_FOLDER = "data"
+
+# SQL macros defined on every connection (usable on raw tables too: duration_minutes(avg_duration) FROM raw_sleep)
+MACROS = {
+    # 'Xh Ymin' text -> minutes, as parsing.parse_durations (NULL where it does not match)
+    "duration_minutes": f"""CASE WHEN regexp_matches(text, '{DURATION_PATTERN}') AND regexp_matches(text, '\\d')
+        THEN coalesce(TRY_CAST(nullif(regexp_extract(text, '{DURATION_PATTERN}', 1), '') AS DOUBLE), 0) * 60
+           + coalesce(TRY_CAST(nullif(regexp_extract(text, '{DURATION_PATTERN}', 2), '') AS DOUBLE), 0) END""",
+}
+
+# Cleaned columns stored as text that queries want as numbers (the SQL counterpart of datastore.POST_LOAD)
+CONVERSIONS = {
+    "sleep": {"avg_duration": "duration_minutes(avg_duration)"},
+}
+
+
+def _quote(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _columns(connection, source):
+    return [row[0] for row in connection.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+
+
+def _cleaned_view(name, root, connection):
+    """SELECT of a cleaned dataset: its Parquet cache entry if the CSV is unchanged, else the CSV (None if neither exists)."""
+    filename = DATASETS[name]
+    cached = cache.trusted_path(filename, root)
+    replace = {}
+    if cache.CACHE_FORMAT == "parquet" and cached:
+        source = f"read_parquet({_quote(cached)})"
+    else:
+        path = os.path.join(root, filename)
+        if not os.path.exists(path):
+            return None
+        # Cleaned CSVs label months as 'January 2024': date columns are read as text and parsed (as cache.parse_date_columns)
+        dates = [c for c in cache.DATE_COLUMNS if c in _columns(connection, f"read_csv({_quote(path)}, header = true)")]
+        types = ", ".join(f"'{c}': 'VARCHAR'" for c in dates)
+        source = f"read_csv({_quote(path)}, header = true, types = {{{types}}})"
+        replace = {c: f"coalesce(try_strptime({c}, '%B %Y'), TRY_CAST({c} AS TIMESTAMP))" for c in dates}
+    columns = _columns(connection, source)
+    replace.update({c: expression for c, expression in CONVERSIONS.get(name, {}).items() if c in columns})
+    if not replace:
+        return f"SELECT * FROM {source}"
+    return f"SELECT * REPLACE ({', '.join(f'{e} AS {c}' for c, e in replace.items())}) FROM {source}"
+
+
+def connect(root=None, raw_folder=RAW_FOLDER):
+    """An in-memory DuckDB connection with a view per cleaned dataset under `root` and per raw export."""
+    if duckdb is None:
+        raise ImportError("SQL queries need DuckDB: pip install duckdb")
+    root = root or DATA_ROOT
+    connection = duckdb.connect(":memory:")
+    for macro, expression in MACROS.items():
+        connection.execute(f"CREATE MACRO {macro}(text) AS {expression}")
+    for name in DATASETS:
+        view = _cleaned_view(name, root, connection)
+        if view is not None:
+            connection.execute(f"CREATE VIEW {name} AS {view}")
+        raw = os.path.join(raw_folder, DATASETS[name]) if raw_folder else None
+        if raw and os.path.exists(raw):
+            connection.execute(f"CREATE VIEW raw_{name} AS SELECT * FROM read_csv({_quote(raw)}, header = true, normalize_names = true)")
+    return connection
+
+
+def tables(connection):
+    """Names of the views a connection exposes."""
+    return [row[0] for row in connection.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal ORDER BY view_name").fetchall()]
+
+
+def query(sql, params=None, root=None, raw_folder=RAW_FOLDER):
+    """Runs one query over a fresh connection and returns the result as a DataFrame."""
+    return connect(root, raw_folder).execute(sql, params or []).df()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the cleaned and raw Garmin datasets with SQL (DuckDB).")
+    parser.add_argument("sql", nargs="?", help="query to run, e.g. \"SELECT * FROM weekly WHERE actual > 500\"")
+    parser.add_argument("--tables", action="store_true", help="list the queryable tables and their columns")
+    parser.add_argument("--raw-folder", default=RAW_FOLDER, help="folder of the raw exports (default: data)")
+    args = parser.parse_args(argv)
+    if not args.sql and not args.tables:
+        parser.error("give a query or --tables")
+
+    connection = connect(raw_folder=args.raw_folder)
+    if args.tables:
+        for name in tables(connection):
+            columns = connection.execute(f"DESCRIBE {name}").fetchall()
+            print(f"🔹 {name}: " + ", ".join(f"{column} {kind}" for column, kind, *_ in columns))
+    if args.sql:
+        print(connection.execute(args.sql).df().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
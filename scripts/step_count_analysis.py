@@ -1,29 +1,39 @@
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from datastore import default_store
+from plotting import pyplot, rolling_plot
 
-# 🔹 Set the correct path to the cleaned data folder
-DATA_FOLDER = "/Users/Elissa/Documents/garmin_data_analysis/cleaned_data"
+# 🔹 Cleaned datasets, loaded on first use
+data = default_store()
 
-# 🔹 Load the Steps dataset
-file_path = os.path.join(DATA_FOLDER, "Steps.csv")
-steps_df = pd.read_csv(file_path)
+# --- 📊 Plot Monthly Step Count ---
+def plot_monthly_steps():
+    plt, sns = pyplot()
+    # 🔹 Sort data by date
+    steps_df = data["steps"].sort_values("date")
 
-# 🔹 Standardize column names
-steps_df.columns = steps_df.columns.str.strip().str.lower().str.replace(" ", "_")
+    plt.figure(figsize=(10, 5))
+    sns.barplot(x=steps_df["date"].dt.strftime('%B %Y'), y=steps_df["steps"], palette="Blues")
+    plt.xticks(rotation=45)
+    plt.ylabel("Total Steps")
+    plt.xlabel("Month")
+    plt.title("Monthly Step Count Trend")
+    plt.show()
 
-# 🔹 Convert date column to datetime format
-steps_df["date"] = pd.to_datetime(steps_df["date"], format="%B %Y", errors="coerce")
+# --- 📊 Daily Steps with Rolling Windows ---
+def plot_step_rolling():
+    """Plots daily step counts with their rolling averages."""
+    plt, _ = pyplot()
+    plt.figure(figsize=(12, 5))
+    rolling_plot(data["rolling"], "steps")
+    plt.xticks(rotation=45)
+    plt.ylabel("Steps")
+    plt.xlabel("Day")
+    plt.title("Daily Steps with Rolling Averages")
+    plt.grid(True)
+    plt.show()
 
-# 🔹 Sort data by date
-steps_df = steps_df.sort_values("date")
+def main():
+    plot_monthly_steps()
+    plot_step_rolling()
 
-# --- 📊 Plot Monthly Step Count ---
-plt.figure(figsize=(10, 5))
-sns.barplot(x=steps_df["date"].dt.strftime('%B %Y'), y=steps_df["steps"], palette="Blues")
-plt.xticks(rotation=45)
-plt.ylabel("Total Steps")
-plt.xlabel("Month")
-plt.title("Monthly Step Count Trend")
-plt.show()
+if __name__ == "__main__":
+    main()
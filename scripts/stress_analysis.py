@@ -1,36 +1,14 @@
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from correlations import correlations
+from datastore import default_store
+from plotting import pyplot, regplot, rolling_plot
 
-# --- ✅ Load Data ---
-DATA_FOLDER = "/Users/Elissa/Documents/garmin_data_analysis/cleaned_data"
-
-files = {
-    "stress": "Stress.csv",
-    "intensity": "Intensity Minutes.csv",
-    "steps": "Steps.csv",
-    "floors": "Floors Climbed.csv"
-}
-
-# Load all datasets
-data = {name: pd.read_csv(os.path.join(DATA_FOLDER, filename)) for name, filename in files.items()}
-
-# Standardize column names
-def clean_column_names(df):
-    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
-    return df
-
-data = {name: clean_column_names(df) for name, df in data.items()}
-
-# Convert date column to datetime format
-for df in data.values():
-    if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"], format="%B %Y", errors="coerce")
+# --- ✅ Cleaned datasets, loaded on first use ---
+data = default_store()
 
 # --- 📊 Monthly Stress Level Trends ---
 def plot_stress_trends():
     """Plots how stress fluctuates over time."""
+    plt, sns = pyplot()
     df = data["stress"].sort_values("date")
 
     plt.figure(figsize=(10, 5))
@@ -42,32 +20,58 @@ def plot_stress_trends():
     plt.grid(True)
     plt.show()
 
-plot_stress_trends()
+# --- 📊 Daily Stress Level with Rolling Windows ---
+def plot_stress_rolling():
+    """Plots daily stress with rolling averages, where the weekly rise and fall becomes visible."""
+    plt, _ = pyplot()
+    plt.figure(figsize=(12, 5))
+    rolling_plot(data["rolling"], "stress")
+    plt.xticks(rotation=45)
+    plt.ylabel("Stress Level")
+    plt.xlabel("Day")
+    plt.title("📊 Daily Stress with Rolling Averages")
+    plt.grid(True)
+    plt.show()
 
 # --- 🏆 Find Highest & Lowest Stress Months ---
+def stress_extremes(df):
+    """Returns the months with the highest and lowest average stress."""
+    return {
+        "most_stressful": df.loc[df["stress"].idxmax(), "date"],
+        "least_stressful": df.loc[df["stress"].idxmin(), "date"],
+    }
+
 def analyze_stress_extremes():
     """Finds the months with highest and lowest stress levels."""
-    df = data["stress"]
+    result = stress_extremes(data["stress"])
 
-    highest_stress_month = df.loc[df["stress"].idxmax(), "date"]
-    lowest_stress_month = df.loc[df["stress"].idxmin(), "date"]
+    print("\n🏆 Most Stressful Month:", result["most_stressful"].strftime('%B %Y'))
+    print("💤 Least Stressful Month:", result["least_stressful"].strftime('%B %Y'))
 
-    print("\n🏆 Most Stressful Month:", highest_stress_month.strftime('%B %Y'))
-    print("💤 Least Stressful Month:", lowest_stress_month.strftime('%B %Y'))
+# --- 🍂 Stress by Season ---
+def seasonal_stress(df):
+    """Average stress per season name (Winter, Spring, ...) across years, highest first."""
+    seasons = df["season"].str.split().str[0]
+    return df["stress"].groupby(seasons).mean().sort_values(ascending=False)
 
-analyze_stress_extremes()
+def analyze_seasonal_stress():
+    """Prints which seasons show the highest and lowest stress (from the precomputed seasonal rollup)."""
+    by_season = seasonal_stress(data.rollup("season", "stress"))
+    print("\n🍂 Average Stress by Season:")
+    for season, stress in by_season.items():
+        print(f"   🔹 {season}: {stress:.1f}")
 
 # --- 📊 Correlation Between Stress & Physical Activity ---
 def plot_stress_vs_activity():
     """Analyzes how stress correlates with steps, intensity, and floors climbed."""
-    df = data["stress"].merge(data["intensity"], on="date", how="inner")
-    df = df.merge(data["steps"], on="date", how="inner")
-    df = df.merge(data["floors"], on="date", how="inner")
+    plt, _ = pyplot()
+    df = data.monthly("stress", "actual", "steps", "climbed_floors")
 
-    # Calculate correlations
-    stress_intensity_corr = df["stress"].corr(df["actual"])
-    stress_steps_corr = df["stress"].corr(df["steps"])
-    stress_floors_corr = df["stress"].corr(df["climbed_floors"])
+    # Correlations come from the shared (cached) correlation matrix
+    corr = correlations(data)
+    stress_intensity_corr = corr.get("stress", "actual")
+    stress_steps_corr = corr.get("stress", "steps")
+    stress_floors_corr = corr.get("stress", "climbed_floors")
 
     print("\n📊 Correlation Results:")
     print(f"   🔹 Stress vs. Intensity Minutes: {stress_intensity_corr:.2f}")
@@ -78,19 +82,19 @@ def plot_stress_vs_activity():
     fig, axes = plt.subplots(1, 3, figsize=(18, 5))
 
     # Intensity vs Stress
-    sns.regplot(x=df["actual"], y=df["stress"], scatter_kws={"color": "blue"}, line_kws={"color": "black"}, ax=axes[0])
+    regplot(x=df["actual"], y=df["stress"], scatter_kws={"color": "blue"}, line_kws={"color": "black"}, ax=axes[0])
     axes[0].set_title(f"📊 Stress vs. Intensity Minutes (r={stress_intensity_corr:.2f})")
     axes[0].set_xlabel("Intensity Minutes")
     axes[0].set_ylabel("Average Stress Level")
 
     # Steps vs Stress
-    sns.regplot(x=df["steps"], y=df["stress"], scatter_kws={"color": "green"}, line_kws={"color": "black"}, ax=axes[1])
+    regplot(x=df["steps"], y=df["stress"], scatter_kws={"color": "green"}, line_kws={"color": "black"}, ax=axes[1])
     axes[1].set_title(f"📊 Stress vs. Steps (r={stress_steps_corr:.2f})")
     axes[1].set_xlabel("Steps")
     axes[1].set_ylabel("Average Stress Level")
 
     # Floors Climbed vs Stress
-    sns.regplot(x=df["climbed_floors"], y=df["stress"], scatter_kws={"color": "purple"}, line_kws={"color": "black"}, ax=axes[2])
+    regplot(x=df["climbed_floors"], y=df["stress"], scatter_kws={"color": "purple"}, line_kws={"color": "black"}, ax=axes[2])
     axes[2].set_title(f"📊 Stress vs. Floors Climbed (r={stress_floors_corr:.2f})")
     axes[2].set_xlabel("Floors Climbed")
     axes[2].set_ylabel("Average Stress Level")
@@ -98,7 +102,15 @@ def plot_stress_vs_activity():
     plt.tight_layout()
     plt.show()
 
-plot_stress_vs_activity()
+def main():
+    plot_stress_trends()
+    plot_stress_rolling()
+    analyze_stress_extremes()
+    analyze_seasonal_stress()
+    plot_stress_vs_activity()
+
+    # ✅ Ensure Plots Do Not Block Terminal Execution
+    pyplot()[0].show(block=False)
 
-# ✅ Ensure plots do not block execution
-plt.show(block=False)
+if __name__ == "__main__":
+    main()
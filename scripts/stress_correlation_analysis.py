@@ -1,75 +1,76 @@
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from correlations import correlations
+from datastore import default_store
+from plotting import pyplot, regplot
 
-# 🔹 Set correct path to the cleaned data folder
-DATA_FOLDER = "/Users/Elissa/Documents/garmin_data_analysis/cleaned_data"
+# 🔹 Cleaned datasets, loaded on first use
+data = default_store()
 
-# 🔹 Define dataset filenames
-files = {
-    "stress": "Stress.csv",
-    "intensity": "Intensity Minutes.csv",
-    "sleep": "Sleep.csv",
-    "heart_rate": "Average Heart Rate.csv",
-}
+# 🔹 Months with stress, intensity and sleep data; heart rate may be missing (kept like a left join)
+def load_merged():
+    merged_df = data.monthly("stress", "actual", "avg_duration", "heart_rate", dropna=False)
+    merged_df = merged_df.dropna(subset=["stress", "actual", "avg_duration"])
 
-# 🔹 Load datasets into pandas DataFrames
-data = {name: pd.read_csv(os.path.join(DATA_FOLDER, filename)) for name, filename in files.items()}
+    # 🔹 Handle missing heart rate values by forward-filling
+    merged_df["heart_rate"] = merged_df["heart_rate"].ffill()
+    return merged_df
 
-# 🔹 Standardize column names and ensure date formatting
-for name, df in data.items():
-    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    data[name] = df
-
-# 🔹 Convert Sleep Duration (e.g., "8h 32min") to Total Minutes
-def convert_sleep_to_minutes(duration):
-    """Converts sleep duration from '8h 32min' format to total minutes."""
-    try:
-        parts = duration.split("h")
-        hours = int(parts[0].strip()) if parts[0].strip().isdigit() else 0
-        minutes = int(parts[1].replace("min", "").strip()) if "min" in parts[1] else 0
-        return hours * 60 + minutes
-    except:
-        return None  # Handle errors gracefully
-
-data["sleep"]["avg_duration"] = data["sleep"]["avg_duration"].apply(convert_sleep_to_minutes)
+# --- 📊 Correlation Analysis ---
+CORRELATION_COLUMNS = ["stress", "actual", "avg_duration", "heart_rate"]
+ACTIVITY_COLUMNS = ["actual", "steps", "climbed_floors"]
 
-# 🔹 Merge datasets on 'date' to analyze correlations
-merged_df = data["stress"].merge(data["intensity"], on="date", how="inner").merge(
-    data["sleep"], on="date", how="inner"
-).merge(data["heart_rate"], on="date", how="left")  # Left join to keep all stress records
+def print_correlations():
+    corr = correlations(data)
+    columns = [c for c in CORRELATION_COLUMNS if c in corr.columns]
+    print("\n📊 Correlation Matrix:")
+    print(corr.matrix("pearson", columns=columns))
+    print("\n📊 Rank (Spearman) Correlation Matrix:")
+    print(corr.matrix("spearman", columns=columns))
+    print("\n🔹 Months behind each correlation:")
+    print(corr.counts(columns=columns))
 
-# 🔹 Handle missing heart rate values by forward-filling
-merged_df["heart_rate"] = merged_df["heart_rate"].ffill()
-
-# --- 📊 Correlation Analysis ---
-correlations = merged_df[["stress", "actual", "avg_duration", "heart_rate"]].corr()
-print("\n📊 Correlation Matrix:")
-print(correlations)
+    # ✅ Does this month's activity go with next month's stress?
+    print("\n📊 Activity This Month vs. Stress Next Month:")
+    for column in ACTIVITY_COLUMNS:
+        if column in corr.columns and "stress" in corr.columns:
+            print(f"   🔹 {column}: r={corr.get(column, 'stress', lag=1):.2f} "
+                  f"(Spearman {corr.get(column, 'stress', lag=1, method='spearman'):.2f}, "
+                  f"n={corr.counts(lag=1).loc[column, 'stress']})")
 
 # --- 📈 Scatter Plot: Training Intensity vs. Stress ---
-plt.figure(figsize=(8, 6))
-sns.regplot(x=merged_df["actual"], y=merged_df["stress"], 
-            scatter_kws={"color": "blue", "alpha": 0.6}, 
-            line_kws={"color": "red"})
-plt.xlabel("Intensity Minutes")
-plt.ylabel("Stress Level")
-plt.title("Relationship Between Training Intensity and Stress")
-plt.grid(True)
-plt.show()
+def plot_intensity_vs_stress():
+    plt, _ = pyplot()
+    merged_df = load_merged()
+    plt.figure(figsize=(8, 6))
+    regplot(x=merged_df["actual"], y=merged_df["stress"], 
+                scatter_kws={"color": "blue", "alpha": 0.6}, 
+                line_kws={"color": "red"})
+    plt.xlabel("Intensity Minutes")
+    plt.ylabel("Stress Level")
+    plt.title("Relationship Between Training Intensity and Stress")
+    plt.grid(True)
+    plt.show()
 
 # --- 📈 Scatter Plot: Resting Heart Rate vs. Stress ---
-plt.figure(figsize=(8, 6))
-sns.regplot(x=merged_df["heart_rate"], y=merged_df["stress"], 
-            scatter_kws={"color": "green", "alpha": 0.6}, 
-            line_kws={"color": "orange"})
-plt.xlabel("Resting Heart Rate (bpm)")
-plt.ylabel("Stress Level")
-plt.title("Relationship Between Resting Heart Rate and Stress")
-plt.grid(True)
-plt.show()
+def plot_rhr_vs_stress():
+    plt, _ = pyplot()
+    merged_df = load_merged()
+    plt.figure(figsize=(8, 6))
+    regplot(x=merged_df["heart_rate"], y=merged_df["stress"], 
+                scatter_kws={"color": "green", "alpha": 0.6}, 
+                line_kws={"color": "orange"})
+    plt.xlabel("Resting Heart Rate (bpm)")
+    plt.ylabel("Stress Level")
+    plt.title("Relationship Between Resting Heart Rate and Stress")
+    plt.grid(True)
+    plt.show()
+
+def main():
+    print_correlations()
+    plot_intensity_vs_stress()
+    plot_rhr_vs_stress()
+
+    # ✅ Ensure Plots Do Not Block Terminal Execution
+    pyplot()[0].show(block=False)
 
-# ✅ Ensure Plots Do Not Block Terminal Execution
-plt.show(block=False)
+if __name__ == "__main__":
+    main()